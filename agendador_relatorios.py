@@ -0,0 +1,307 @@
+"""
+Geração agendada dos relatórios em um pool de processos.
+
+Os relatórios (estatísticas resumidas, informações do período e dados em CSV,
+mais o resumo de gerar_relatorio_periodo para semana e mês) são gerados em
+segundo plano e guardados em <dados>_relatorios/ nos formatos JSON, CSV e
+HTML. A página Relatórios serve o relatório pronto da versão atual dos dados
+em vez de recalculá-lo a cada interação.
+
+Relatórios gerados:
+    geral    Histórico completo; refeito sempre que os dados mudam
+    semana   Última semana completa (segunda a domingo)
+    mes      Último mês completo
+
+O agendador refaz os relatórios quando a versão dos dados muda e, além disso,
+toda segunda-feira no horário de RELATORIOS_CONFIG, quando passam a existir
+uma nova semana (e possivelmente um novo mês) completa. Os períodos partem
+sempre da data do último horário agendado, no laço contínuo, em --uma-vez e
+na tarefa 'relatorios' da manutenção em segundo plano (ver manutencao.py),
+que é quem mantém os relatórios em dia dentro do app.
+
+Uso pela linha de comando:
+    python agendador_relatorios.py            # roda continuamente
+    python agendador_relatorios.py --uma-vez  # gera o que estiver pendente e sai
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+from data_manager import CONTADORES, DataManager
+from gravacao_atomica import gravar_atomico
+
+RELATORIOS_CONFIG = {
+    'processos': 2,            # Processos do pool de geração
+    'dia_semana': 0,           # Dia da geração agendada (0 = segunda-feira)
+    'hora': 7,                 # Hora da geração agendada
+    'intervalo_segundos': 30   # Intervalo entre verificações de mudança nos dados
+}
+
+FORMATOS = ('json', 'csv', 'html')
+
+
+def periodos_relatorio(hoje):
+    """
+    Períodos dos relatórios a partir de uma data de referência.
+
+    Args:
+        hoje (date): Data de referência
+
+    Returns:
+        dict: tipo -> (data_inicio, data_fim), com None para o histórico completo
+    """
+    fim_semana = hoje - timedelta(days=hoje.weekday() + 1)
+    fim_mes = hoje.replace(day=1) - timedelta(days=1)
+    return {
+        'geral': (None, None),
+        'semana': (fim_semana - timedelta(days=6), fim_semana),
+        'mes': (fim_mes.replace(day=1), fim_mes)
+    }
+
+
+def _para_json(valor):
+    """
+    Converte escalares numpy/pandas para tipos serializáveis em JSON.
+    """
+    if hasattr(valor, 'item'):
+        return valor.item()
+    if hasattr(valor, 'isoformat'):
+        return valor.isoformat()
+    return str(valor)
+
+
+def gerar_relatorio(arquivo_dados, diretorio, tipo, data_inicio=None, data_fim=None):
+    """
+    Gera um relatório e grava seus arquivos. Executada nos processos do pool.
+
+    Args:
+        arquivo_dados (str): Arquivo de dados do DataManager
+        diretorio (str): Diretório de destino
+        tipo (str): Uma das chaves de periodos_relatorio()
+        data_inicio (date): Início do período (None = histórico completo)
+        data_fim (date): Fim do período
+
+    Returns:
+        dict: Metadados do relatório gerado ('vazio' se o período não tem dados)
+    """
+    from utils import gerar_relatorio_periodo
+
+    dm = DataManager(arquivo_dados)
+    versao = dm.versao_dados()
+    df = dm.filtrar_dados(data_inicio, data_fim)
+    if df.empty:
+        return {
+            'tipo': tipo, 'versao_dados': versao, 'gerado_em': datetime.now().isoformat(timespec='seconds'),
+            'data_inicio': data_inicio and data_inicio.isoformat(), 'data_fim': data_fim and data_fim.isoformat(),
+            'vazio': True
+        }
+
+    data_inicio = data_inicio or df['data'].min().date()
+    data_fim = data_fim or df['data'].max().date()
+    estatisticas = df[list(CONTADORES)].describe()
+
+    conteudo = {
+        'tipo': tipo,
+        'versao_dados': versao,
+        'gerado_em': datetime.now().isoformat(timespec='seconds'),
+        'data_inicio': data_inicio.isoformat(),
+        'data_fim': data_fim.isoformat(),
+        'resumo': gerar_relatorio_periodo(df, data_inicio, data_fim),
+        'informacoes': {
+            'periodo': f"{data_inicio.strftime('%d/%m/%Y')} a {data_fim.strftime('%d/%m/%Y')}",
+            'total_dias': len(df),
+            **{f"media_{contador}": df[contador].mean() for contador in CONTADORES}
+        },
+        'estatisticas': estatisticas.to_dict()
+    }
+
+    base = os.path.join(diretorio, tipo)
+    gravar_atomico(f"{base}.json", json.dumps(conteudo, default=_para_json, ensure_ascii=False))
+    gravar_atomico(f"{base}.csv", df.to_csv(index=False))
+    gravar_atomico(f"{base}.html", (
+        f"<html><head><meta charset='utf-8'><title>Relatório {tipo}</title></head><body>"
+        f"<h1>Relatório de tickets: {conteudo['informacoes']['periodo']}</h1>"
+        f"<p>Gerado em {conteudo['gerado_em']}</p>"
+        "<h2>Resumo</h2><table>"
+        + ''.join(f"<tr><th>{chave}</th><td>{_para_json(valor)}</td></tr>"
+                  for chave, valor in conteudo['resumo'].items())
+        + "</table><h2>Estatísticas</h2>" + estatisticas.to_html(float_format='%.1f')
+        + "</body></html>"
+    ))
+
+    return {campo: conteudo[campo] for campo in ('tipo', 'versao_dados', 'gerado_em', 'data_inicio', 'data_fim')}
+
+
+class AgendadorRelatorios:
+    """
+    Mantém os relatórios de um arquivo de dados em dia, gerando-os em um
+    pool de processos. O índice (indice.json) registra, por tipo, a versão
+    dos dados e o período de cada relatório pronto.
+    """
+
+    def __init__(self, data_manager, processos=None):
+        """
+        Args:
+            data_manager (DataManager): Dados de origem
+            processos (int): Tamanho do pool (padrão: RELATORIOS_CONFIG)
+        """
+        self.data_manager = data_manager
+        self.diretorio = data_manager.caminho_auxiliar('relatorios')
+        self.processos = processos or RELATORIOS_CONFIG['processos']
+
+    def indice(self):
+        """
+        Returns:
+            dict: tipo -> metadados do último relatório gerado
+        """
+        return ler_indice(self.diretorio)
+
+    def pendentes(self, hoje=None):
+        """
+        Relatórios ausentes, de outra versão dos dados ou de um período anterior.
+
+        Args:
+            hoje (date): Data de referência (padrão: a do último horário agendado)
+
+        Returns:
+            dict: tipo -> (data_inicio, data_fim) dos relatórios a gerar
+        """
+        versao = self.data_manager.versao_dados()
+        indice = self.indice()
+        pendentes = {}
+        for tipo, (inicio, fim) in periodos_relatorio(hoje or self.referencia()).items():
+            atual = indice.get(tipo)
+            if (
+                atual is None or atual['versao_dados'] != versao
+                or (fim is not None and atual['data_fim'] != fim.isoformat())
+            ):
+                pendentes[tipo] = (inicio, fim)
+        return pendentes
+
+    def executar(self, hoje=None):
+        """
+        Gera, em paralelo, os relatórios pendentes e atualiza o índice.
+
+        Args:
+            hoje (date): Data de referência (padrão: a do último horário agendado)
+
+        Returns:
+            list: Tipos dos relatórios gerados (com dados no período)
+        """
+        pendentes = self.pendentes(hoje)
+        if not pendentes:
+            return []
+
+        os.makedirs(self.diretorio, exist_ok=True)
+        # spawn: os processos filhos não herdam threads nem conexões abertas
+        contexto = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=min(self.processos, len(pendentes)), mp_context=contexto) as pool:
+            futuros = {
+                tipo: pool.submit(gerar_relatorio, self.data_manager.arquivo_excel, self.diretorio, tipo, inicio, fim)
+                for tipo, (inicio, fim) in pendentes.items()
+            }
+            gerados = {tipo: futuro.result() for tipo, futuro in futuros.items()}
+
+        indice = self.indice()
+        indice.update(gerados)
+        gravar_atomico(os.path.join(self.diretorio, 'indice.json'), json.dumps(indice))
+        return [tipo for tipo, metadados in gerados.items() if not metadados.get('vazio')]
+
+    @staticmethod
+    def ultima_execucao_agendada(agora=None):
+        """
+        Returns:
+            datetime: Horário agendado mais recente (até agora)
+        """
+        agora = agora or datetime.now()
+        dias = (agora.weekday() - RELATORIOS_CONFIG['dia_semana']) % 7
+        ultima = (agora - timedelta(days=dias)).replace(
+            hour=RELATORIOS_CONFIG['hora'], minute=0, second=0, microsecond=0
+        )
+        return ultima if ultima <= agora else ultima - timedelta(days=7)
+
+    @classmethod
+    def referencia(cls, agora=None):
+        """
+        Data de referência dos períodos: os períodos só avançam no horário
+        agendado, não à meia-noite.
+
+        Returns:
+            date: Data do horário agendado mais recente
+        """
+        return cls.ultima_execucao_agendada(agora).date()
+
+    def rodar(self):
+        """
+        Laço do agendador: gera os relatórios sempre que os dados mudam e, no
+        horário semanal agendado, os da nova semana e do novo mês.
+        """
+        while True:
+            try:
+                gerados = self.executar()
+                if gerados:
+                    print(f"[{datetime.now():%Y-%m-%d %H:%M:%S}] Relatórios gerados: {', '.join(gerados)}")
+            except Exception as e:
+                print(f"Erro ao gerar relatórios: {e}")
+            time.sleep(RELATORIOS_CONFIG['intervalo_segundos'])
+
+
+def ler_indice(diretorio):
+    """
+    Args:
+        diretorio (str): Diretório dos relatórios
+
+    Returns:
+        dict: tipo -> metadados ({} se nenhum relatório foi gerado)
+    """
+    try:
+        with open(os.path.join(diretorio, 'indice.json'), encoding='utf-8') as arquivo:
+            return json.load(arquivo)
+    except (OSError, ValueError):
+        return {}
+
+
+def relatorio_pronto(data_manager, tipo, versao=None):
+    """
+    Lê um relatório pré-gerado.
+
+    Args:
+        data_manager (DataManager): Dados de origem
+        tipo (str): Uma das chaves de periodos_relatorio()
+        versao (str): Se informada, só aceita relatórios desta versão dos dados
+
+    Returns:
+        dict: Conteúdo do relatório com o caminho de cada formato em
+        'arquivos', ou None se não houver relatório (da versão pedida)
+    """
+    diretorio = data_manager.caminho_auxiliar('relatorios')
+    metadados = ler_indice(diretorio).get(tipo)
+    if metadados is None or metadados.get('vazio') or (versao is not None and metadados['versao_dados'] != versao):
+        return None
+    try:
+        with open(os.path.join(diretorio, f"{tipo}.json"), encoding='utf-8') as arquivo:
+            conteudo = json.load(arquivo)
+    except (OSError, ValueError):
+        return None
+    conteudo['arquivos'] = {formato: os.path.join(diretorio, f"{tipo}.{formato}") for formato in FORMATOS}
+    return conteudo
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Geração agendada de relatórios")
+    parser.add_argument('--arquivo', default="dados_tickets.xlsx", help="Arquivo de dados")
+    parser.add_argument('--uma-vez', action='store_true', help="Gera os relatórios pendentes e sai")
+    args = parser.parse_args()
+
+    agendador = AgendadorRelatorios(DataManager(args.arquivo))
+    if args.uma_vez:
+        gerados = agendador.executar()
+        print(f"✅ {len(gerados)} relatório(s) gerado(s): {', '.join(gerados) or 'nenhum pendente'}")
+    else:
+        print("⏰ Agendador de relatórios iniciado")
+        agendador.rodar()
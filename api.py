@@ -0,0 +1,323 @@
+"""
+API HTTP/JSON somente leitura sobre o DataManager.
+Execute `python api.py` para expor estatísticas, consultas por período, KPIs e
+agregações para outros painéis internos, sem depender da interface Streamlit.
+
+Endpoints (GET):
+    /versao                              Versão atual dos dados
+    /estatisticas                        DataManager.obter_estatisticas()
+    /dados?inicio=AAAA-MM-DD&fim=...     Registros diários do período
+    /kpis?inicio=...&fim=...             utils.calcular_kpis() do período
+    /agregados?periodo=semana&inicio=... utils.agregar_por_periodo() do período
+    /metrics                             Métricas do processo (OpenMetrics, metricas.py)
+
+As respostas trazem ETag igual à versão dos dados: clientes que repetem a
+requisição com If-None-Match recebem 304 sem que os dados sejam lidos.
+"""
+
+import argparse
+import json
+import math
+import threading
+from datetime import date, datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from data_manager import DataManager
+from metricas import CACHE_CONSULTAS, TIPO_CONTEUDO, gerar_texto, monitorar_armazenamento
+from utils import PERIODOS_AGREGACAO, agregar_por_periodo, calcular_kpis
+
+API_CONFIG = {
+    'host': '127.0.0.1',
+    'porta': 8502,
+    # Tempo (s) em que o cliente pode reutilizar a resposta sem revalidar
+    'max_age': 5
+}
+
+
+class LeituraCompartilhada:
+    """
+    Caminho de leitura compartilhado entre as conexões do servidor.
+    Mantém o DataFrame e as respostas já serializadas da versão atual dos dados,
+    recarregando-os apenas quando a versão muda.
+    """
+
+    def __init__(self, data_manager):
+        self.data_manager = data_manager
+        self._lock = threading.Lock()
+        self._versao = None
+        self._df = None
+        self._respostas = {}
+
+    def versao(self):
+        """
+        Returns:
+            str: Versão atual dos dados (apenas os metadados do arquivo são lidos)
+        """
+        return self.data_manager.versao_dados() or "vazio"
+
+    def obter(self, versao):
+        """
+        Retorna o DataFrame da versão informada, recarregando se necessário.
+
+        Args:
+            versao (str): Versão dos dados esperada
+
+        Returns:
+            pd.DataFrame: Dados carregados
+        """
+        with self._lock:
+            if self._versao != versao:
+                self._df = self.data_manager.carregar_dados()
+                self._respostas = {}
+                self._versao = versao
+            return self._df
+
+    def resposta(self, versao, chave, gerar):
+        """
+        Retorna o corpo serializado de uma consulta, gerando-o uma vez por versão.
+
+        Args:
+            versao (str): Versão dos dados
+            chave (str): Identificador da consulta (caminho + parâmetros)
+            gerar (callable): Função que recebe o DataFrame e retorna o objeto a serializar
+
+        Returns:
+            bytes: Corpo JSON da resposta
+        """
+        df = self.obter(versao)
+        with self._lock:
+            corpo = self._respostas.get(chave)
+        CACHE_CONSULTAS.incrementar(cache='api_respostas', resultado='acerto' if corpo is not None else 'falha')
+        if corpo is None:
+            corpo = json.dumps(gerar(df), default=_para_json, ensure_ascii=False).encode('utf-8')
+            with self._lock:
+                if self._versao == versao:
+                    self._respostas[chave] = corpo
+        return corpo
+
+
+def _para_json(valor):
+    """
+    Converte tipos do pandas/numpy para tipos serializáveis em JSON.
+    """
+    if hasattr(valor, 'isoformat'):
+        return valor.isoformat()
+    if hasattr(valor, 'item'):
+        valor = valor.item()
+        return None if isinstance(valor, float) and math.isnan(valor) else valor
+    raise TypeError(f"Tipo não serializável: {type(valor).__name__}")
+
+
+def _registros(df):
+    """
+    Converte um DataFrame em lista de dicionários com datas no formato ISO.
+    """
+    df = df.copy()
+    for coluna in df.columns:
+        if hasattr(df[coluna], 'dt'):
+            df[coluna] = df[coluna].dt.strftime('%Y-%m-%d')
+    return df.astype(object).where(df.notna(), None).to_dict(orient='records')
+
+
+def _ler_data(parametros, nome):
+    """
+    Lê um parâmetro de data (AAAA-MM-DD) da query string.
+
+    Raises:
+        ValueError: Se a data estiver em formato inválido
+    """
+    valor = parametros.get(nome, [None])[0]
+    if not valor:
+        return None
+    try:
+        return date.fromisoformat(valor)
+    except ValueError:
+        raise ValueError(f"Parâmetro '{nome}' inválido: use o formato AAAA-MM-DD")
+
+
+def _filtrar_periodo(df, data_inicio, data_fim):
+    """
+    Restringe o DataFrame ao período informado.
+    """
+    if df.empty:
+        return df
+    if data_inicio:
+        df = df[df['data'].dt.date >= data_inicio]
+    if data_fim:
+        df = df[df['data'].dt.date <= data_fim]
+    return df
+
+
+def _consulta_estatisticas(data_manager, parametros):
+    return lambda df: data_manager.obter_estatisticas(df)
+
+
+def _consulta_dados(data_manager, parametros):
+    inicio, fim = _ler_data(parametros, 'inicio'), _ler_data(parametros, 'fim')
+    return lambda df: _registros(_filtrar_periodo(df, inicio, fim))
+
+
+def _consulta_kpis(data_manager, parametros):
+    inicio, fim = _ler_data(parametros, 'inicio'), _ler_data(parametros, 'fim')
+    return lambda df: calcular_kpis(_filtrar_periodo(df, inicio, fim), data_manager.arquivo_excel)
+
+
+def _consulta_agregados(data_manager, parametros):
+    inicio, fim = _ler_data(parametros, 'inicio'), _ler_data(parametros, 'fim')
+    periodo = parametros.get('periodo', ['semana'])[0]
+    if periodo not in PERIODOS_AGREGACAO:
+        raise ValueError(f"Parâmetro 'periodo' inválido: use {', '.join(PERIODOS_AGREGACAO)}")
+    if periodo == 'mes' and inicio is None and fim is None:
+        # Meses do arquivo morto já vêm agregados
+        return lambda df: _registros(data_manager.agregados_mensais())
+    return lambda df: _registros(agregar_por_periodo(_filtrar_periodo(df, inicio, fim), periodo))
+
+
+# Cada rota valida os parâmetros e devolve a função que gera a resposta
+ROTAS = {
+    '/estatisticas': _consulta_estatisticas,
+    '/dados': _consulta_dados,
+    '/kpis': _consulta_kpis,
+    '/agregados': _consulta_agregados,
+}
+
+
+class ManipuladorAPI(BaseHTTPRequestHandler):
+    """
+    Manipulador HTTP da API. Usa HTTP/1.1 para que clientes que fazem polling
+    reutilizem a mesma conexão (keep-alive) entre as requisições.
+    """
+
+    protocol_version = 'HTTP/1.1'
+    leitura = None
+    max_age = API_CONFIG['max_age']
+
+    def do_GET(self):
+        self._responder(incluir_corpo=True)
+
+    def do_HEAD(self):
+        self._responder(incluir_corpo=False)
+
+    def _responder(self, incluir_corpo):
+        url = urlparse(self.path)
+        if url.path == '/metrics':
+            self._enviar_metricas(incluir_corpo)
+            return
+        parametros = parse_qs(url.query)
+        versao = self.leitura.versao()
+        etag = f'"{versao}"'
+
+        if url.path == '/versao':
+            self._enviar(200, json.dumps({'versao': versao}).encode('utf-8'), etag, incluir_corpo)
+            return
+
+        rota = ROTAS.get(url.path)
+        if rota is None:
+            self._enviar_erro(404, f"Endpoint não encontrado: {url.path}")
+            return
+
+        try:
+            gerar = rota(self.leitura.data_manager, parametros)
+        except ValueError as e:
+            self._enviar_erro(400, str(e))
+            return
+
+        if etag in self._etags_cliente():
+            self._enviar(304, b'', etag, incluir_corpo=False)
+            return
+
+        chave = f"{url.path}?{url.query}"
+        try:
+            corpo = self.leitura.resposta(versao, chave, gerar)
+        except Exception as e:
+            self._enviar_erro(500, f"Erro ao gerar resposta: {e}")
+            return
+
+        self._enviar(200, corpo, etag, incluir_corpo)
+
+    def _etags_cliente(self):
+        """
+        Returns:
+            set: ETags informadas no cabeçalho If-None-Match
+        """
+        valor = self.headers.get('If-None-Match', '')
+        return {parte.strip().removeprefix('W/') for parte in valor.split(',') if parte.strip()}
+
+    def _enviar(self, status, corpo, etag, incluir_corpo):
+        self.send_response(status)
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', f'max-age={self.max_age}, must-revalidate')
+        if status != 304:
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        if incluir_corpo and status != 304:
+            self.wfile.write(corpo)
+
+    def _enviar_metricas(self, incluir_corpo):
+        corpo = gerar_texto()
+        self.send_response(200)
+        self.send_header('Content-Type', TIPO_CONTEUDO)
+        self.send_header('Content-Length', str(len(corpo)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        if incluir_corpo:
+            self.wfile.write(corpo)
+
+    def _enviar_erro(self, status, mensagem):
+        corpo = json.dumps({'erro': mensagem}, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(corpo)
+
+    def log_message(self, formato, *args):
+        print(f"[{datetime.now().strftime('%H:%M:%S')}] {self.address_string()} {formato % args}")
+
+
+def criar_servidor(arquivo_excel="dados_tickets.xlsx", host=None, porta=None, max_age=None):
+    """
+    Cria o servidor HTTP da API (sem iniciá-lo).
+
+    Args:
+        arquivo_excel (str): Arquivo de dados servido pela API
+        host (str): Endereço de escuta (padrão: API_CONFIG['host'])
+        porta (int): Porta de escuta (padrão: API_CONFIG['porta'])
+        max_age (int): Valor de max-age do Cache-Control em segundos
+
+    Returns:
+        ThreadingHTTPServer: Servidor configurado
+    """
+    data_manager = DataManager(arquivo_excel)
+    monitorar_armazenamento(data_manager)
+    manipulador = type('Manipulador', (ManipuladorAPI,), {
+        'leitura': LeituraCompartilhada(data_manager),
+        'max_age': API_CONFIG['max_age'] if max_age is None else max_age,
+    })
+    servidor = ThreadingHTTPServer(
+        (host or API_CONFIG['host'], porta or API_CONFIG['porta']), manipulador
+    )
+    servidor.daemon_threads = True
+    return servidor
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="API somente leitura do Dashboard de Tickets")
+    parser.add_argument('--arquivo', default="dados_tickets.xlsx", help="Arquivo de dados")
+    parser.add_argument('--host', default=API_CONFIG['host'])
+    parser.add_argument('--porta', type=int, default=API_CONFIG['porta'])
+    parser.add_argument('--max-age', type=int, default=API_CONFIG['max_age'])
+    args = parser.parse_args()
+
+    servidor = criar_servidor(args.arquivo, args.host, args.porta, args.max_age)
+    print(f"🌐 API disponível em http://{args.host}:{args.porta}")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 API encerrada.")
+    finally:
+        servidor.server_close()
@@ -1,10 +1,22 @@
 import streamlit as st
+import os
+import time
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime, date
-import os
-from data_manager import DataManager
+from aquecimento import aquecimento_para, figuras_geral, grafico_7_dias
+from data_manager import gerenciador_para
+from piramide import PiramideTemporal
+from filtros import Condicao, DiaSemana, E, Equipe, Ou, Periodo, PossuiLinks, TextoLinks
+from intradiario import INTRADIARIO_CONFIG
+from manutencao import ler_status, manutencao_para
+from metricas import EXECUCAO_SEGUNDOS, iniciar_exportador, monitorar_armazenamento
+from notificacoes import NOTIFICACOES_CONFIG
+from utils import DESCRICAO_NIVEIS, calcular_kpis, chave_versao, compactar_figura, diferencas_lote, validar_lote
+
+# Duração da execução completa, exportada em hub_tickets_execucao_segundos
+inicio_execucao = time.perf_counter()
+
+# plotly.express é importado apenas nas páginas que desenham gráficos
 
 # Configuração da página
 st.set_page_config(
@@ -14,38 +26,118 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Inicializar o gerenciador de dados
+# Opções de "Filtrar por" na página Filtros Avançados
+FILTROS_POR_TIPO = {
+    "Todos": None,
+    "Apenas dias com tickets iniciados": Condicao('tickets_iniciados', '>', 0),
+    "Apenas dias com tickets finalizados": Condicao('tickets_finalizados', '>', 0),
+    "Apenas dias com tickets em andamento": Condicao('tickets_andamento', '>', 0)
+}
+
+DIAS_SEMANA = ['Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado', 'Domingo']
+
+# Inicializar o gerenciador de dados. Várias instâncias do app podem
+# compartilhar um banco SQLite: TICKETS_ARQUIVO=dados_tickets.db streamlit run app.py
 def init_data_manager():
-    return DataManager()
+    return gerenciador_para(os.environ.get('TICKETS_ARQUIVO', 'dados_tickets.xlsx'))
 
-# Criar instância sem cache para evitar problemas de persistência
+# Uma instância por processo, compartilhada pelas sessões: os dados em si não
+# ficam em cache, cada leitura confere a versão atual no armazenamento
 data_manager = init_data_manager()
+# Versão dos dados mantida em memória pelo notificador do processo
+notificador = data_manager.observar_alteracoes()
+# Manutenção em segundo plano (backups, compactação, aquecimento, índices). Com
+# TICKETS_MANUTENCAO=externa, ela roda só no executor `python manutencao.py`.
+if os.environ.get('TICKETS_MANUTENCAO') != 'externa':
+    manutencao_para(data_manager)
+# Métricas OpenMetrics em http://127.0.0.1:9464/metrics (ver metricas.py)
+iniciar_exportador()
+monitorar_armazenamento(data_manager)
+# Caches aquecidos em segundo plano ao iniciar o processo (ver aquecimento.py);
+# quem chega antes do fim espera um pouco em vez de refazer o mesmo trabalho
+aquecimento = aquecimento_para(data_manager)
+if not aquecimento.pronto.is_set():
+    with st.spinner("⏳ Preparando os dados..."):
+        aquecimento.aguardar()
 
-# Título principal
-st.title("🎫 Dashboard de Tickets de Suporte")
-st.markdown("---")
+def carregar_dados_atuais():
+    """
+    Dados da versão atual. O DataManager serve o snapshot Arrow mapeado em
+    memória, compartilhado por todas as sessões e processos do host, em vez de
+    uma cópia desserializada do cache por sessão.
+    """
+    return data_manager.carregar_dados()
 
-# Sidebar para navegação
-st.sidebar.title("Menu de Navegação")
-page = st.sidebar.selectbox(
-    "Escolha uma opção:",
-    ["🏠 Dashboard Hoje", "📊 Dashboard Geral", "📈 Relatórios", "🔍 Filtros Avançados"]
-)
+def obter_dados_hoje(df, hoje):
+    """
+    Retorna a linha de hoje (ou None) e os últimos 7 dias do histórico.
+    """
+    if df.empty:
+        return None, df
+    dados_hoje_mask = df['data'].dt.date == hoje
+    dados_hoje = df[dados_hoje_mask].iloc[0] if dados_hoje_mask.any() else None
+    return dados_hoje, df.tail(7)
 
-if page == "🏠 Dashboard Hoje":
-    # Data de hoje
+# Fragmentos do Dashboard Hoje e os recortes dos dados de que cada um depende.
+# Ao salvar, apenas os fragmentos cujo recorte mudou são reexecutados.
+FRAGMENTOS_HOJE = {
+    'cartoes_hoje': lambda df, hoje: obter_dados_hoje(df, hoje)[0],
+    'grafico_7_dias': lambda df, hoje: obter_dados_hoje(df, hoje)[1],
+    'tabela_7_dias': lambda df, hoje: obter_dados_hoje(df, hoje)[1],
+    'previsao_hoje': lambda df, hoje: df.tail(1),
+}
+
+def registrar_versao_fragmento(chave_fragmento, recorte):
+    st.session_state[f"versao_{chave_fragmento}"] = chave_versao(recorte)
+
+def fragmentos_alterados(hoje):
+    """
+    Compara a versão de cada recorte com a última renderizada e retorna os
+    fragmentos que precisam ser reexecutados (o formulário sempre é).
+    """
+    df = carregar_dados_atuais()
+    alterados = ['formulario_hoje']
+    for chave_fragmento, recorte in FRAGMENTOS_HOJE.items():
+        if st.session_state.get(f"versao_{chave_fragmento}") != chave_versao(recorte(df, hoje)):
+            alterados.append(chave_fragmento)
+    return alterados
+
+def salvar_dados_hoje():
+    """
+    Callback do botão Salvar: grava os dados e reexecuta só os fragmentos afetados.
+    """
     hoje = date.today()
-    st.header(f"📅 Dashboard de Hoje - {hoje.strftime('%d/%m/%Y')}")
+    existia = st.session_state.get('versao_cartoes_hoje', 'vazio') != 'vazio'
+    sucesso = data_manager.adicionar_registro(
+        hoje,
+        st.session_state['hoje_iniciados'],
+        st.session_state['hoje_finalizados'],
+        st.session_state['hoje_andamento'],
+        st.session_state['hoje_links']
+    )
     
-    # Carregar dados
-    df = data_manager.carregar_dados()
-    
-    # Verificar se já existe registro para hoje
-    dados_hoje = None
-    if not df.empty:
-        dados_hoje_mask = df['data'].dt.date == hoje
-        if dados_hoje_mask.any():
-            dados_hoje = df[dados_hoje_mask].iloc[0]
+    if sucesso:
+        acao = "atualizados" if existia else "registrados"
+        st.session_state['mensagem_hoje'] = ('success', f"✅ Dados {acao} com sucesso para hoje ({hoje.strftime('%d/%m/%Y')})!")
+    else:
+        st.session_state['mensagem_hoje'] = ('error', "❌ Erro ao salvar os dados. Tente novamente.")
+    st.rerun(fragmentos_alterados(hoje))
+
+def excluir_dados_hoje():
+    """
+    Callback do botão Excluir: remove o registro de hoje e reexecuta só os fragmentos afetados.
+    """
+    hoje = date.today()
+    if data_manager.excluir_registro(hoje):
+        st.session_state['mensagem_hoje'] = ('success', "🗑️ Dados de hoje excluídos com sucesso!")
+    else:
+        st.session_state['mensagem_hoje'] = ('error', "❌ Erro ao excluir dados.")
+    st.rerun(fragmentos_alterados(hoje))
+
+@st.fragment(key='cartoes_hoje')
+def exibir_cartoes_hoje(hoje):
+    dados_hoje, _ = obter_dados_hoje(carregar_dados_atuais(), hoje)
+    registrar_versao_fragmento('cartoes_hoje', dados_hoje)
     
     # Status do dia
     col1, col2 = st.columns([2, 1])
@@ -85,12 +177,21 @@ if page == "🏠 Dashboard Hoje":
     with col2:
         if dados_hoje is not None:
             st.info("💡 **Dica:** Você pode atualizar os dados do dia a qualquer momento usando o formulário abaixo.")
-    
-    st.markdown("---")
+
+@st.fragment(key='formulario_hoje')
+def exibir_formulario_hoje(hoje):
+    dados_hoje, _ = obter_dados_hoje(carregar_dados_atuais(), hoje)
     
     # Formulário para lançar/atualizar dados de hoje
     st.subheader("📝 Lançar/Atualizar Dados de Hoje")
     
+    if 'mensagem_hoje' in st.session_state:
+        tipo, mensagem = st.session_state.pop('mensagem_hoje')
+        if tipo == 'success':
+            st.success(mensagem)
+        else:
+            st.error(mensagem)
+    
     # Pre-carregar valores se já existem dados para hoje
     valor_iniciados = int(dados_hoje['tickets_iniciados']) if dados_hoje is not None else 0
     valor_finalizados = int(dados_hoje['tickets_finalizados']) if dados_hoje is not None else 0
@@ -101,116 +202,284 @@ if page == "🏠 Dashboard Hoje":
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            tickets_iniciados = st.number_input(
+            st.number_input(
                 "🎫 Tickets Iniciados Hoje:",
                 min_value=0,
                 value=valor_iniciados,
+                key='hoje_iniciados',
                 help="Número de tickets que foram iniciados hoje"
             )
         
         with col2:
-            tickets_finalizados = st.number_input(
+            st.number_input(
                 "✅ Tickets Finalizados Hoje:",
                 min_value=0,
                 value=valor_finalizados,
+                key='hoje_finalizados',
                 help="Número de tickets que foram finalizados hoje"
             )
         
         with col3:
-            tickets_andamento = st.number_input(
+            st.number_input(
                 "⏳ Tickets em Andamento:",
                 min_value=0,
                 value=valor_andamento,
+                key='hoje_andamento',
                 help="Número total de tickets em andamento hoje"
             )
         
         # Campo para links dos chamados
-        links_chamados = st.text_area(
+        st.text_area(
             "🔗 Links dos Chamados Abertos:",
             value=valor_links,
             height=100,
+            key='hoje_links',
             help="Cole aqui os links dos chamados abertos hoje (um por linha ou separados por vírgula)",
             placeholder="Exemplo:\nhttps://link1.com\nhttps://link2.com\nou\nlink1, link2, link3"
         )
         
         col_btn1, col_btn2 = st.columns(2)
         with col_btn1:
-            submitted = st.form_submit_button("💾 Salvar/Atualizar Dados", width='stretch')
+            st.form_submit_button("💾 Salvar/Atualizar Dados", width='stretch', on_click=salvar_dados_hoje)
         with col_btn2:
             if dados_hoje is not None:
-                excluir = st.form_submit_button("🗑️ Excluir Dados de Hoje", width='stretch')
-        
-        if submitted:
-            sucesso = data_manager.adicionar_registro(
-                hoje, tickets_iniciados, tickets_finalizados, tickets_andamento, links_chamados
-            )
-            
-            if sucesso:
-                if dados_hoje is not None:
-                    st.success(f"✅ Dados atualizados com sucesso para hoje ({hoje.strftime('%d/%m/%Y')})!")
-                else:
-                    st.success(f"✅ Dados registrados com sucesso para hoje ({hoje.strftime('%d/%m/%Y')})!")
-                st.balloons()
-                st.rerun()  # Recarregar página para mostrar dados atualizados
-            else:
-                st.error("❌ Erro ao salvar os dados. Tente novamente.")
-        
-        if dados_hoje is not None and 'excluir' in locals() and excluir:
-            if data_manager.excluir_registro(hoje):
-                st.success("🗑️ Dados de hoje excluídos com sucesso!")
-                st.rerun()
-            else:
-                st.error("❌ Erro ao excluir dados.")
+                st.form_submit_button("🗑️ Excluir Dados de Hoje", width='stretch', on_click=excluir_dados_hoje)
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def carregar_curva_intradiaria(_snapshots, caminho, tamanho, dia):
+    """
+    Lê a curva do dia uma vez por tamanho do arquivo (que só cresce a cada snapshot).
+    """
+    return _snapshots.curva_dia(dia)
+
+@st.fragment(key='curva_hoje', run_every=INTRADIARIO_CONFIG['atualizacao_segundos'])
+def exibir_curva_hoje(hoje):
+    snapshots = data_manager.intradiario
+    caminho = snapshots.caminho_dia(hoje)
+    if not os.path.exists(caminho):
+        return
     
-    # Mostrar histórico dos últimos 7 dias
-    if not df.empty:
-        st.markdown("---")
-        st.subheader("📊 Últimos 7 Dias")
-        
-        # Pegar últimos 7 dias
-        ultimos_7_dias = df.tail(7)
-        
-        # Gráfico dos últimos 7 dias
-        fig_linha = px.line(
-            ultimos_7_dias,
-            x='data',
-            y=['tickets_iniciados', 'tickets_finalizados', 'tickets_andamento'],
-            title="Evolução dos Últimos 7 Dias",
-            labels={'value': 'Número de Tickets', 'variable': 'Tipo de Ticket'}
+    import plotly.express as px
+    
+    curva = carregar_curva_intradiaria(snapshots, caminho, os.path.getsize(caminho), hoje)
+    
+    st.markdown("---")
+    st.subheader("⏱️ Evolução ao Longo do Dia")
+    fig_curva = px.line(
+        curva,
+        x='momento',
+        y=['tickets_iniciados', 'tickets_finalizados', 'tickets_andamento'],
+        title=f"Snapshots de Hoje (último às {curva['momento'].iloc[-1].strftime('%H:%M')})",
+        labels={'value': 'Número de Tickets', 'variable': 'Tipo de Ticket', 'momento': 'Horário'}
+    )
+    fig_curva.update_layout(height=300)
+    st.plotly_chart(compactar_figura(fig_curva), width='stretch')
+
+@st.fragment(key='grafico_7_dias')
+def exibir_grafico_7_dias(hoje):
+    _, ultimos_7_dias = obter_dados_hoje(carregar_dados_atuais(), hoje)
+    registrar_versao_fragmento('grafico_7_dias', ultimos_7_dias)
+    
+    if ultimos_7_dias.empty:
+        return
+    
+    st.markdown("---")
+    st.subheader("📊 Últimos 7 Dias")
+    
+    # Gráfico dos últimos 7 dias
+    st.plotly_chart(grafico_7_dias(ultimos_7_dias), width='stretch')
+
+@st.fragment(key='tabela_7_dias')
+def exibir_tabela_7_dias(hoje):
+    _, ultimos_7_dias = obter_dados_hoje(carregar_dados_atuais(), hoje)
+    registrar_versao_fragmento('tabela_7_dias', ultimos_7_dias)
+    
+    if ultimos_7_dias.empty:
+        return
+    
+    # Tabela dos últimos 7 dias
+    df_display = ultimos_7_dias.copy()
+    df_display['data'] = df_display['data'].dt.strftime('%d/%m/%Y')
+    
+    # Truncar links para exibição na tabela
+    if 'links_chamados' in df_display.columns:
+        df_display['links_resumo'] = df_display['links_chamados'].apply(
+            lambda x: (str(x)[:50] + "...") if x and len(str(x)) > 50 else str(x) if x else ""
         )
-        fig_linha.update_layout(height=300)
-        st.plotly_chart(fig_linha, width='stretch')
-        
-        # Tabela dos últimos 7 dias
-        df_display = ultimos_7_dias.copy()
-        df_display['data'] = df_display['data'].dt.strftime('%d/%m/%Y')
-        
-        # Truncar links para exibição na tabela
-        if 'links_chamados' in df_display.columns:
-            df_display['links_resumo'] = df_display['links_chamados'].apply(
-                lambda x: (str(x)[:50] + "...") if x and len(str(x)) > 50 else str(x) if x else ""
-            )
-        
-        df_display = df_display.rename(columns={
-            'data': 'Data',
+    
+    df_display = df_display.rename(columns={
+        'data': 'Data',
+        'tickets_iniciados': 'Iniciados',
+        'tickets_finalizados': 'Finalizados',
+        'tickets_andamento': 'Em Andamento',
+        'links_resumo': 'Links (resumo)'
+    })
+    
+    # Selecionar apenas as colunas que queremos mostrar
+    colunas_exibir = ['Data', 'Iniciados', 'Finalizados', 'Em Andamento']
+    if 'Links (resumo)' in df_display.columns:
+        colunas_exibir.append('Links (resumo)')
+    
+    st.dataframe(df_display[colunas_exibir], width='stretch', hide_index=True)
+
+@st.fragment(key='previsao_hoje')
+def exibir_previsao_hoje(hoje):
+    df = carregar_dados_atuais()
+    registrar_versao_fragmento('previsao_hoje', df.tail(1))
+    
+    if df.empty:
+        return
+    
+    # O modelo é atualizado a cada gravação; só é reconstruído se for de outra
+    # versão dos dados (ex.: planilha editada fora do app)
+    modelo, _ = data_manager.sincronizar_derivados()
+    
+    st.markdown("---")
+    st.subheader("🔮 Previsão e Alertas")
+    
+    col1, col2 = st.columns([2, 1])
+    
+    with col1:
+        previsao = pd.DataFrame(modelo.prever(dias=7))
+        if previsao.empty:
+            st.info("ℹ️ Dados insuficientes para previsão.")
+        else:
+            df_previsao = pd.DataFrame({
+                'Data': pd.to_datetime(previsao['data']).dt.strftime('%d/%m/%Y'),
+                'Iniciados': previsao['tickets_iniciados'].round().astype(int),
+                'Finalizados': previsao['tickets_finalizados'].round().astype(int),
+                'Em Andamento': previsao['tickets_andamento'].round().astype(int)
+            })
+            st.caption("Próximos 7 dias (média exponencial com sazonalidade semanal)")
+            st.dataframe(df_previsao, width='stretch', hide_index=True)
+    
+    with col2:
+        nomes = {
             'tickets_iniciados': 'Iniciados',
             'tickets_finalizados': 'Finalizados',
-            'tickets_andamento': 'Em Andamento',
-            'links_resumo': 'Links (resumo)'
-        })
-        
-        # Selecionar apenas as colunas que queremos mostrar
-        colunas_exibir = ['Data', 'Iniciados', 'Finalizados', 'Em Andamento']
-        if 'Links (resumo)' in df_display.columns:
-            colunas_exibir.append('Links (resumo)')
-        
-        st.dataframe(df_display[colunas_exibir], width='stretch', hide_index=True)
+            'tickets_andamento': 'Em Andamento'
+        }
+        alertas = modelo.alertas()
+        if not alertas:
+            st.success("✅ Nenhum dia fora do padrão recentemente.")
+        for alerta in alertas[:5]:
+            data_alerta = date.fromisoformat(alerta['data']).strftime('%d/%m/%Y')
+            st.warning(
+                f"⚠️ {data_alerta}: {nomes[alerta['contador']]} = {alerta['valor']:.0f} "
+                f"(esperado ~{alerta['esperado']:.0f})"
+            )
+
+# Colunas da tabela paginada: rótulo -> coluna
+COLUNAS_TABELA = {
+    'Data': 'data',
+    'Iniciados': 'tickets_iniciados',
+    'Finalizados': 'tickets_finalizados',
+    'Em Andamento': 'tickets_andamento'
+}
+TAMANHOS_PAGINA = [25, 50, 100, 250]
+
+def exibir_tabela_paginada(chave, filtro=None):
+    """
+    Tabela paginada e ordenada no servidor: só a página visível é lida,
+    formatada e enviada ao navegador, qualquer que seja o tamanho do histórico.
+    """
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        rotulo = st.selectbox("Ordenar por:", list(COLUNAS_TABELA), key=f"{chave}_ordenar")
+    with col2:
+        tamanho = st.selectbox("Por página:", TAMANHOS_PAGINA, index=1, key=f"{chave}_tamanho")
+    with col3:
+        decrescente = st.toggle("Decrescente", key=f"{chave}_decrescente")
+    
+    pagina = st.session_state.get(f"{chave}_pagina", 1)
+    df_pagina, total = data_manager.obter_pagina(pagina, tamanho, COLUNAS_TABELA[rotulo], decrescente, filtro)
+    total_paginas = max(-(-total // tamanho), 1)
+    if pagina > total_paginas:
+        pagina = total_paginas
+        df_pagina, total = data_manager.obter_pagina(pagina, tamanho, COLUNAS_TABELA[rotulo], decrescente, filtro)
+    
+    # Formatar apenas as linhas da página
+    df_display = df_pagina.assign(data=df_pagina['data'].dt.strftime('%d/%m/%Y'))
+    df_display = df_display.rename(columns={coluna: rotulo for rotulo, coluna in COLUNAS_TABELA.items()})
+    st.dataframe(df_display, width='stretch', hide_index=True)
+    
+    st.session_state[f"{chave}_pagina"] = pagina
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        st.number_input("Página:", min_value=1, max_value=total_paginas, key=f"{chave}_pagina")
+    with col2:
+        st.caption(f"Página {pagina} de {total_paginas} · {total} registros")
+
+@st.fragment(key='observador_dados', run_every=NOTIFICACOES_CONFIG['atualizacao_sessoes_segundos'])
+def exibir_observador_dados(page):
+    """
+    Confere a versão mantida em memória pelo notificador (sem consultar o
+    armazenamento) e atualiza a sessão quando outra sessão, instância ou script
+    grava dados. No Dashboard Hoje, a página só é reexecutada se algum dos
+    blocos exibidos mudou.
+    """
+    versao = notificador.versao
+    if versao != st.session_state.get('versao_vista'):
+        st.session_state['versao_vista'] = versao
+        if page != "🏠 Dashboard Hoje" or len(fragmentos_alterados(date.today())) > 1:
+            st.rerun()
+    st.caption(f"🔔 Atualização automática · dados de {datetime.fromtimestamp(notificador.momento).strftime('%H:%M:%S')}")
+
+# Título principal
+st.title("🎫 Dashboard de Tickets de Suporte")
+st.markdown("---")
+
+# Sidebar para navegação
+st.sidebar.title("Menu de Navegação")
+page = st.sidebar.selectbox(
+    "Escolha uma opção:",
+    ["🏠 Dashboard Hoje", "📊 Dashboard Geral", "📈 Relatórios", "🔍 Filtros Avançados"]
+)
+
+# A execução completa exibe a versão atual; o observador avisa quando ela mudar
+st.session_state['versao_vista'] = notificador.versao
+with st.sidebar:
+    exibir_observador_dados(page)
+    with st.expander("🛠️ Manutenção"):
+        status_manutencao = ler_status(data_manager)
+        if status_manutencao:
+            st.dataframe(pd.DataFrame([
+                {
+                    'Tarefa': tarefa,
+                    'Estado': status.get('estado'),
+                    'Última execução': datetime.fromtimestamp(status['inicio']).strftime('%d/%m %H:%M'),
+                    'Duração (s)': status.get('duracao_segundos'),
+                    'Resultado': status.get('mensagem', '')
+                }
+                for tarefa, status in status_manutencao.items()
+            ]), hide_index=True)
+        else:
+            st.caption("Nenhuma tarefa executada ainda.")
+
+if page == "🏠 Dashboard Hoje":
+    # Data de hoje
+    hoje = date.today()
+    st.header(f"📅 Dashboard de Hoje - {hoje.strftime('%d/%m/%Y')}")
+    
+    # Cada bloco é um fragmento independente: salvar ou excluir reexecuta apenas
+    # os blocos cujos dados mudaram, sem recarregar o restante da página.
+    exibir_cartoes_hoje(hoje)
+    exibir_curva_hoje(hoje)
+    
+    st.markdown("---")
+    
+    exibir_formulario_hoje(hoje)
+    exibir_grafico_7_dias(hoje)
+    exibir_tabela_7_dias(hoje)
+    exibir_previsao_hoje(hoje)
+
 
 elif page == "📊 Dashboard Geral":
     st.header("Dashboard Interativo")
     
-    # Carregar dados
-    df = data_manager.carregar_dados()
+    # Carregar dados (versão lida antes, para nunca marcar dados antigos como novos)
+    versao = data_manager.versao_atual()
+    df = carregar_dados_atuais()
     
     if df.empty:
         st.warning("⚠️ Nenhum dado encontrado. Registre alguns dados primeiro!")
@@ -234,109 +503,129 @@ elif page == "📊 Dashboard Geral":
             total_registros = len(df)
             st.metric("Total de Registros", total_registros)
         
+        # KPIs por dia útil: fins de semana e feriados (calendario.py) ficam fora
+        # das médias, e a tendência compara os últimos 7 dias com os 7 anteriores
+        kpis = calcular_kpis(df, data_manager.arquivo_excel)
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            st.metric(
+                "Iniciados por Dia Útil",
+                f"{kpis['media_iniciados_dia_util']:.1f}",
+                delta=f"{kpis['tendencia_iniciados']:+.1f}%" if kpis['tendencia_iniciados'] != 0 else None
+            )
+        
+        with col2:
+            st.metric(
+                "Finalizados por Dia Útil",
+                f"{kpis['media_finalizados_dia_util']:.1f}",
+                delta=f"{kpis['tendencia_finalizados']:+.1f}%" if kpis['tendencia_finalizados'] != 0 else None
+            )
+        
+        with col3:
+            st.metric("Dias Úteis sem Registro", kpis['dias_uteis_sem_registro'])
+        
         st.markdown("---")
         
         # Gráficos
         col1, col2 = st.columns(2)
         
+        # Gráficos padrão da versão atual, compartilhados pelas sessões do processo
+        figuras = figuras_geral(data_manager, df, versao)
+        
         with col1:
-            # Gráfico de linha temporal
-            fig_linha = px.line(
-                df, 
-                x='data', 
-                y=['tickets_iniciados', 'tickets_finalizados', 'tickets_andamento'],
-                title="Evolução dos Tickets ao Longo do Tempo",
-                labels={'value': 'Número de Tickets', 'variable': 'Tipo de Ticket'}
-            )
-            fig_linha.update_layout(height=400)
-            st.plotly_chart(fig_linha, use_container_width=True)
+            st.plotly_chart(figuras['linha'], width='stretch')
         
         with col2:
-            # Gráfico de barras dos últimos 7 dias
-            ultimos_7_dias = df.tail(7)
-            fig_bar = px.bar(
-                ultimos_7_dias,
-                x='data',
-                y=['tickets_iniciados', 'tickets_finalizados'],
-                title="Tickets Iniciados vs Finalizados (Últimos 7 dias)",
-                barmode='group'
-            )
-            fig_bar.update_layout(height=400)
-            st.plotly_chart(fig_bar, use_container_width=True)
+            st.plotly_chart(figuras['barras'], width='stretch')
         
-        # Gráfico de pizza para distribuição total
         col1, col2 = st.columns(2)
         
         with col1:
-            # Pizza dos totais
-            totais = [
-                df['tickets_iniciados'].sum(),
-                df['tickets_finalizados'].sum(),
-                df['tickets_andamento'].sum()
-            ]
-            labels = ['Iniciados', 'Finalizados', 'Em Andamento']
-            
-            fig_pizza = px.pie(
-                values=totais,
-                names=labels,
-                title="Distribuição Total de Tickets"
-            )
-            st.plotly_chart(fig_pizza, use_container_width=True)
+            st.plotly_chart(figuras['pizza'], width='stretch')
         
         with col2:
-            # Gráfico de área
-            fig_area = px.area(
-                df,
-                x='data',
-                y='tickets_andamento',
-                title="Tickets em Andamento ao Longo do Tempo",
-                color_discrete_sequence=['#ff7f0e']
-            )
-            st.plotly_chart(fig_area, use_container_width=True)
+            st.plotly_chart(figuras['area'], width='stretch')
 
 elif page == "📈 Relatórios":
     st.header("Relatórios Detalhados")
     
-    df = data_manager.carregar_dados()
+    df = carregar_dados_atuais()
     
     if df.empty:
         st.warning("⚠️ Nenhum dado encontrado.")
     else:
+        # Relatório pré-gerado pelo agendador (agendador_relatorios.py) para a
+        # versão atual dos dados; sem ele, calcular aqui mesmo
+        from agendador_relatorios import relatorio_pronto
+        relatorio = relatorio_pronto(data_manager, 'geral', data_manager.versao_dados())
+        if relatorio is not None:
+            stats = pd.DataFrame(relatorio['estatisticas'])
+            info = relatorio['informacoes']
+        else:
+            stats = df[['tickets_iniciados', 'tickets_finalizados', 'tickets_andamento']].describe()
+            info = {
+                'periodo': f"{df['data'].min().strftime('%d/%m/%Y')} a {df['data'].max().strftime('%d/%m/%Y')}",
+                'total_dias': len(df),
+                'media_tickets_iniciados': df['tickets_iniciados'].mean(),
+                'media_tickets_finalizados': df['tickets_finalizados'].mean(),
+                'media_tickets_andamento': df['tickets_andamento'].mean()
+            }
+        
         # Estatísticas resumidas
         col1, col2 = st.columns(2)
         
         with col1:
             st.subheader("📊 Estatísticas Resumidas")
-            stats = df[['tickets_iniciados', 'tickets_finalizados', 'tickets_andamento']].describe()
             st.dataframe(stats, use_container_width=True)
         
         with col2:
             st.subheader("📅 Informações do Período")
-            st.write(f"**Período:** {df['data'].min().strftime('%d/%m/%Y')} a {df['data'].max().strftime('%d/%m/%Y')}")
-            st.write(f"**Total de dias registrados:** {len(df)}")
-            st.write(f"**Média diária de tickets iniciados:** {df['tickets_iniciados'].mean():.1f}")
-            st.write(f"**Média diária de tickets finalizados:** {df['tickets_finalizados'].mean():.1f}")
-            st.write(f"**Média diária de tickets em andamento:** {df['tickets_andamento'].mean():.1f}")
+            st.write(f"**Período:** {info['periodo']}")
+            st.write(f"**Total de dias registrados:** {info['total_dias']}")
+            st.write(f"**Média diária de tickets iniciados:** {info['media_tickets_iniciados']:.1f}")
+            st.write(f"**Média diária de tickets finalizados:** {info['media_tickets_finalizados']:.1f}")
+            st.write(f"**Média diária de tickets em andamento:** {info['media_tickets_andamento']:.1f}")
+            if relatorio is not None:
+                st.caption(f"Relatório pré-gerado em {datetime.fromisoformat(relatorio['gerado_em']).strftime('%d/%m/%Y %H:%M')}")
+        
+        # Resumos semanal e mensal gerados pelo agendador
+        resumos = {
+            nome: relatorio_pronto(data_manager, tipo)
+            for nome, tipo in (("Última semana", 'semana'), ("Último mês", 'mes'))
+        }
+        if any(resumos.values()):
+            st.subheader("📬 Relatórios Agendados")
+            for (nome, resumo), coluna in zip(resumos.items(), st.columns(len(resumos))):
+                with coluna:
+                    if resumo is None:
+                        st.caption(f"{nome}: ainda não gerado.")
+                        continue
+                    st.markdown(f"**{nome}** ({resumo['informacoes']['periodo']})")
+                    st.write(f"Iniciados: {resumo['resumo']['total_iniciados']} · "
+                             f"Finalizados: {resumo['resumo']['total_finalizados']}")
+                    with open(resumo['arquivos']['html'], 'rb') as arquivo:
+                        st.download_button(
+                            label="📄 Baixar HTML",
+                            data=arquivo.read(),
+                            file_name=f"relatorio_{resumo['tipo']}_{resumo['data_fim']}.html",
+                            mime="text/html",
+                            key=f"relatorio_{resumo['tipo']}"
+                        )
         
         st.markdown("---")
         
         # Tabela de dados
         st.subheader("📋 Dados Completos")
         
-        # Adicionar formatação à tabela
-        df_display = df.copy()
-        df_display['data'] = df_display['data'].dt.strftime('%d/%m/%Y')
-        df_display = df_display.rename(columns={
-            'data': 'Data',
-            'tickets_iniciados': 'Iniciados',
-            'tickets_finalizados': 'Finalizados',
-            'tickets_andamento': 'Em Andamento'
-        })
+        exibir_tabela_paginada('tabela_relatorios')
         
-        st.dataframe(df_display, use_container_width=True, hide_index=True)
-        
-        # Botão para download
-        csv = df.to_csv(index=False)
+        # Botão para download (CSV já gerado pelo agendador, se disponível)
+        if relatorio is not None:
+            with open(relatorio['arquivos']['csv'], 'rb') as arquivo:
+                csv = arquivo.read()
+        else:
+            csv = df.to_csv(index=False)
         st.download_button(
             label="📥 Baixar dados em CSV",
             data=csv,
@@ -344,10 +633,103 @@ elif page == "📈 Relatórios":
             mime="text/csv"
         )
 
+        # Correção de vários dias de uma vez: só as linhas alteradas são
+        # gravadas, em uma única gravação (DataManager.aplicar_lote)
+        with st.expander("✏️ Editar vários dias", expanded='mensagem_grade' in st.session_state):
+            if 'mensagem_grade' in st.session_state:
+                tipo, mensagem = st.session_state.pop('mensagem_grade')
+                getattr(st, tipo)(mensagem)
+
+            col1, col2 = st.columns(2)
+            with col1:
+                grade_inicio = st.date_input(
+                    "De:", value=max(df['data'].max() - pd.Timedelta(days=29), df['data'].min()).date(),
+                    key="grade_inicio"
+                )
+            with col2:
+                grade_fim = st.date_input("Até:", value=df['data'].max().date(), key="grade_fim")
+
+            original = df[
+                (df['data'].dt.date >= grade_inicio) & (df['data'].dt.date <= grade_fim)
+            ][['data', 'tickets_iniciados', 'tickets_finalizados', 'tickets_andamento', 'links_chamados']].reset_index(drop=True)
+
+            # A grade recomeça a cada nova versão dos dados (inclusive após
+            # salvar), para que edições nunca sejam aplicadas sobre outra base
+            editado = st.data_editor(
+                original,
+                key=f"grade_{grade_inicio}_{grade_fim}_{data_manager.versao_atual()}",
+                num_rows="dynamic",
+                hide_index=True,
+                width='stretch',
+                column_config={
+                    'data': st.column_config.DateColumn("Data", format="DD/MM/YYYY", required=True),
+                    'tickets_iniciados': st.column_config.NumberColumn("Iniciados", min_value=0, step=1, required=True),
+                    'tickets_finalizados': st.column_config.NumberColumn("Finalizados", min_value=0, step=1, required=True),
+                    'tickets_andamento': st.column_config.NumberColumn("Em Andamento", min_value=0, step=1, required=True),
+                    'links_chamados': st.column_config.TextColumn("Links dos Chamados")
+                }
+            )
+
+            gravar, excluir = diferencas_lote(original, editado)
+            st.caption(f"{len(gravar)} dia(s) a gravar, {len(excluir)} a excluir.")
+
+            if st.button("💾 Salvar alterações", disabled=gravar.empty and not excluir, key="grade_salvar"):
+                historico = df[~df['data'].isin(excluir)]
+                relatorio = validar_lote(gravar, historico=historico)
+                # Substituir um dia que já estava na grade é o esperado; já uma
+                # data levada a um dia de fora da grade que tem registro é avisada
+                relatorio = relatorio[
+                    (relatorio['regra'] != 'data_existente') | ~relatorio['data'].isin(original['data'])
+                ]
+                # Datas repetidas na grade são erro, mesmo que uma das linhas não tenha mudado
+                repetidas = validar_lote(editado)
+                relatorio = pd.concat(
+                    [relatorio, repetidas[repetidas['regra'] == 'data_duplicada']], ignore_index=True
+                ).drop_duplicates(['linha', 'regra']).sort_values('linha', kind='stable')
+                erros = relatorio[relatorio['nivel'] == 'erro']
+                if not erros.empty:
+                    st.error("❌ Corrija os erros abaixo antes de salvar.")
+                    st.dataframe(erros[['data', 'coluna', 'mensagem']], hide_index=True, width='stretch')
+                elif data_manager.aplicar_lote(gravar, excluir):
+                    avisos = relatorio['mensagem'].nunique()
+                    st.session_state['mensagem_grade'] = (
+                        'success',
+                        f"✅ {len(gravar)} dia(s) gravado(s) e {len(excluir)} excluído(s) em uma única gravação."
+                        + (f" {avisos} tipo(s) de aviso: {'; '.join(relatorio['mensagem'].unique())}" if avisos else "")
+                    )
+                    st.rerun()
+
+        # Histórico de alterações e consulta "como estava em"
+        with st.expander("🕰️ Histórico de alterações"):
+            alteracoes = data_manager.historico.alteracoes(limite=20)
+            if not alteracoes:
+                st.caption("Nenhuma alteração registrada ainda.")
+            else:
+                st.dataframe(pd.DataFrame([{
+                    'Momento': datetime.fromisoformat(a['momento']).strftime('%d/%m/%Y %H:%M:%S'),
+                    'Autor': a['autor'],
+                    'Data': a['data'],
+                    'Operação': a['operacao'],
+                    'Antes': a['anteriores'],
+                    'Depois': a['valores']
+                } for a in alteracoes]).astype({'Antes': str, 'Depois': str}), width='stretch')
+
+                col1, col2 = st.columns(2)
+                with col1:
+                    dia_consulta = st.date_input("Dados como estavam em", value=date.today(), key="historico_dia")
+                with col2:
+                    hora_consulta = st.time_input("Horário", value=datetime.now().time(), key="historico_hora")
+                # A reconstrução percorre checkpoint e log: só sob pedido
+                if st.button("🔍 Consultar", key="historico_consultar"):
+                    st.dataframe(
+                        data_manager.dados_em(datetime.combine(dia_consulta, hora_consulta)),
+                        width='stretch'
+                    )
+
 elif page == "🔍 Filtros Avançados":
     st.header("Filtros Avançados")
     
-    df = data_manager.carregar_dados()
+    df = carregar_dados_atuais()
     
     if df.empty:
         st.warning("⚠️ Nenhum dado encontrado.")
@@ -372,47 +754,96 @@ elif page == "🔍 Filtros Avançados":
             )
         
         with col3:
-            tipo_filtro = st.selectbox(
-                "Filtrar por:",
-                ["Todos", "Apenas dias com tickets iniciados", "Apenas dias com tickets finalizados", "Apenas dias com tickets em andamento"]
+            tipo_filtro = st.selectbox("Filtrar por:", list(FILTROS_POR_TIPO))
+        
+        # Condições adicionais, combinadas por E ou OU com o filtro por tipo
+        with st.expander("⚙️ Condições adicionais"):
+            combinacao = st.radio(
+                "Combinar condições por:",
+                ["E (todas as condições)", "OU (qualquer condição)"],
+                horizontal=True
             )
-        
-        # Aplicar filtros
-        df_filtrado = df[(df['data'].dt.date >= data_inicio) & (df['data'].dt.date <= data_fim)]
-        
-        if tipo_filtro == "Apenas dias com tickets iniciados":
-            df_filtrado = df_filtrado[df_filtrado['tickets_iniciados'] > 0]
-        elif tipo_filtro == "Apenas dias com tickets finalizados":
-            df_filtrado = df_filtrado[df_filtrado['tickets_finalizados'] > 0]
-        elif tipo_filtro == "Apenas dias com tickets em andamento":
-            df_filtrado = df_filtrado[df_filtrado['tickets_andamento'] > 0]
+            
+            col_a, col_b, col_c = st.columns(3)
+            with col_a:
+                minimo_iniciados = st.number_input("Iniciados ≥", min_value=0, value=0)
+            with col_b:
+                minimo_finalizados = st.number_input("Finalizados ≥", min_value=0, value=0)
+            with col_c:
+                minimo_andamento = st.number_input("Em Andamento ≥", min_value=0, value=0)
+            
+            col_a, col_b, col_c = st.columns(3)
+            with col_a:
+                dias_semana = st.multiselect(
+                    "Dias da semana:",
+                    options=list(range(7)),
+                    format_func=lambda dia: DIAS_SEMANA[dia]
+                )
+            with col_b:
+                presenca_links = st.selectbox("Links dos chamados:", ["Indiferente", "Com links", "Sem links"])
+            with col_c:
+                texto_links = st.text_input("Texto nos links:")
+            
+            equipes = []
+            if 'equipe' in df.columns:
+                equipes = st.multiselect("Equipes:", sorted(df['equipe'].dropna().unique()))
+        
+        # Montar a expressão de filtro e aplicá-la como uma única máscara vetorizada
+        condicoes = []
+        if FILTROS_POR_TIPO[tipo_filtro] is not None:
+            condicoes.append(FILTROS_POR_TIPO[tipo_filtro])
+        for coluna, minimo in (
+            ('tickets_iniciados', minimo_iniciados),
+            ('tickets_finalizados', minimo_finalizados),
+            ('tickets_andamento', minimo_andamento)
+        ):
+            if minimo > 0:
+                condicoes.append(Condicao(coluna, '>=', minimo))
+        if dias_semana:
+            condicoes.append(DiaSemana(dias_semana))
+        if presenca_links != "Indiferente":
+            condicoes.append(PossuiLinks(presenca_links == "Com links"))
+        if texto_links.strip():
+            condicoes.append(TextoLinks(texto_links.strip()))
+        if equipes:
+            condicoes.append(Equipe(equipes))
+        
+        filtro = Periodo(data_inicio, data_fim)
+        if condicoes:
+            filtro = filtro & (E(*condicoes) if combinacao.startswith("E") else Ou(*condicoes))
+        
+        # As restrições simples do filtro (período, mínimos) são aplicadas já na leitura
+        df_filtrado = data_manager.consultar(filtro)
         
         if df_filtrado.empty:
             st.warning("⚠️ Nenhum dado encontrado para os filtros aplicados.")
         else:
+            import plotly.express as px
+            
             st.success(f"✅ Encontrados {len(df_filtrado)} registros para o período selecionado.")
             
+            # Só com o período, a pirâmide mantida já cobre os dados; com outras
+            # condições, uma pirâmide é montada em memória para os dias filtrados
+            if not condicoes:
+                _, piramide = data_manager.sincronizar_derivados()
+            else:
+                piramide = PiramideTemporal.de_dataframe(df_filtrado)
+            nivel, serie = piramide.consultar(data_inicio, data_fim)
+            
             # Gráfico dos dados filtrados
             fig = px.line(
-                df_filtrado,
+                serie,
                 x='data',
                 y=['tickets_iniciados', 'tickets_finalizados', 'tickets_andamento'],
-                title=f"Dados Filtrados - {data_inicio.strftime('%d/%m/%Y')} a {data_fim.strftime('%d/%m/%Y')}"
+                title=f"Dados Filtrados - {data_inicio.strftime('%d/%m/%Y')} a {data_fim.strftime('%d/%m/%Y')}{DESCRICAO_NIVEIS[nivel]}"
             )
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(compactar_figura(fig), width='stretch')
             
             # Tabela dos dados filtrados
-            df_display = df_filtrado.copy()
-            df_display['data'] = df_display['data'].dt.strftime('%d/%m/%Y')
-            df_display = df_display.rename(columns={
-                'data': 'Data',
-                'tickets_iniciados': 'Iniciados',
-                'tickets_finalizados': 'Finalizados',
-                'tickets_andamento': 'Em Andamento'
-            })
-            
-            st.dataframe(df_display, use_container_width=True, hide_index=True)
+            exibir_tabela_paginada('tabela_filtros', filtro)
 
 # Footer
 st.markdown("---")
 st.markdown("Desenvolvido para gerenciamento de tickets de suporte | 2025")
+
+EXECUCAO_SEGUNDOS.observar(time.perf_counter() - inicio_execucao, pagina=page)
@@ -0,0 +1,296 @@
+"""
+Aquecimento dos caches na inicialização do processo.
+
+Depois de um reinício, o primeiro visitante pagaria pela leitura da planilha,
+pela montagem do DataFrame, pela pirâmide, pela previsão, pelo calendário e
+pelos gráficos padrão (mais a importação do plotly). Uma thread de fundo,
+iniciada junto com o processo, faz esse trabalho uma vez:
+
+    dados       carregar_dados (publica o snapshot Arrow da versão atual)
+    derivados   previsão, pirâmide e tabela de calendário (calcular_kpis)
+    figuras     gráficos padrão do Dashboard Hoje e do Dashboard Geral
+
+Os gráficos padrão ficam em um cache do processo (CacheFiguras), por versão
+dos dados, compartilhado por todas as sessões; uma sessão que pede um gráfico
+em construção espera por ele em vez de construí-lo de novo. A prontidão fica
+em Aquecimento.pronto, exposta em /pronto e em hub_tickets_pronto (ver
+metricas.py). Sessões que chegam antes do fim esperam até
+AQUECIMENTO_CONFIG['espera_segundos'] e depois seguem sem o aquecimento.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from metricas import CACHE_CONSULTAS, Medidor, registrar_prontidao
+
+AQUECIMENTO_CONFIG = {
+    'espera_segundos': 5,      # Espera máxima de uma sessão pelo aquecimento
+    'figuras_mantidas': 16     # Gráficos mantidos no cache do processo
+}
+
+_aquecimentos = {}
+_lock_aquecimentos = threading.Lock()
+
+
+class CacheFiguras:
+    """
+    Gráficos prontos por (nome, chave de versão), com no máximo uma
+    construção em andamento por entrada.
+    """
+
+    def __init__(self, maximo=None):
+        """
+        Args:
+            maximo (int): Gráficos mantidos (padrão: AQUECIMENTO_CONFIG)
+        """
+        self.maximo = maximo or AQUECIMENTO_CONFIG['figuras_mantidas']
+        self._figuras = OrderedDict()
+        self._construindo = {}
+        self._lock = threading.Lock()
+
+    def obter(self, nome, chave, construir):
+        """
+        Retorna o gráfico da entrada, construindo-o se necessário.
+
+        Args:
+            nome (str): Nome do gráfico
+            chave (str): Versão dos dados de que o gráfico depende
+            construir (callable): Constrói o gráfico (sem argumentos)
+
+        Returns:
+            Gráfico construído (não altere: é compartilhado entre as sessões)
+        """
+        entrada = (nome, chave)
+        with self._lock:
+            lock_entrada = self._construindo.setdefault(entrada, threading.Lock())
+        with lock_entrada:
+            with self._lock:
+                if entrada in self._figuras:
+                    self._figuras.move_to_end(entrada)
+                    CACHE_CONSULTAS.incrementar(cache='figuras', resultado='acerto')
+                    return self._figuras[entrada]
+            CACHE_CONSULTAS.incrementar(cache='figuras', resultado='falha')
+            figura = construir()
+            with self._lock:
+                self._figuras[entrada] = figura
+                while len(self._figuras) > self.maximo:
+                    antiga, _ = self._figuras.popitem(last=False)
+                    self._construindo.pop(antiga, None)
+        return figura
+
+
+FIGURAS = CacheFiguras()
+
+
+def _duracoes_etapas():
+    with _lock_aquecimentos:
+        aquecimentos = dict(_aquecimentos)
+    return [
+        ({'arquivo': os.path.basename(arquivo), 'etapa': etapa}, segundos)
+        for arquivo, aquecimento in aquecimentos.items() for etapa, segundos in aquecimento.etapas.items()
+    ]
+
+
+AQUECIMENTO_SEGUNDOS = Medidor('aquecimento_segundos', "Duração de cada etapa do aquecimento em segundos.", _duracoes_etapas)
+
+
+def construir_grafico_7_dias(ultimos_7_dias):
+    """
+    Gráfico dos últimos 7 dias do Dashboard Hoje.
+    """
+    import plotly.express as px
+
+    from utils import compactar_figura
+
+    fig_linha = px.line(
+        ultimos_7_dias,
+        x='data',
+        y=['tickets_iniciados', 'tickets_finalizados', 'tickets_andamento'],
+        title="Evolução dos Últimos 7 Dias",
+        labels={'value': 'Número de Tickets', 'variable': 'Tipo de Ticket'}
+    )
+    fig_linha.update_layout(height=300)
+    return compactar_figura(fig_linha)
+
+
+def construir_figuras_geral(df, piramide):
+    """
+    Gráficos padrão do Dashboard Geral (histórico completo).
+
+    Args:
+        df (pd.DataFrame): Dados carregados (não vazios)
+        piramide (PiramideTemporal): Pirâmide sincronizada com os dados
+
+    Returns:
+        dict: 'linha', 'barras', 'pizza' e 'area', já compactados
+    """
+    import plotly.express as px
+
+    from utils import DESCRICAO_NIVEIS, compactar_figura
+
+    # Série temporal na resolução adequada ao período (dia/semana/mês/trimestre)
+    nivel, serie = piramide.consultar()
+
+    fig_linha = px.line(
+        serie,
+        x='data',
+        y=['tickets_iniciados', 'tickets_finalizados', 'tickets_andamento'],
+        title=f"Evolução dos Tickets ao Longo do Tempo{DESCRICAO_NIVEIS[nivel]}",
+        labels={'value': 'Número de Tickets', 'variable': 'Tipo de Ticket'}
+    )
+    fig_linha.update_layout(height=400)
+
+    fig_bar = px.bar(
+        df.tail(7),
+        x='data',
+        y=['tickets_iniciados', 'tickets_finalizados'],
+        title="Tickets Iniciados vs Finalizados (Últimos 7 dias)",
+        barmode='group'
+    )
+    fig_bar.update_layout(height=400)
+
+    fig_pizza = px.pie(
+        values=[
+            df['tickets_iniciados'].sum(),
+            df['tickets_finalizados'].sum(),
+            df['tickets_andamento'].sum()
+        ],
+        names=['Iniciados', 'Finalizados', 'Em Andamento'],
+        title="Distribuição Total de Tickets"
+    )
+
+    fig_area = px.area(
+        serie,
+        x='data',
+        y='tickets_andamento',
+        title=f"Tickets em Andamento ao Longo do Tempo{DESCRICAO_NIVEIS[nivel]}",
+        color_discrete_sequence=['#ff7f0e']
+    )
+
+    return {
+        'linha': compactar_figura(fig_linha),
+        'barras': compactar_figura(fig_bar),
+        'pizza': compactar_figura(fig_pizza),
+        'area': compactar_figura(fig_area)
+    }
+
+
+def figuras_geral(data_manager, df, versao):
+    """
+    Gráficos padrão do Dashboard Geral da versão, do cache do processo.
+
+    Args:
+        data_manager (DataManager): Gerenciador dos dados
+        df (pd.DataFrame): Dados da versão (não vazios)
+        versao (str): Versão dos dados
+
+    Returns:
+        dict: Ver construir_figuras_geral
+    """
+    def construir():
+        _, piramide = data_manager.sincronizar_derivados()
+        return construir_figuras_geral(df, piramide)
+    return FIGURAS.obter('dashboard_geral', versao, construir)
+
+
+def grafico_7_dias(ultimos_7_dias):
+    """
+    Gráfico dos últimos 7 dias do Dashboard Hoje, do cache do processo.
+
+    Args:
+        ultimos_7_dias (pd.DataFrame): Últimos 7 registros
+    """
+    from utils import chave_versao
+    return FIGURAS.obter(
+        'grafico_7_dias', chave_versao(ultimos_7_dias), lambda: construir_grafico_7_dias(ultimos_7_dias)
+    )
+
+
+class Aquecimento:
+    """
+    Etapas de aquecimento de um arquivo de dados, executadas uma vez em uma
+    thread de fundo, com a duração de cada uma.
+    """
+
+    def __init__(self, data_manager):
+        """
+        Args:
+            data_manager (DataManager): Dados a aquecer
+        """
+        self.data_manager = data_manager
+        self.pronto = threading.Event()
+        self.etapas = {}
+        self.erro = None
+        self._thread = None
+
+    def iniciar(self):
+        """
+        Inicia a thread de aquecimento (uma vez).
+        """
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._executar, name='aquecimento', daemon=True)
+        self._thread.start()
+
+    def aguardar(self, segundos=None):
+        """
+        Espera o fim do aquecimento.
+
+        Args:
+            segundos (float): Espera máxima (padrão: AQUECIMENTO_CONFIG)
+
+        Returns:
+            bool: True se o aquecimento terminou
+        """
+        return self.pronto.wait(AQUECIMENTO_CONFIG['espera_segundos'] if segundos is None else segundos)
+
+    def _etapa(self, nome, funcao):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        self.etapas[nome] = time.perf_counter() - inicio
+        return resultado
+
+    def _executar(self):
+        try:
+            versao = self.data_manager.versao_atual()
+            df = self._etapa('dados', self.data_manager.carregar_dados)
+            if not df.empty:
+                def derivados():
+                    from utils import calcular_kpis
+                    self.data_manager.sincronizar_derivados()
+                    calcular_kpis(df, self.data_manager.arquivo_excel)
+
+                def figuras():
+                    figuras_geral(self.data_manager, df, versao)
+                    grafico_7_dias(df.tail(7))
+
+                self._etapa('derivados', derivados)
+                self._etapa('figuras', figuras)
+        except Exception as e:
+            self.erro = f"{type(e).__name__}: {e}"
+            print(f"Erro no aquecimento dos caches: {self.erro}")
+        finally:
+            # Mesmo com erro: as sessões seguem sem o aquecimento
+            self.pronto.set()
+
+
+def aquecimento_para(data_manager):
+    """
+    Aquecimento do arquivo de dados, criado e iniciado uma vez por processo.
+
+    Args:
+        data_manager (DataManager): Gerenciador do arquivo de dados
+
+    Returns:
+        Aquecimento: Aquecimento compartilhado por todas as sessões do processo
+    """
+    chave = os.path.abspath(data_manager.arquivo_excel)
+    with _lock_aquecimentos:
+        aquecimento = _aquecimentos.get(chave)
+        if aquecimento is None:
+            aquecimento = _aquecimentos[chave] = Aquecimento(data_manager)
+            registrar_prontidao(f"aquecimento:{os.path.basename(chave)}", aquecimento.pronto.is_set)
+            aquecimento.iniciar()
+    return aquecimento
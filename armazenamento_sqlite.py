@@ -0,0 +1,392 @@
+"""
+Armazenamento transacional em SQLite (modo WAL) compartilhado entre processos.
+
+Permite rodar várias instâncias do app (e a API) sobre o mesmo arquivo de
+dados: cada gravação altera apenas a linha do dia dentro de uma transação, em
+vez de reescrever a planilha inteira, e incrementa um contador de versão
+guardado no próprio banco. Como a versão é lida do banco, todos os processos
+percebem as gravações uns dos outros e invalidam seus caches.
+
+O DataManager usa este armazenamento quando o arquivo de dados tem uma das
+extensões de EXTENSOES_SQLITE.
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+
+import pandas as pd
+
+EXTENSOES_SQLITE = ('.db', '.sqlite', '.sqlite3')
+
+SQLITE_CONFIG = {
+    'tamanho_pool': 4,       # Conexões mantidas abertas por processo
+    'espera_segundos': 30    # Tempo máximo de espera por um bloqueio de escrita
+}
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS registros (
+    data TEXT PRIMARY KEY,
+    tickets_iniciados INTEGER NOT NULL,
+    tickets_finalizados INTEGER NOT NULL,
+    tickets_andamento INTEGER NOT NULL,
+    links_chamados TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_registros_iniciados ON registros (tickets_iniciados, data);
+CREATE INDEX IF NOT EXISTS idx_registros_finalizados ON registros (tickets_finalizados, data);
+CREATE INDEX IF NOT EXISTS idx_registros_andamento ON registros (tickets_andamento, data);
+CREATE TABLE IF NOT EXISTS meta (
+    chave TEXT PRIMARY KEY,
+    valor TEXT NOT NULL
+);
+"""
+
+OPERADORES_SQL = ('==', '!=', '>', '>=', '<', '<=')
+
+
+def _valor_sql(valor):
+    """
+    Converte um valor de restrição para o tipo guardado no banco.
+    """
+    if hasattr(valor, 'isoformat'):
+        return pd.Timestamp(valor).date().isoformat()
+    return valor
+
+
+class ArmazenamentoSQLite:
+    """
+    Tabela diária em um banco SQLite com pool de conexões por processo.
+    """
+
+    def __init__(self, caminho, tamanho_pool=None):
+        """
+        Args:
+            caminho (str): Arquivo do banco (criado se não existir)
+            tamanho_pool (int): Conexões abertas por processo (padrão: SQLITE_CONFIG)
+        """
+        self.caminho = caminho
+        self.tamanho_pool = tamanho_pool or SQLITE_CONFIG['tamanho_pool']
+        self._livres = queue.LifoQueue()
+        self._criadas = 0
+        self._lock = threading.Lock()
+
+        with self.conexao() as con:
+            # Banco recém-criado: já nasce no esquema atual, sem migrações
+            tabelas = {nome for (nome,) in con.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            self.novo = 'registros' not in tabelas
+            # Banco já preparado: só leituras aqui, sem disputar o bloqueio de
+            # escrita com gravações (ou um VACUUM) em andamento
+            if not self.novo and 'meta' in tabelas and con.execute(
+                "SELECT COUNT(*) FROM meta WHERE chave IN ('geracao', 'versao')"
+            ).fetchone()[0] == 2:
+                return
+            con.executescript(ESQUEMA)
+            # Identificador do banco: distingue versões de um banco recriado
+            con.execute(
+                "INSERT OR IGNORE INTO meta (chave, valor) VALUES ('geracao', ?)", (uuid.uuid4().hex[:8],)
+            )
+            con.execute("INSERT OR IGNORE INTO meta (chave, valor) VALUES ('versao', '0')")
+
+    def _conectar(self):
+        con = sqlite3.connect(
+            self.caminho, timeout=SQLITE_CONFIG['espera_segundos'],
+            isolation_level=None, check_same_thread=False
+        )
+        con.execute("PRAGMA journal_mode=WAL")
+        # Em WAL, NORMAL só sincroniza no checkpoint e continua sem risco de corrupção
+        con.execute("PRAGMA synchronous=NORMAL")
+        return con
+
+    @contextmanager
+    def conexao(self):
+        """
+        Empresta uma conexão do pool; ela volta ao pool ao final do bloco.
+        """
+        try:
+            con = self._livres.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                criar = self._criadas < self.tamanho_pool
+                if criar:
+                    self._criadas += 1
+            con = self._conectar() if criar else self._livres.get(timeout=SQLITE_CONFIG['espera_segundos'])
+        try:
+            yield con
+        finally:
+            self._livres.put(con)
+
+    @contextmanager
+    def transacao(self):
+        """
+        Transação de escrita. O bloqueio de escrita é obtido no início
+        (BEGIN IMMEDIATE), serializando os escritores de todos os processos, e
+        a versão dos dados é incrementada junto com as alterações.
+        """
+        with self.conexao() as con:
+            con.execute("BEGIN IMMEDIATE")
+            try:
+                yield con
+                con.execute("UPDATE meta SET valor = CAST(valor AS INTEGER) + 1 WHERE chave = 'versao'")
+                con.execute("COMMIT")
+            except BaseException:
+                con.execute("ROLLBACK")
+                raise
+
+    def versao(self, con=None, proxima=False):
+        """
+        Args:
+            con (sqlite3.Connection): Conexão já em uso (ex.: dentro de transacao())
+            proxima (bool): Versão que a transação em andamento em con terá
+                após o COMMIT
+
+        Returns:
+            str: Versão atual dos dados (muda a cada transação de escrita)
+        """
+        if con is None:
+            with self.conexao() as con:
+                return self.versao(con, proxima)
+        meta = dict(con.execute("SELECT chave, valor FROM meta WHERE chave IN ('geracao', 'versao')"))
+        return f"{meta['geracao']}-{int(meta['versao']) + proxima:x}"
+
+    def colunas(self):
+        """
+        Returns:
+            list: Colunas da tabela de registros
+        """
+        with self.conexao() as con:
+            return [linha[1] for linha in con.execute("PRAGMA table_info(registros)")]
+
+    def ler(self, restricoes=None):
+        """
+        Lê os registros e a versão correspondente em uma única transação de leitura.
+
+        Args:
+            restricoes (list): Tuplas (coluna, operador, valor) aplicadas no WHERE (opcional)
+
+        Returns:
+            tuple: (versão, DataFrame com os registros ordenados por data)
+        """
+        colunas = self.colunas()
+        condicoes, parametros = [], []
+        for coluna, operador, valor in restricoes or []:
+            if coluna in colunas and operador in OPERADORES_SQL:
+                condicoes.append(f"{coluna} {'=' if operador == '==' else operador} ?")
+                parametros.append(_valor_sql(valor))
+
+        consulta = "SELECT * FROM registros"
+        if condicoes:
+            consulta += " WHERE " + " AND ".join(condicoes)
+        consulta += " ORDER BY data"
+
+        with self.conexao() as con:
+            # Em WAL, a transação de leitura vê um único estado consistente do banco
+            con.execute("BEGIN")
+            try:
+                versao = self.versao(con)
+                df = pd.read_sql_query(consulta, con, params=parametros)
+            finally:
+                con.execute("COMMIT")
+        return versao, df
+
+    def versao_esquema(self, con=None):
+        """
+        Versão do esquema guardada no cabeçalho do banco (PRAGMA user_version).
+
+        Args:
+            con (sqlite3.Connection): Conexão já em uso (opcional)
+
+        Returns:
+            int: Versão do esquema (0 em bancos sem versão)
+        """
+        if con is None:
+            with self.conexao() as con:
+                return self.versao_esquema(con)
+        return con.execute("PRAGMA user_version").fetchone()[0]
+
+    @staticmethod
+    def definir_versao_esquema(con, versao):
+        """
+        Grava a versão do esquema dentro de uma transação.
+        """
+        con.execute(f"PRAGMA user_version = {int(versao)}")
+
+    @staticmethod
+    def substituir(con, df):
+        """
+        Substitui todos os registros dentro de uma transação, acrescentando à
+        tabela as colunas novas do DataFrame. Usado pelas migrações de esquema.
+
+        Args:
+            con (sqlite3.Connection): Conexão obtida de transacao()
+            df (pd.DataFrame): Tabela completa
+        """
+        existentes = [linha[1] for linha in con.execute("PRAGMA table_info(registros)")]
+        for coluna in df.columns:
+            if coluna not in existentes:
+                tipo = 'INTEGER' if pd.api.types.is_integer_dtype(df[coluna]) else 'TEXT'
+                con.execute(f'ALTER TABLE registros ADD COLUMN "{coluna}" {tipo}')
+
+        con.execute("DELETE FROM registros")
+        if df.empty:
+            return
+        if pd.api.types.is_datetime64_any_dtype(df['data']):
+            df = df.assign(data=df['data'].dt.strftime('%Y-%m-%d'))
+        colunas = ', '.join(f'"{coluna}"' for coluna in df.columns)
+        marcadores = ', '.join('?' * len(df.columns))
+        con.executemany(
+            f"INSERT INTO registros ({colunas}) VALUES ({marcadores})",
+            df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+        )
+
+    def pagina(self, ordenar_por, decrescente, limite, deslocamento):
+        """
+        Lê uma página dos registros, ordenada pelo índice da coluna.
+
+        Args:
+            ordenar_por (str): Coluna de ordenação ('data' ou um contador)
+            decrescente (bool): Ordem decrescente
+            limite (int): Registros por página
+            deslocamento (int): Registros a pular
+
+        Returns:
+            tuple: (DataFrame da página, total de registros)
+        """
+        if ordenar_por not in self.colunas():
+            raise ValueError(f"Coluna de ordenação inválida: {ordenar_por}")
+        direcao = 'DESC' if decrescente else 'ASC'
+        ordem = f"{ordenar_por} {direcao}" + (f", data {direcao}" if ordenar_por != 'data' else '')
+        with self.conexao() as con:
+            con.execute("BEGIN")
+            try:
+                total = con.execute("SELECT COUNT(*) FROM registros").fetchone()[0]
+                df = pd.read_sql_query(
+                    f"SELECT * FROM registros ORDER BY {ordem} LIMIT ? OFFSET ?", con, params=(limite, deslocamento)
+                )
+            finally:
+                con.execute("COMMIT")
+        return df, total
+
+    @staticmethod
+    def ler_dia(con, data_registro):
+        """
+        Lê o registro de um dia dentro de uma transação.
+
+        Returns:
+            dict: Campos do registro, ou None se não houver registro no dia
+        """
+        cursor = con.execute("SELECT * FROM registros WHERE data = ?", (data_registro.isoformat(),))
+        linha = cursor.fetchone()
+        if linha is None:
+            return None
+        return dict(zip((coluna[0] for coluna in cursor.description), linha))
+
+    @staticmethod
+    def gravar_dia(con, data_registro, valores, links_chamados=""):
+        """
+        Grava ou substitui o registro de um dia dentro de uma transação.
+
+        Args:
+            con (sqlite3.Connection): Conexão obtida de transacao()
+            data_registro (date): Data do registro
+            valores (dict): Valor de cada contador
+            links_chamados (str): Links dos chamados
+        """
+        con.execute(
+            "INSERT INTO registros (data, tickets_iniciados, tickets_finalizados, tickets_andamento, links_chamados) "
+            "VALUES (?, ?, ?, ?, ?) ON CONFLICT(data) DO UPDATE SET "
+            "tickets_iniciados = excluded.tickets_iniciados, tickets_finalizados = excluded.tickets_finalizados, "
+            "tickets_andamento = excluded.tickets_andamento, links_chamados = excluded.links_chamados",
+            (
+                data_registro.isoformat(), int(valores['tickets_iniciados']),
+                int(valores['tickets_finalizados']), int(valores['tickets_andamento']), links_chamados or ""
+            )
+        )
+
+    @staticmethod
+    def excluir_dia(con, data_registro):
+        """
+        Exclui o registro de um dia dentro de uma transação.
+
+        Returns:
+            bool: True se havia registro para o dia
+        """
+        return con.execute("DELETE FROM registros WHERE data = ?", (data_registro.isoformat(),)).rowcount > 0
+
+    def compactar(self, limite_paginas_livres=0.2, espera_segundos=None):
+        """
+        Compacta o banco sem alterar a versão dos dados: checkpoint do WAL
+        (truncando o arquivo -wal), PRAGMA optimize e, se a fração de páginas
+        livres passar do limite, VACUUM.
+
+        Em WAL, leitores nunca esperam pelo VACUUM. Para não atrasar
+        gravações, a compactação espera pouco pelos bloqueios: com o banco em
+        uso, o checkpoint fica parcial e o VACUUM é adiado para a próxima
+        execução, em vez de entrar na fila das sessões.
+
+        Args:
+            limite_paginas_livres (float): Fração de páginas livres que dispara o VACUUM
+            espera_segundos (float): Espera máxima por um bloqueio (padrão: SQLITE_CONFIG)
+
+        Returns:
+            dict: Páginas antes da compactação, páginas livres, se houve VACUUM
+            (ou se ele foi adiado) e o tamanho do arquivo antes e depois (bytes)
+        """
+        espera = SQLITE_CONFIG['espera_segundos'] if espera_segundos is None else espera_segundos
+        antes = os.path.getsize(self.caminho)
+        adiado = False
+        with self.conexao() as con:
+            con.execute(f"PRAGMA busy_timeout = {int(espera * 1000)}")
+            try:
+                con.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                con.execute("PRAGMA optimize")
+                paginas = con.execute("PRAGMA page_count").fetchone()[0]
+                livres = con.execute("PRAGMA freelist_count").fetchone()[0]
+                vacuum = paginas > 0 and livres / paginas > limite_paginas_livres
+                if vacuum:
+                    try:
+                        con.execute("VACUUM")
+                        con.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                    except sqlite3.OperationalError as e:
+                        if 'locked' not in str(e) and 'busy' not in str(e):
+                            raise
+                        vacuum, adiado = False, True
+            finally:
+                con.execute(f"PRAGMA busy_timeout = {int(SQLITE_CONFIG['espera_segundos'] * 1000)}")
+        return {
+            'paginas': paginas, 'paginas_livres': livres, 'vacuum': vacuum, 'vacuum_adiado': adiado,
+            'tamanho_antes': antes, 'tamanho_depois': os.path.getsize(self.caminho)
+        }
+
+    def verificar_indices(self):
+        """
+        Recria os índices do ESQUEMA que estiverem ausentes e confere a
+        integridade do banco (PRAGMA integrity_check, que compara cada índice
+        com a tabela); se houver problemas, reconstrói os índices (REINDEX).
+
+        Returns:
+            dict: Índices recriados, problemas encontrados e se houve REINDEX
+        """
+        consulta = "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'registros'"
+        with self.conexao() as con:
+            existentes = {linha[0] for linha in con.execute(consulta)}
+            con.executescript(ESQUEMA)
+            recriados = sorted({linha[0] for linha in con.execute(consulta)} - existentes)
+            problemas = [linha[0] for linha in con.execute("PRAGMA integrity_check")]
+            problemas = [] if problemas == ['ok'] else problemas
+            if problemas:
+                con.execute("REINDEX registros")
+        return {'recriados': recriados, 'problemas': problemas, 'reindexado': bool(problemas)}
+
+    def fechar(self):
+        """
+        Fecha as conexões livres do pool.
+        """
+        while True:
+            try:
+                self._livres.get_nowait().close()
+            except queue.Empty:
+                break
+        self._criadas = 0
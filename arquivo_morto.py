@@ -0,0 +1,252 @@
+"""
+Arquivo morto: dias antigos em arquivos colunares compactados e imutáveis.
+
+A política de retenção (DataManager.aplicar_retencao) mantém no armazenamento
+principal (planilha ou SQLite) apenas os dias recentes, que são os editados e
+os exibidos no Dashboard Hoje. Os meses completos anteriores a essa janela são
+movidos para <dados>_arquivo_morto/, um arquivo Parquet compactado por mês,
+gravado uma única vez e nunca reescrito, junto com os agregados mensais já
+calculados. As leituras do DataManager juntam as duas camadas sem que quem
+consulta precise saber onde cada dia está.
+
+Arquivos em <dados>_arquivo_morto/:
+    AAAA-MM.parquet     Registros diários do mês
+    mensal.parquet      Agregados mensais (colunas de utils.agregar_por_periodo)
+    manifesto.json      Meses arquivados, limite (primeiro dia fora do arquivo) e versão
+
+O manifesto é gravado por último: se a remoção dos dias do armazenamento
+principal for interrompida, as cópias que restarem antes do limite são
+ignoradas nas leituras e removidas na próxima aplicação da política.
+
+Uso pela linha de comando:
+    python arquivo_morto.py --arquivo dados_tickets.xlsx --dias 90
+"""
+
+import argparse
+import json
+import os
+import threading
+from datetime import timedelta
+
+import pandas as pd
+
+from data_manager import COLUNAS
+from gravacao_atomica import gravacao_atomica, gravar_atomico
+
+RETENCAO_CONFIG = {
+    'dias_quentes': 90,      # Dias mantidos no armazenamento principal
+    'compressao': 'zstd'     # Codec dos arquivos Parquet
+}
+
+
+def limite_retencao(hoje, dias_quentes):
+    """
+    Primeiro dia mantido no armazenamento principal: o início do mês que
+    contém o dia mais antigo da janela, de modo que só meses completos são
+    arquivados.
+
+    Args:
+        hoje (date): Data de referência
+        dias_quentes (int): Tamanho mínimo da janela de dias recentes
+
+    Returns:
+        pd.Timestamp: Início do primeiro mês mantido
+    """
+    return pd.Timestamp((hoje - timedelta(days=dias_quentes)).replace(day=1))
+
+
+def _intervalo_restricoes(restricoes):
+    """
+    Menor e maior data admitidas pelas restrições sobre a coluna 'data'.
+    """
+    inicio = fim = None
+    for coluna, operador, valor in restricoes or []:
+        if coluna != 'data':
+            continue
+        valor = pd.Timestamp(valor)
+        if operador in ('>', '>=', '=='):
+            inicio = valor if inicio is None else max(inicio, valor)
+        if operador in ('<', '<=', '=='):
+            fim = valor if fim is None else min(fim, valor)
+    return inicio, fim
+
+
+class ArquivoMorto:
+    """
+    Meses arquivados de um arquivo de dados, com cache por processo (os
+    arquivos são imutáveis, então basta a versão do manifesto para validá-lo).
+    """
+
+    def __init__(self, diretorio):
+        """
+        Args:
+            diretorio (str): Diretório do arquivo morto
+        """
+        self.diretorio = diretorio
+        self.caminho_manifesto = os.path.join(diretorio, 'manifesto.json')
+        self._manifesto = (None, None)
+        self._dados = (None, None)
+        self._lock = threading.Lock()
+
+    def manifesto(self):
+        """
+        Returns:
+            dict: {'versao', 'limite', 'meses'} (versão 0 se nada foi arquivado)
+        """
+        try:
+            marca = os.stat(self.caminho_manifesto).st_mtime_ns
+        except FileNotFoundError:
+            return {'versao': 0, 'limite': None, 'meses': []}
+        if self._manifesto[0] != marca:
+            with open(self.caminho_manifesto, encoding='utf-8') as arquivo:
+                self._manifesto = (marca, json.load(arquivo))
+        return self._manifesto[1]
+
+    def versao(self):
+        """
+        Returns:
+            int: Versão do arquivo morto (muda a cada arquivamento)
+        """
+        return self.manifesto()['versao']
+
+    def limite(self):
+        """
+        Returns:
+            pd.Timestamp: Primeiro dia fora do arquivo morto, ou None se vazio
+        """
+        limite = self.manifesto()['limite']
+        return pd.Timestamp(limite) if limite else None
+
+    def arquivado(self, data_registro):
+        """
+        Args:
+            data_registro (date): Data de um registro
+
+        Returns:
+            bool: True se o dia pertence ao arquivo morto (somente leitura)
+        """
+        limite = self.limite()
+        return limite is not None and pd.Timestamp(data_registro) < limite
+
+    def _caminho(self, nome):
+        return os.path.join(self.diretorio, nome)
+
+    def ler(self, restricoes=None):
+        """
+        Lê os registros arquivados. Sem restrições, o resultado fica em cache
+        até o próximo arquivamento; com restrições, só os meses do intervalo
+        de datas pedido são abertos e as demais condições são aplicadas na
+        leitura do Parquet.
+
+        Args:
+            restricoes (list): Tuplas (coluna, operador, valor) (opcional)
+
+        Returns:
+            pd.DataFrame: Registros arquivados, ordenados por data
+        """
+        import pyarrow.dataset as ds
+        import pyarrow.parquet as pq
+
+        manifesto = self.manifesto()
+        if not restricoes:
+            with self._lock:
+                if self._dados[0] == manifesto['versao']:
+                    return self._dados[1]
+
+        inicio, fim = _intervalo_restricoes(restricoes)
+        meses = [
+            mes for mes in manifesto['meses']
+            if (inicio is None or mes >= inicio.strftime('%Y-%m')) and (fim is None or mes <= fim.strftime('%Y-%m'))
+        ]
+        if not meses:
+            return pd.DataFrame(columns=COLUNAS).astype({'data': 'datetime64[us]'})
+
+        filtros = [
+            (coluna, '=' if operador == '==' else operador, pd.Timestamp(valor) if coluna == 'data' else valor)
+            for coluna, operador, valor in restricoes or []
+        ]
+        # Um único dataset lê os meses em paralelo
+        dataset = ds.dataset([self._caminho(f"{mes}.parquet") for mes in meses], format='parquet')
+        df = dataset.to_table(filter=pq.filters_to_expression(filtros) if filtros else None).to_pandas()
+
+        if not restricoes:
+            with self._lock:
+                self._dados = (manifesto['versao'], df)
+        return df
+
+    def mensal(self):
+        """
+        Returns:
+            pd.DataFrame: Agregados mensais pré-calculados dos meses arquivados
+        """
+        import pyarrow.parquet as pq
+
+        if not self.manifesto()['meses']:
+            return pd.DataFrame(columns=['inicio_periodo', 'dias', 'total_iniciados', 'total_finalizados', 'media_andamento'])
+        return pq.read_table(self._caminho('mensal.parquet')).to_pandas()
+
+    def _gravar_parquet(self, df, nome):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        with gravacao_atomica(self._caminho(nome)) as temporario:
+            pq.write_table(
+                pa.Table.from_pandas(df, preserve_index=False), temporario, compression=RETENCAO_CONFIG['compressao']
+            )
+
+    def arquivar(self, df, limite):
+        """
+        Grava os meses anteriores ao limite e avança o limite do arquivo morto.
+
+        Args:
+            df (pd.DataFrame): Registros normalizados (dias já arquivados e os
+                posteriores ao limite são ignorados)
+            limite (pd.Timestamp): Início do primeiro mês mantido fora do arquivo
+
+        Returns:
+            int: Número de dias arquivados
+        """
+        from utils import agregar_por_periodo
+
+        manifesto = self.manifesto()
+        atual = self.limite()
+        if atual is not None and limite <= atual:
+            return 0
+
+        df = df[(df['data'] < limite) & ((df['data'] >= atual) if atual is not None else True)]
+        df = df[COLUNAS].sort_values('data').reset_index(drop=True)
+        os.makedirs(self.diretorio, exist_ok=True)
+
+        meses = list(manifesto['meses'])
+        for mes, dias in df.groupby(df['data'].dt.strftime('%Y-%m')):
+            if mes in meses:
+                raise ValueError(f"O mês {mes} já está arquivado")
+            self._gravar_parquet(dias.reset_index(drop=True), f"{mes}.parquet")
+            meses.append(mes)
+
+        if not df.empty:
+            mensal = pd.concat([self.mensal(), agregar_por_periodo(df, 'mes')], ignore_index=True)
+            self._gravar_parquet(mensal, 'mensal.parquet')
+
+        gravar_atomico(self.caminho_manifesto, json.dumps({
+            'versao': manifesto['versao'] + 1,
+            'limite': limite.date().isoformat(),
+            'meses': sorted(meses)
+        }))
+        return len(df)
+
+
+if __name__ == "__main__":
+    from data_manager import DataManager
+
+    parser = argparse.ArgumentParser(description="Aplica a política de retenção (arquivo morto)")
+    parser.add_argument('--arquivo', default="dados_tickets.xlsx", help="Arquivo de dados")
+    parser.add_argument('--dias', type=int, default=RETENCAO_CONFIG['dias_quentes'],
+                        help="Dias mantidos no armazenamento principal")
+    args = parser.parse_args()
+
+    dm = DataManager(args.arquivo)
+    arquivados = dm.aplicar_retencao(args.dias)
+    print(f"📦 {arquivados} dia(s) movido(s) para o arquivo morto; "
+          f"armazenamento principal a partir de {dm.arquivo_morto.limite():%d/%m/%Y}"
+          if dm.arquivo_morto.limite() is not None else "📦 Nada a arquivar")
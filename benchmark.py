@@ -0,0 +1,913 @@
+"""
+Benchmarks de desempenho do Dashboard de Tickets.
+Execute `python benchmark.py <nome>` para rodar um benchmark específico.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Módulos que não devem ser carregados só por importar data_manager/utils
+MODULOS_PESADOS = ('streamlit', 'plotly')
+
+SCRIPT_INICIALIZACAO = """
+import json, sys, time
+t0 = time.perf_counter()
+import data_manager
+t1 = time.perf_counter()
+import utils
+t2 = time.perf_counter()
+data_manager.DataManager(sys.argv[1])
+t3 = time.perf_counter()
+print(json.dumps({
+    'import_data_manager': (t1 - t0) * 1000,
+    'import_utils': (t2 - t1) * 1000,
+    'construir_data_manager': (t3 - t2) * 1000,
+    'modulos_pesados': sorted({m.split('.')[0] for m in sys.modules} & set(sys.argv[2].split(','))),
+}))
+"""
+
+SCRIPT_WORKER_MEMORIA = """
+import sys
+from data_manager import DataManager
+dm = DataManager(sys.argv[1], usar_snapshot=sys.argv[2] == '1')
+print('pronto', flush=True)
+sys.stdin.readline()
+df = dm.carregar_dados()
+# Percorrer todas as colunas para que as páginas sejam de fato lidas
+for coluna in df.columns:
+    df[coluna].tolist()
+print('carregado', flush=True)
+sys.stdin.readline()
+"""
+
+SCRIPT_INSTANCIA = """
+import json, sys, time
+from datetime import date, timedelta
+from data_manager import DataManager
+arquivo, instancia, instancias, escritas = sys.argv[1], int(sys.argv[2]), int(sys.argv[3]), int(sys.argv[4])
+dm = DataManager(arquivo)
+leituras = falhas = 0
+inicio = time.perf_counter()
+for i in range(escritas):
+    # Cada instância grava os próprios dias, intercalados com os das demais
+    dia = date(2020, 1, 1) + timedelta(days=i * instancias + instancia)
+    if not dm.adicionar_registro(dia, instancia, i, i % 7):
+        falhas += 1
+    dm.carregar_dados()
+    leituras += 1
+print(json.dumps({'escritas': escritas, 'leituras': leituras, 'falhas': falhas,
+                  'segundos': time.perf_counter() - inicio}))
+"""
+
+SCRIPT_MIGRACAO = """
+import json, sys, time
+import pandas as pd
+import migrar_xlsx
+modo, origem, destino, lote = sys.argv[1], sys.argv[2], sys.argv[3], int(sys.argv[4])
+pico = migrar_xlsx.pico_memoria_mb
+base = pico()
+inicio = time.perf_counter()
+if modo == 'read_excel':
+    linhas = len(pd.read_excel(origem))
+else:
+    migrar_xlsx.MIGRACAO_CONFIG['intervalo_progresso_segundos'] = 0
+    resumo, = migrar_xlsx.MigracaoXlsx(destino, lote, progresso=lambda m: print(m, flush=True)).migrar([origem])
+    linhas = resumo['lidas']
+print(json.dumps({'segundos': time.perf_counter() - inicio, 'linhas': linhas,
+                  'pico_mb': pico(), 'adicional_mb': pico() - base}), flush=True)
+"""
+
+# Decodificação de uma figura no motor JavaScript (Node), como o plotly.js faz
+# antes de desenhar: JSON.parse, arrays binários em base64 e datas em texto
+SCRIPT_DECODIFICACAO_JS = r"""
+const fs = require('fs');
+const payload = fs.readFileSync(process.argv[1], 'utf8');
+const repeticoes = parseInt(process.argv[2]);
+const TIPOS = {f8: Float64Array, f4: Float32Array, i4: Int32Array, i2: Int16Array, i1: Int8Array,
+               u4: Uint32Array, u2: Uint16Array, u1: Uint8Array};
+function decodificar(valor) {
+    if (valor && valor.bdata !== undefined) {
+        const bytes = Buffer.from(valor.bdata, 'base64');
+        const copia = bytes.buffer.slice(bytes.byteOffset, bytes.byteOffset + bytes.length);
+        return new TIPOS[valor.dtype](copia);
+    }
+    if (Array.isArray(valor) && typeof valor[0] === 'string') return valor.map(Date.parse);
+    return valor;
+}
+const tempos = [];
+for (let i = 0; i < repeticoes; i++) {
+    const inicio = process.hrtime.bigint();
+    const figura = JSON.parse(payload);
+    for (const traco of figura.data) { traco.x = decodificar(traco.x); traco.y = decodificar(traco.y); }
+    tempos.push(Number(process.hrtime.bigint() - inicio) / 1e6);
+}
+tempos.sort((a, b) => a - b);
+console.log(tempos[Math.floor(tempos.length / 2)]);
+"""
+
+PAGINAS_APP = ("🏠 Dashboard Hoje", "📊 Dashboard Geral", "📈 Relatórios", "🔍 Filtros Avançados")
+
+
+def _percentil(valores, percentual):
+    """
+    Percentil pelo método do posto mais próximo.
+    """
+    ordenados = sorted(valores)
+    return ordenados[max(0, -(-len(ordenados) * percentual // 100) - 1)]
+
+
+def _ler_ate(processo, condicao):
+    """
+    Lê a saída de um processo até a linha que satisfaz a condição, ignorando
+    mensagens impressas pelo app no caminho.
+    """
+    for linha in processo.stdout:
+        if condicao(linha.strip()):
+            return linha.strip()
+    raise RuntimeError(f"Processo {processo.pid} terminou sem responder (código {processo.wait()})")
+
+
+def _pss_kb(pid):
+    """
+    Memória proporcional (PSS) de um processo em KB: páginas compartilhadas
+    contam divididas pelo número de processos que as mapeiam. Usa o RSS
+    quando o PSS não está disponível.
+    """
+    for arquivo, campo in ((f'/proc/{pid}/smaps_rollup', 'Pss:'), (f'/proc/{pid}/status', 'VmRSS:')):
+        try:
+            with open(arquivo) as origem:
+                for linha in origem:
+                    if linha.startswith(campo):
+                        return int(linha.split()[1])
+        except OSError:
+            continue
+    return 0
+
+
+def _criar_planilha_sintetica(diretorio, dias):
+    """
+    Cria uma planilha com histórico sintético para os benchmarks.
+
+    Args:
+        diretorio (str): Diretório onde a planilha será criada
+        dias (int): Número de dias de histórico
+
+    Returns:
+        str: Caminho da planilha criada
+    """
+    from gerar_dados_exemplo import gerar_dataframe_sintetico
+
+    caminho = os.path.join(diretorio, 'dados_benchmark.xlsx')
+    gerar_dataframe_sintetico(dias, semente=42).to_excel(caminho, index=False)
+    return caminho
+
+
+def benchmark_inicializacao(dias=3650, repeticoes=5):
+    """
+    Mede o tempo de importação dos módulos e de construção do DataManager
+    em interpretadores novos, verificando que nenhum módulo pesado é carregado.
+
+    Args:
+        dias (int): Tamanho do histórico sintético
+        repeticoes (int): Número de execuções (é reportada a mediana)
+
+    Returns:
+        bool: True se nenhum módulo pesado foi carregado na inicialização
+    """
+    raiz = os.path.dirname(os.path.abspath(__file__))
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        planilha = _criar_planilha_sintetica(diretorio, dias)
+
+        resultados = []
+        for _ in range(repeticoes):
+            saida = subprocess.run(
+                [sys.executable, '-c', SCRIPT_INICIALIZACAO, planilha, ','.join(MODULOS_PESADOS)],
+                cwd=raiz, capture_output=True, text=True, check=True
+            )
+            resultados.append(json.loads(saida.stdout.strip().splitlines()[-1]))
+
+    print(f"⏱️ Inicialização ({dias} dias, mediana de {repeticoes} execuções)")
+    for etapa in ('import_data_manager', 'import_utils', 'construir_data_manager'):
+        mediana = statistics.median(r[etapa] for r in resultados)
+        print(f"  {etapa:<25} {mediana:8.1f} ms")
+
+    pesados = sorted({m for r in resultados for m in r['modulos_pesados']})
+    if pesados:
+        print(f"❌ Módulos pesados carregados na inicialização: {', '.join(pesados)}")
+        return False
+
+    print("✅ Nenhum módulo pesado carregado na inicialização")
+    return True
+
+
+def benchmark_rerun_hoje(dias=3650, envios=5):
+    """
+    Mede, com o AppTest do Streamlit, o tempo da primeira renderização do
+    Dashboard Hoje e o rerun após salvar o formulário em duas variantes: o
+    script inteiro (como antes da divisão em fragmentos) e só os fragmentos
+    alterados, pelo callback do botão. A gravação da planilha, igual nas
+    duas, é medida à parte (hub_tickets_operacao_segundos) e descontada.
+
+    Args:
+        dias (int): Tamanho do histórico sintético
+        envios (int): Número de envios de cada variante (é reportada a mediana)
+    """
+    from datetime import date
+
+    from streamlit.testing.v1 import AppTest
+
+    from data_manager import DataManager
+    from metricas import OPERACAO_SEGUNDOS
+
+    raiz = os.path.dirname(os.path.abspath(__file__))
+    diretorio_original = os.getcwd()
+
+    def segundos_gravando():
+        # O AppTest roda o app neste processo: as métricas são compartilhadas
+        serie = OPERACAO_SEGUNDOS._series.get((('operacao', 'adicionar_registro'),))
+        return serie[1] if serie else 0.0
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        # O app usa o arquivo padrão do DataManager no diretório atual
+        os.replace(_criar_planilha_sintetica(diretorio, dias), os.path.join(diretorio, 'dados_tickets.xlsx'))
+        os.chdir(diretorio)
+        try:
+            app = AppTest.from_file(os.path.join(raiz, 'app.py'), default_timeout=300)
+            inicio = time.perf_counter()
+            app.run()
+            primeira = (time.perf_counter() - inicio) * 1000
+
+            data_manager = DataManager('dados_tickets.xlsx')
+            gravacoes, completos, fragmentos = [], [], []
+            for i in range(envios):
+                # Script completo: a gravação acontece antes, fora da medição
+                antes = segundos_gravando()
+                data_manager.adicionar_registro(date.today(), 100 + i, i, i % 7)
+                gravacoes.append((segundos_gravando() - antes) * 1000)
+                inicio = time.perf_counter()
+                app.run()
+                completos.append((time.perf_counter() - inicio) * 1000)
+
+                # Fragmentos: o callback grava e reexecuta só os fragmentos alterados
+                app.number_input[0].set_value(200 + i)
+                antes = segundos_gravando()
+                inicio = time.perf_counter()
+                app.button[0].click().run()
+                gravacao = (segundos_gravando() - antes) * 1000
+                fragmentos.append((time.perf_counter() - inicio) * 1000 - gravacao)
+                # O AppTest guarda só a árvore dos fragmentos reexecutados; uma
+                # execução completa, fora das medições, restaura a página
+                app.run()
+        finally:
+            os.chdir(diretorio_original)
+
+    completo, fragmento = statistics.median(completos), statistics.median(fragmentos)
+    print(f"⏱️ Dashboard Hoje ({dias} dias, mediana de {envios} envios)")
+    print(f"  primeira renderização            {primeira:8.1f} ms")
+    print(f"  gravação da planilha             {statistics.median(gravacoes):8.1f} ms")
+    print(f"  rerun do script completo         {completo:8.1f} ms")
+    print(f"  rerun dos fragmentos alterados   {fragmento:8.1f} ms ({fragmento / completo - 1:+.0%} em relação ao completo)")
+
+
+def benchmark_memoria_workers(dias=36500, workers=4):
+    """
+    Mede a memória adicional de vários processos que carregam os mesmos dados,
+    lendo a planilha em cada processo ou mapeando o snapshot Arrow compartilhado.
+
+    Args:
+        dias (int): Tamanho do histórico sintético
+        workers (int): Número de processos simultâneos
+    """
+    from data_manager import DataManager
+
+    raiz = os.path.dirname(os.path.abspath(__file__))
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        planilha = _criar_planilha_sintetica(diretorio, dias)
+        # Publicar o snapshot antes, como faria a primeira gravação ou leitura
+        DataManager(planilha).carregar_dados()
+
+        print(f"🧠 Memória de {workers} processos ({dias} dias)")
+        for usar_snapshot in (False, True):
+            processos = [
+                subprocess.Popen(
+                    [sys.executable, '-c', SCRIPT_WORKER_MEMORIA, planilha, '1' if usar_snapshot else '0'],
+                    cwd=raiz, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True
+                )
+                for _ in range(workers)
+            ]
+            try:
+                for processo in processos:
+                    processo.stdout.readline()
+                antes = [_pss_kb(processo.pid) for processo in processos]
+
+                inicio = time.perf_counter()
+                for processo in processos:
+                    processo.stdin.write('\n')
+                    processo.stdin.flush()
+                for processo in processos:
+                    processo.stdout.readline()
+                duracao = (time.perf_counter() - inicio) * 1000
+                depois = [_pss_kb(processo.pid) for processo in processos]
+            finally:
+                for processo in processos:
+                    processo.communicate('\n')
+
+            adicional = sum(depois) - sum(antes)
+            modo = 'snapshot Arrow (mmap)' if usar_snapshot else 'leitura da planilha'
+            print(f"  {modo:<25} {adicional / 1024:8.1f} MB adicionais no total, "
+                  f"{adicional / 1024 / workers:6.1f} MB por processo, carga em {duracao:8.1f} ms")
+
+
+def benchmark_instancias_concorrentes(instancias=4, escritas=100):
+    """
+    Simula várias instâncias do app gravando e lendo o mesmo armazenamento ao
+    mesmo tempo (um processo por instância) e verifica se alguma gravação se
+    perdeu, comparando a planilha Excel com o banco SQLite em modo WAL.
+
+    Args:
+        instancias (int): Número de processos simultâneos
+        escritas (int): Gravações por processo, cada uma seguida de uma leitura
+
+    Returns:
+        bool: True se o armazenamento SQLite não perdeu nenhuma gravação e a
+        pirâmide mantida incrementalmente confere com uma reconstrução
+    """
+    from data_manager import DataManager
+    from piramide import PiramideTemporal
+
+    raiz = os.path.dirname(os.path.abspath(__file__))
+    esperado = instancias * escritas
+    sucesso = True
+
+    print(f"🔀 {instancias} instâncias concorrentes, {escritas} gravações + leituras cada")
+    with tempfile.TemporaryDirectory() as diretorio:
+        for nome in ('dados.xlsx', 'dados.db'):
+            arquivo = os.path.join(diretorio, nome)
+            # Criar o armazenamento e a pirâmide vazia antes de iniciar as instâncias
+            dm = DataManager(arquivo)
+            dm.sincronizar_derivados()
+
+            inicio = time.perf_counter()
+            processos = [
+                subprocess.Popen(
+                    [sys.executable, '-c', SCRIPT_INSTANCIA, arquivo, str(n), str(instancias), str(escritas)],
+                    cwd=raiz, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+                )
+                for n in range(instancias)
+            ]
+            resultados = [json.loads(processo.communicate()[0].strip().splitlines()[-1]) for processo in processos]
+            duracao = time.perf_counter() - inicio
+
+            dm = DataManager(arquivo)
+            df = dm.carregar_dados()
+            perdidas = esperado - len(df) - sum(r['falhas'] for r in resultados)
+            gravadas = sum(r['escritas'] - r['falhas'] for r in resultados)
+            leituras = sum(r['leituras'] for r in resultados)
+            print(f"  {nome:<12} {gravadas / duracao:7.1f} gravações/s  {leituras / duracao:7.1f} leituras/s  "
+                  f"falhas: {sum(r['falhas'] for r in resultados)}  perdidas: {perdidas}  "
+                  f"registros: {len(df)}/{esperado}")
+
+            if nome.endswith('.db'):
+                consistente = dm.piramide.niveis == PiramideTemporal.de_dataframe(df).niveis
+                print(f"  {'':<12} pirâmide incremental {'confere' if consistente else 'NÃO confere'} com a reconstrução")
+                sucesso = perdidas == 0 and len(df) == esperado and consistente
+
+    print("✅ Nenhuma gravação perdida no SQLite" if sucesso else "❌ Gravações perdidas no SQLite")
+    return sucesso
+
+
+def benchmark_validacao_lote(linhas=500000, repeticoes=3):
+    """
+    Mede o tempo da validação vetorizada de um lote grande de registros.
+
+    Args:
+        linhas (int): Tamanho do lote sintético
+        repeticoes (int): Número de execuções (é reportada a mediana)
+    """
+    from gerar_dados_exemplo import gerar_dataframe_sintetico
+    from utils import validar_lote
+
+    lote = gerar_dataframe_sintetico(linhas, semente=42)
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        relatorio = validar_lote(lote)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+
+    mediana = statistics.median(tempos)
+    print(f"✔️ Validação em lote ({linhas} linhas, mediana de {repeticoes} execuções)")
+    print(f"  tempo                     {mediana:8.1f} ms ({linhas / mediana * 1000:,.0f} linhas/s)")
+    for (nivel, regra), quantidade in relatorio.groupby(['nivel', 'regra']).size().items():
+        print(f"  {nivel:<6} {regra:<32} {quantidade:8d}")
+
+
+def _bytes_arrow(df):
+    """
+    Tamanho do DataFrame serializado em Arrow IPC, o formato que o
+    st.dataframe envia ao navegador.
+    """
+    import pyarrow as pa
+
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+    destino = pa.BufferOutputStream()
+    with pa.ipc.new_stream(destino, tabela.schema) as escritor:
+        escritor.write_table(tabela)
+    return destino.getvalue().size
+
+
+def benchmark_tabela_paginada(tamanhos=(3650, 36500), tamanho_pagina=50, repeticoes=5):
+    """
+    Compara a tabela completa (cópia + strftime de todas as linhas) com uma
+    página obtida por DataManager.obter_pagina, em tempo e bytes enviados.
+
+    Args:
+        tamanhos (tuple): Tamanhos de histórico a medir, em dias
+        tamanho_pagina (int): Registros por página
+        repeticoes (int): Número de execuções (é reportada a mediana)
+    """
+    from data_manager import DataManager
+
+    def medir(funcao):
+        tempos = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            resultado = funcao()
+            tempos.append((time.perf_counter() - inicio) * 1000)
+        return statistics.median(tempos), resultado
+
+    def tabela_completa(dm):
+        df_display = dm.carregar_dados().copy()
+        df_display['data'] = df_display['data'].dt.strftime('%d/%m/%Y')
+        return df_display
+
+    def pagina(dm, coluna):
+        df_pagina, _ = dm.obter_pagina(10, tamanho_pagina, coluna, decrescente=True)
+        return df_pagina.assign(data=df_pagina['data'].dt.strftime('%d/%m/%Y'))
+
+    print(f"📄 Tabela paginada ({tamanho_pagina} por página, mediana de {repeticoes} execuções)")
+    with tempfile.TemporaryDirectory() as diretorio:
+        for dias in tamanhos:
+            dm = DataManager(_criar_planilha_sintetica(diretorio, dias))
+            dm.carregar_dados()
+            for nome, funcao in (
+                ('tabela completa', lambda: tabela_completa(dm)),
+                ('página por data', lambda: pagina(dm, 'data')),
+                ('página por iniciados', lambda: pagina(dm, 'tickets_iniciados')),
+            ):
+                tempo, df = medir(funcao)
+                print(f"  {dias:>6} dias  {nome:<22} {tempo:8.2f} ms  {_bytes_arrow(df) / 1024:9.1f} KB")
+
+
+def benchmark_retencao(dias=36500, dias_quentes=90, repeticoes=5):
+    """
+    Compara, com e sem a política de retenção, o tempo de salvar o dia de
+    hoje e o de carregar os dados sem snapshot (primeira leitura de um
+    processo), além do tamanho em disco das duas camadas.
+
+    Args:
+        dias (int): Tamanho do histórico sintético
+        dias_quentes (int): Janela mantida no armazenamento principal
+        repeticoes (int): Número de execuções (é reportada a mediana)
+
+    Returns:
+        bool: True se os dados lidos das duas camadas conferem com os originais
+    """
+    from data_manager import DataManager
+
+    def medir(funcao):
+        tempos = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            funcao()
+            tempos.append((time.perf_counter() - inicio) * 1000)
+        return statistics.median(tempos)
+
+    def tamanho(caminho):
+        if os.path.isfile(caminho):
+            return os.path.getsize(caminho)
+        return sum(tamanho(os.path.join(caminho, nome)) for nome in os.listdir(caminho)) if os.path.isdir(caminho) else 0
+
+    print(f"📦 Retenção ({dias} dias, {dias_quentes} dias recentes, mediana de {repeticoes} execuções)")
+    with tempfile.TemporaryDirectory() as diretorio:
+        planilha = _criar_planilha_sintetica(diretorio, dias)
+        dm = DataManager(planilha)
+        original = dm.carregar_dados().copy()
+        hoje = original['data'].max().date()
+
+        for etapa in ('sem retenção', 'com retenção'):
+            if etapa == 'com retenção':
+                arquivados = dm.aplicar_retencao(dias_quentes, hoje=hoje)
+            salvar = medir(lambda: dm.adicionar_registro(hoje, 10, 5, 3))
+            carregar = medir(lambda: DataManager(planilha, usar_snapshot=False).carregar_dados())
+            print(f"  {etapa:<13} salvar hoje {salvar:9.1f} ms   carregar sem snapshot {carregar:9.1f} ms   "
+                  f"planilha {tamanho(planilha) / 1024:8.1f} KB   "
+                  f"arquivo morto {tamanho(dm.caminho_auxiliar('arquivo_morto')) / 1024:8.1f} KB")
+
+        lidos = DataManager(planilha, usar_snapshot=False).carregar_dados()
+        confere = len(lidos) == len(original) and lidos['data'].equals(original['data'].astype(lidos['data'].dtype))
+        print(f"  {arquivados} dias arquivados; "
+              f"{'✅ leitura das duas camadas confere' if confere else '❌ leitura das duas camadas NÃO confere'}")
+    return confere
+
+
+def benchmark_federacao(arquivos=8, dias=3650, processos=(1, 2, 4, 8)):
+    """
+    Mede a leitura federada de vários arquivos com pools de tamanhos
+    diferentes (1 = leitura em sequência) e verifica que o resultado
+    consolidado não depende do tamanho do pool.
+
+    Args:
+        arquivos (int): Número de planilhas sintéticas (uma por escritório)
+        dias (int): Histórico de cada planilha
+        processos (tuple): Tamanhos de pool a comparar
+
+    Returns:
+        bool: True se todos os tamanhos de pool produziram o mesmo resultado
+    """
+    from data_manager import DataManager
+    from federacao import LeitorFederado
+    from gerar_dados_exemplo import gerar_dataframe_sintetico
+
+    print(f"🏢 Leitura federada de {arquivos} planilhas de {dias} dias ({os.cpu_count()} núcleos disponíveis)")
+    with tempfile.TemporaryDirectory() as diretorio:
+        for n in range(arquivos):
+            caminho = os.path.join(diretorio, f"escritorio_{n}.xlsx")
+            gerar_dataframe_sintetico(dias, semente=n).to_excel(caminho, index=False)
+            # Aplicar a migração de esquema antes das medições
+            DataManager(caminho)
+
+        referencia, base, consistente = None, None, True
+        for tamanho in processos:
+            leitor = LeitorFederado([diretorio], processos=tamanho)
+            inicio = time.perf_counter()
+            leitor.carregar()
+            estatisticas = leitor.obter_estatisticas()
+            duracao = time.perf_counter() - inicio
+
+            base = base or duracao
+            referencia = referencia or estatisticas
+            consistente &= estatisticas == referencia
+            print(f"  {tamanho:>2} processo(s)  {duracao:7.2f} s  aceleração {base / duracao:5.2f}x  "
+                  f"eficiência {100 * base / duracao / tamanho:5.1f}%")
+
+    print("✅ Mesmo resultado com todos os tamanhos de pool" if consistente
+          else "❌ Resultado muda com o tamanho do pool")
+    return consistente
+
+
+def benchmark_migracao(dias=36500, lote=5000):
+    """
+    Compara a migração em streaming de uma planilha grande para o SQLite com a
+    leitura completa pelo pandas (memória de pico e tempo, cada uma em um
+    processo novo) e verifica a retomada: uma migração é interrompida à força
+    após o primeiro lote e uma segunda execução precisa completá-la.
+
+    Args:
+        dias (int): Linhas da planilha sintética
+        lote (int): Linhas por transação da migração
+
+    Returns:
+        bool: True se o banco migrado após a retomada confere com a planilha
+    """
+    from datetime import datetime
+
+    import pandas as pd
+    from data_manager import DataManager
+    import migrar_xlsx
+
+    raiz = os.path.dirname(os.path.abspath(__file__))
+
+    def executar(modo, origem, destino, interromper=False):
+        processo = subprocess.Popen(
+            [sys.executable, '-c', SCRIPT_MIGRACAO, modo, origem, destino, str(lote)],
+            cwd=raiz, stdout=subprocess.PIPE, text=True
+        )
+        try:
+            if interromper:
+                _ler_ate(processo, lambda linha: ': linha ' in linha)
+                processo.kill()
+                return None
+            return json.loads(_ler_ate(processo, lambda linha: linha.startswith('{')))
+        finally:
+            processo.wait()
+
+    print(f"🚚 Migração de uma planilha de {dias} linhas (lotes de {lote})")
+    with tempfile.TemporaryDirectory() as diretorio:
+        planilha = _criar_planilha_sintetica(diretorio, dias)
+
+        for modo, destino in (('read_excel', ''), ('streaming', os.path.join(diretorio, 'completo.db'))):
+            resultado = executar(modo, planilha, destino)
+            print(f"  {modo:<11} {resultado['segundos']:7.2f} s  {resultado['linhas'] / resultado['segundos']:9,.0f} linhas/s  "
+                  f"pico {resultado['pico_mb']:7.1f} MB ({resultado['adicional_mb']:+7.1f} MB após os imports)")
+
+        destino = os.path.join(diretorio, 'retomado.db')
+        executar('streaming', planilha, destino, interromper=True)
+        salva = migrar_xlsx.MigracaoXlsx(destino, progresso=lambda _: None).posicao_salva(planilha)
+        retomada = executar('streaming', planilha, destino)
+        print(f"  interrompida após a linha {salva['linha'] if salva else 0}; "
+              f"retomada leu as {retomada['linhas']} linhas restantes em {retomada['segundos']:.2f} s")
+
+        original = pd.read_excel(planilha)
+        # Históricos sintéticos longos passam por datas anteriores a 1900, que o
+        # Excel não representa: essas células não são datas e são rejeitadas
+        original = original[original['data'].map(lambda valor: isinstance(valor, datetime))].reset_index(drop=True)
+        migrado = DataManager(destino, usar_snapshot=False).carregar_dados()
+        confere = (
+            len(migrado) == len(original)
+            and migrado['data'].dt.date.tolist() == pd.to_datetime(original['data']).dt.date.tolist()
+            and all(migrado[coluna].tolist() == original[coluna].tolist()
+                    for coluna in ('tickets_iniciados', 'tickets_finalizados', 'tickets_andamento'))
+        )
+    print("✅ Banco migrado após a retomada confere com a planilha" if confere
+          else "❌ Banco migrado após a retomada NÃO confere com a planilha")
+    return confere
+
+
+def benchmark_graficos(tamanhos=(365, 3650, 36500), repeticoes=5):
+    """
+    Mede o payload dos gráficos do Dashboard Geral antes e depois de
+    utils.compactar_figura: bytes enviados ao navegador, tempo de
+    serialização no servidor e, se o Node estiver disponível, tempo de
+    decodificação no motor JavaScript. A série diária completa mostra o efeito
+    do WebGL e dos arrays binários; a da pirâmide é a que o app de fato envia.
+
+    Args:
+        tamanhos (tuple): Tamanhos do histórico sintético, em dias
+        repeticoes (int): Número de execuções (é reportada a mediana)
+
+    Returns:
+        bool: True se nenhuma figura compacta ficou maior que a original
+    """
+    import shutil
+    import streamlit  # noqa: F401  registra o template usado pelo app
+    import plotly.express as px
+    import plotly.io as pio
+    from gerar_dados_exemplo import gerar_dataframe_sintetico
+    from piramide import PiramideTemporal
+    from utils import compactar_figura
+
+    node = shutil.which('node')
+    contadores = ['tickets_iniciados', 'tickets_finalizados', 'tickets_andamento']
+
+    def mediana(funcao):
+        tempos = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            resultado = funcao()
+            tempos.append((time.perf_counter() - inicio) * 1000)
+        return resultado, statistics.median(tempos)
+
+    def decodificar(payload, diretorio):
+        caminho = os.path.join(diretorio, 'figura.json')
+        with open(caminho, 'w', encoding='utf-8') as arquivo:
+            arquivo.write(payload)
+        saida = subprocess.run([node, '-e', SCRIPT_DECODIFICACAO_JS, caminho, str(repeticoes)],
+                               capture_output=True, text=True, check=True)
+        return float(saida.stdout)
+
+    print(f"🖼️ Payload dos gráficos (mediana de {repeticoes} execuções"
+          f"{'' if node else '; Node indisponível, sem tempo de decodificação'})")
+    print(f"  {'gráfico':<32} {'original':>10} {'compacto':>10} {'serializar':>18} {'decodificar (JS)':>20}  traços")
+    menor = True
+    with tempfile.TemporaryDirectory() as diretorio:
+        for dias in tamanhos:
+            df = gerar_dataframe_sintetico(dias, semente=42)
+            _, serie = PiramideTemporal.de_dataframe(df).consultar()
+            figuras = {
+                f"linha diária ({dias} dias)": px.line(df, x='data', y=contadores),
+                f"área diária ({dias} dias)": px.area(df, x='data', y='tickets_andamento'),
+                f"linha da pirâmide ({len(serie)} pontos)": px.line(serie, x='data', y=contadores),
+            }
+            for nome, fig in figuras.items():
+                original, serializar_original = mediana(lambda: pio.to_json(fig, validate=False))
+                compacto, serializar_compacto = mediana(lambda: pio.to_json(compactar_figura(fig), validate=False))
+                menor &= len(compacto) <= len(original)
+                decodificacao = (
+                    f"{decodificar(original, diretorio):7.1f} → {decodificar(compacto, diretorio):6.1f} ms"
+                    if node else f"{'-':>17}"
+                )
+                tipos = sorted({traco['type'] for traco in json.loads(compacto)['data']})
+                print(f"  {nome:<32} {len(original) / 1024:8.1f}KB {len(compacto) / 1024:8.1f}KB "
+                      f"{serializar_original:7.1f} → {serializar_compacto:6.1f} ms {decodificacao:>20}  {','.join(tipos)}")
+
+    print("✅ Nenhuma figura ficou maior" if menor else "❌ Alguma figura compacta ficou maior que a original")
+    return menor
+
+
+@contextlib.contextmanager
+def _apptest_simultaneos():
+    """
+    Permite várias sessões do AppTest ao mesmo tempo em um processo. O
+    AppTest simula uma sessão por vez: a cada execução ele liga a opção
+    global.appTest por um patch desfeito ao terminar, instala um Runtime
+    simulado global e o descarta no fim, e recompila o script (ast.parse não é
+    seguro entre threads no CPython 3.11). Aqui a opção fica ligada durante
+    todo o bloco, o último Runtime instalado continua valendo para as sessões
+    ainda em execução (como o único Runtime de um servidor) e a compilação do
+    script é serializada.
+    """
+    import threading
+    from unittest.mock import patch
+    from streamlit.runtime.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1.util import patch_config_options
+
+    instalado = []
+    compilando = threading.Lock()
+    compilar = ScriptCache.get_bytecode
+
+    def instancia(cls):
+        if cls._instance is not None:
+            instalado[:] = [cls._instance]
+        if not instalado:
+            raise RuntimeError("Runtime hasn't been created!")
+        return instalado[0]
+
+    def get_bytecode(self, script_path):
+        with compilando:
+            return compilar(self, script_path)
+
+    with patch_config_options({'global.appTest': True}), \
+            patch.object(Runtime, 'instance', classmethod(instancia)), \
+            patch.object(Runtime, 'exists', classmethod(lambda cls: cls._instance is not None or bool(instalado))), \
+            patch.object(ScriptCache, 'get_bytecode', get_bytecode):
+        yield
+
+
+def _sessao_app(app_py, sessao, iteracoes, barreira):
+    """
+    Uma sessão do teste de carga: percorre as páginas e envia o formulário
+    Dados de Hoje com um valor próprio a cada volta. Executada em uma thread.
+
+    Returns:
+        dict: Latências por etapa, valores enviados e erros encontrados no app
+    """
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(app_py, default_timeout=300)
+    inicio = time.perf_counter()
+    app.run()
+    latencias = {'primeira renderização': [(time.perf_counter() - inicio) * 1000]}
+    # Todas as sessões começam a navegar juntas, após a primeira renderização
+    barreira.wait()
+
+    def medir(nome, elemento):
+        inicio = time.perf_counter()
+        elemento.run()
+        latencias.setdefault(nome, []).append((time.perf_counter() - inicio) * 1000)
+
+    enviados, erros = [], []
+    for i in range(iteracoes):
+        for pagina in PAGINAS_APP:
+            medir(pagina, app.sidebar.selectbox[0].select(pagina))
+            if pagina == PAGINAS_APP[0]:
+                # Envio do formulário Dados de Hoje (cada sessão grava valores próprios)
+                valor = 1000 * (sessao + 1) + i
+                app.number_input[0].set_value(valor)
+                medir('envio do formulário', app.button[0].click())
+                falhas = [str(e.value) for e in (*app.exception, *app.error)]
+                if not falhas:
+                    enviados.append(valor)
+                erros += falhas
+                # Após reexecutar só os fragmentos, o AppTest guarda apenas a árvore
+                # deles; uma execução completa, fora das medições, restaura o menu
+                app.run()
+            erros += [str(e.value) for e in (*app.exception, *app.error)]
+    return {'latencias': latencias, 'enviados': enviados, 'erros': erros}
+
+
+def benchmark_sessoes_concorrentes(sessoes=4, iteracoes=3, dias=3650, arquivo='dados_tickets.xlsx'):
+    """
+    Teste de carga do app: várias sessões simultâneas do AppTest do
+    Streamlit, cada uma em uma thread de um mesmo processo (como o servidor
+    atende as sessões), percorrem as quatro páginas e enviam o formulário
+    Dados de Hoje sobre o mesmo conjunto de dados sintético, com o mesmo
+    DataManager compartilhado (ver gerenciador_para). Reporta os percentis de
+    latência dos reruns por página e a CPU e a memória (PSS) do processo.
+
+    Ao final, confere no arquivo de dados que nenhuma gravação se perdeu: os
+    demais dias continuam intactos, o dia de hoje tem o valor de um dos envios
+    e todos os envios constam do histórico de alterações.
+
+    Args:
+        sessoes (int): Número de sessões simultâneas
+        iteracoes (int): Voltas completas pelas páginas em cada sessão
+        dias (int): Tamanho do histórico sintético
+        arquivo (str): Arquivo de dados usado pelo app (.xlsx ou .db)
+
+    Returns:
+        bool: True se nenhuma sessão encontrou erro no app e todos os envios
+        foram gravados
+    """
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+    from datetime import date
+    from data_manager import DataManager
+    from gerar_dados_exemplo import gerar_dataframe_sintetico
+
+    app_py = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py')
+    hoje = date.today()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho = os.path.join(diretorio, arquivo)
+        if caminho.endswith('.xlsx'):
+            os.replace(_criar_planilha_sintetica(diretorio, dias), caminho)
+        else:
+            dm = DataManager(caminho)
+            with dm.sqlite.transacao() as con:
+                dm.sqlite.substituir(con, gerar_dataframe_sintetico(dias, semente=42))
+        original = DataManager(caminho, usar_snapshot=False).carregar_dados()
+
+        anterior = os.environ.get('TICKETS_ARQUIVO')
+        os.environ['TICKETS_ARQUIVO'] = caminho
+        try:
+            barreira = threading.Barrier(sessoes)
+            with _apptest_simultaneos(), ThreadPoolExecutor(max_workers=sessoes) as pool:
+                futuros = [pool.submit(_sessao_app, app_py, sessao, iteracoes, barreira) for sessao in range(sessoes)]
+                inicio, cpu = time.perf_counter(), time.process_time()
+                resultados = [futuro.result() for futuro in futuros]
+            duracao, cpu = time.perf_counter() - inicio, time.process_time() - cpu
+            memoria = _pss_kb(os.getpid())
+        finally:
+            if anterior is None:
+                os.environ.pop('TICKETS_ARQUIVO', None)
+            else:
+                os.environ['TICKETS_ARQUIVO'] = anterior
+
+        # Leitura direta do arquivo, sem o gerenciador compartilhado nem o snapshot
+        dm = DataManager(caminho, usar_snapshot=False)
+        gravado = dm.carregar_dados()
+        enviados = {valor for r in resultados for valor in r['enviados']}
+        registrados = {
+            alteracao['valores'].get('tickets_iniciados') for alteracao in dm.historico.alteracoes(hoje)
+            if alteracao['valores']
+        }
+        outros = gravado['data'].dt.date != hoje
+        demais_intactos = gravado[outros].reset_index(drop=True)[list(original.columns)].equals(
+            original[original['data'].dt.date != hoje].reset_index(drop=True)
+        )
+        do_dia = gravado.loc[~outros, 'tickets_iniciados'].tolist()
+
+    print(f"👥 {sessoes} sessões simultâneas, {iteracoes} voltas pelas páginas ({dias} dias, {arquivo})")
+    print(f"  {'etapa':<24} {'reruns':>6} {'p50':>9} {'p90':>9} {'p99':>9} {'máx':>9}  (ms)")
+    for etapa in ('primeira renderização', *PAGINAS_APP, 'envio do formulário'):
+        tempos = [t for r in resultados for t in r['latencias'].get(etapa, [])]
+        print(f"  {etapa:<24} {len(tempos):>6} " + ' '.join(
+            f"{_percentil(tempos, p):9.1f}" for p in (50, 90, 99)
+        ) + f" {max(tempos):9.1f}")
+    print(f"  processo: {cpu:.2f} s de CPU em {duracao:.2f} s ({100 * cpu / duracao:.1f}%), "
+          f"{memoria / 1024:.1f} MB (PSS)")
+
+    erros = [erro for r in resultados for erro in r['erros']]
+    perdidos = sorted(enviados - registrados)
+    if erros:
+        print(f"❌ {len(erros)} erro(s) no app, ex.: {erros[0]}")
+    if not demais_intactos or len(do_dia) != 1 or do_dia[0] not in enviados or perdidos:
+        print(f"❌ Gravações perdidas: {len(gravado)} de {len(original)} dias no arquivo, "
+              f"hoje = {do_dia}, {len(perdidos)} envio(s) fora do histórico")
+        return False
+    if erros:
+        return False
+    print(f"✅ Nenhum erro nas sessões; os {len(enviados)} envios foram gravados")
+    return True
+
+
+BENCHMARKS = {
+    'federacao': benchmark_federacao,
+    'graficos': benchmark_graficos,
+    'instancias_concorrentes': benchmark_instancias_concorrentes,
+    'memoria_workers': benchmark_memoria_workers,
+    'migracao': benchmark_migracao,
+    'inicializacao': benchmark_inicializacao,
+    'rerun_hoje': benchmark_rerun_hoje,
+    'retencao': benchmark_retencao,
+    'sessoes_concorrentes': benchmark_sessoes_concorrentes,
+    'tabela_paginada': benchmark_tabela_paginada,
+    'validacao_lote': benchmark_validacao_lote,
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks do Dashboard de Tickets")
+    parser.add_argument('benchmark', choices=sorted(BENCHMARKS), help="Benchmark a executar")
+    parser.add_argument('parametros', nargs='*', metavar='nome=valor',
+                        help="Parâmetros do benchmark (ex.: sessoes=8 arquivo=dados.db)")
+    args = parser.parse_args()
+
+    parametros = {}
+    for parametro in args.parametros:
+        nome, _, valor = parametro.partition('=')
+        try:
+            parametros[nome] = json.loads(valor)
+        except ValueError:
+            parametros[nome] = valor
+
+    sys.exit(0 if BENCHMARKS[args.benchmark](**parametros) is not False else 1)
@@ -0,0 +1,282 @@
+"""
+Dimensão de calendário para KPIs por dia útil.
+
+Uma tabela pré-calculada com uma linha por dia (dia da semana, fim de semana,
+feriado, dia útil, ano e semana ISO, mês) é juntada aos registros de uma só
+vez, pela data, e os KPIs por dia útil saem de agrupamentos vetorizados, sem aritmética
+de datas a cada chamada.
+
+Feriados:
+    - nacionais fixos e móveis (a partir da Páscoa) de CALENDARIO_CONFIG;
+    - locais, no arquivo JSON de CALENDARIO_CONFIG['arquivo_feriados']
+      (padrão: feriados.json no diretório do arquivo de dados, ou no
+      diretório atual quando não há um), com datas "AAAA-MM-DD" para um ano
+      específico ou "MM-DD" para todos os anos:
+          {"01-25": "Aniversário da cidade", "2025-12-24": "Ponto facultativo"}
+      Entradas com data inválida são ignoradas (com um aviso).
+
+A tabela fica em cache por faixa de anos e arquivo de feriados, e é refeita
+quando o arquivo muda.
+"""
+
+import json
+import os
+import threading
+from datetime import date, timedelta
+
+import pandas as pd
+
+CALENDARIO_CONFIG = {
+    'arquivo_feriados': 'feriados.json',  # Feriados locais (opcional; relativo ao diretório dos dados)
+    'dias_uteis': (0, 1, 2, 3, 4),        # Segunda a sexta
+    'feriados_fixos': {
+        '01-01': 'Confraternização Universal',
+        '04-21': 'Tiradentes',
+        '05-01': 'Dia do Trabalho',
+        '09-07': 'Independência do Brasil',
+        '10-12': 'Nossa Senhora Aparecida',
+        '11-02': 'Finados',
+        '11-15': 'Proclamação da República',
+        '11-20': 'Dia da Consciência Negra',
+        '12-25': 'Natal'
+    },
+    # Dias em relação ao domingo de Páscoa
+    'feriados_moveis': {
+        'Carnaval (segunda-feira)': -48,
+        'Carnaval (terça-feira)': -47,
+        'Sexta-feira Santa': -2,
+        'Corpus Christi': 60
+    }
+}
+
+COLUNAS_CALENDARIO = [
+    'dia_semana', 'fim_de_semana', 'feriado', 'nome_feriado', 'dia_util', 'ano_iso', 'semana_iso', 'mes'
+]
+
+_cache = {}
+_lock_cache = threading.Lock()
+# Feriados locais validados por arquivo: caminho -> (identificação, feriados)
+_locais = {}
+
+
+def pascoa(ano):
+    """
+    Domingo de Páscoa pelo algoritmo de Meeus/Jones/Butcher (calendário gregoriano).
+
+    Args:
+        ano (int): Ano
+
+    Returns:
+        date: Domingo de Páscoa
+    """
+    a, b, c = ano % 19, ano // 100, ano % 100
+    d, e = b // 4, b % 4
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    mes, dia = divmod(h + l - 7 * m + 114, 31)
+    return date(ano, mes, dia + 1)
+
+
+def caminho_feriados(arquivo_dados=None):
+    """
+    Args:
+        arquivo_dados (str): Arquivo de dados (opcional)
+
+    Returns:
+        str: Arquivo de feriados locais, no diretório do arquivo de dados
+        (ou no diretório atual, sem arquivo de dados)
+    """
+    diretorio = os.path.dirname(os.path.abspath(arquivo_dados)) if arquivo_dados else os.getcwd()
+    return os.path.join(diretorio, CALENDARIO_CONFIG['arquivo_feriados'])
+
+
+def _data_feriado(chave):
+    """
+    Valida a chave de um feriado local.
+
+    Returns:
+        date: Data da chave (no ano 2000, bissexto, para "MM-DD"), ou None se inválida
+    """
+    try:
+        if len(chave) == 5:
+            return date.fromisoformat(f"2000-{chave}")
+        if len(chave) == 10:
+            return date.fromisoformat(chave)
+    except ValueError:
+        pass
+    return None
+
+
+def _feriados_locais(arquivo_dados=None):
+    """
+    Args:
+        arquivo_dados (str): Arquivo de dados (ver caminho_feriados)
+
+    Returns:
+        tuple: (feriados válidos do arquivo local, identificação do arquivo
+        (caminho, data e tamanho), ou None se ausente)
+    """
+    caminho = caminho_feriados(arquivo_dados)
+    try:
+        info = os.stat(caminho)
+    except FileNotFoundError:
+        return {}, None
+    except OSError as e:
+        print(f"Erro ao ler os feriados locais de {caminho}: {e}")
+        return {}, None
+    assinatura = (caminho, info.st_mtime_ns, info.st_size)
+    # Arquivo inalterado: nem relido nem validado (os avisos saem uma vez)
+    with _lock_cache:
+        salvo = _locais.get(caminho)
+    if salvo is not None and salvo[0] == assinatura:
+        return salvo[1], assinatura
+
+    try:
+        with open(caminho, encoding='utf-8') as arquivo:
+            locais = json.load(arquivo)
+    except (OSError, ValueError) as e:
+        print(f"Erro ao ler os feriados locais de {caminho}: {e}")
+        return {}, None
+    if not isinstance(locais, dict):
+        print(f"Feriados locais de {caminho} ignorados: esperado um objeto {{data: nome}}")
+        return {}, None
+
+    validos = {}
+    for chave, nome in locais.items():
+        if _data_feriado(chave) is None:
+            print(f"Feriado local ignorado em {caminho}: data inválida {chave!r} (use AAAA-MM-DD ou MM-DD)")
+            continue
+        validos[chave] = nome
+    with _lock_cache:
+        _locais[caminho] = (assinatura, validos)
+    return validos, assinatura
+
+
+def feriados(ano_inicio, ano_fim, locais=None, arquivo_dados=None):
+    """
+    Feriados nacionais e locais de uma faixa de anos.
+
+    Args:
+        ano_inicio (int): Primeiro ano
+        ano_fim (int): Último ano (inclusive)
+        locais (dict): Feriados locais já validados (padrão: arquivo de CALENDARIO_CONFIG)
+        arquivo_dados (str): Arquivo de dados, para localizar o arquivo de feriados
+
+    Returns:
+        dict: date -> nome do feriado
+    """
+    if locais is None:
+        locais = _feriados_locais(arquivo_dados)[0]
+    resultado = {}
+    for ano in range(ano_inicio, ano_fim + 1):
+        for chave, nome in {**CALENDARIO_CONFIG['feriados_fixos'], **locais}.items():
+            if len(chave) == 5:
+                mes, dia = map(int, chave.split('-'))
+                # 29/02 só existe nos anos bissextos
+                if mes == 2 and dia == 29 and not pd.Timestamp(ano, 1, 1).is_leap_year:
+                    continue
+                resultado[date(ano, mes, dia)] = nome
+        domingo = pascoa(ano)
+        for nome, deslocamento in CALENDARIO_CONFIG['feriados_moveis'].items():
+            resultado[domingo + timedelta(days=deslocamento)] = nome
+    for chave, nome in locais.items():
+        if len(chave) == 10:
+            dia = date.fromisoformat(chave)
+            if ano_inicio <= dia.year <= ano_fim:
+                resultado[dia] = nome
+    return resultado
+
+
+def tabela_calendario(inicio, fim, arquivo_dados=None):
+    """
+    Tabela de calendário dos anos que cobrem o intervalo, calculada uma vez e
+    mantida em cache.
+
+    Args:
+        inicio (date): Primeiro dia necessário
+        fim (date): Último dia necessário
+        arquivo_dados (str): Arquivo de dados, para localizar o arquivo de feriados
+
+    Returns:
+        pd.DataFrame: Colunas de COLUNAS_CALENDARIO indexadas pela data
+        (anos completos; não altere a tabela retornada)
+    """
+    locais, assinatura = _feriados_locais(arquivo_dados)
+    origem = caminho_feriados(arquivo_dados)
+    chave = (pd.Timestamp(inicio).year, pd.Timestamp(fim).year, origem, assinatura)
+    with _lock_cache:
+        tabela = _cache.get(chave)
+    if tabela is not None:
+        return tabela
+
+    ano_inicio, ano_fim = chave[0], chave[1]
+    dias = pd.date_range(f"{ano_inicio}-01-01", f"{ano_fim}-12-31", freq='D', name='data')
+    nomes = pd.Series(
+        {pd.Timestamp(dia): nome for dia, nome in feriados(ano_inicio, ano_fim, locais).items()}, dtype=object
+    )
+    nome_feriado = nomes.reindex(dias).fillna('').to_numpy()
+    dia_semana = dias.weekday.to_numpy()
+    iso = dias.isocalendar()
+    tabela = pd.DataFrame({
+        'dia_semana': dia_semana,
+        'fim_de_semana': dia_semana >= 5,
+        'feriado': nome_feriado != '',
+        'nome_feriado': nome_feriado,
+        'ano_iso': iso['year'].to_numpy(),
+        'semana_iso': iso['week'].to_numpy(),
+        'mes': dias.to_period('M')
+    }, index=dias)
+    tabela.insert(
+        4, 'dia_util', pd.Series(dia_semana, index=dias).isin(CALENDARIO_CONFIG['dias_uteis']).to_numpy()
+        & ~tabela['feriado'].to_numpy()
+    )
+
+    with _lock_cache:
+        # Mantém, de cada arquivo de feriados, só as tabelas da versão atual
+        for antiga in [c for c in _cache if c[2] == origem and c[3] != assinatura]:
+            del _cache[antiga]
+        _cache[chave] = tabela
+    return tabela
+
+
+def com_calendario(df, colunas=None, arquivo_dados=None):
+    """
+    Junta a dimensão de calendário aos registros diários. Como a tabela tem
+    um dia por linha a partir de 1º de janeiro, a linha de cada registro é
+    calculada pela diferença de datas, sem busca pelo índice.
+
+    Args:
+        df (pd.DataFrame): Registros com a coluna 'data'
+        colunas (list): Colunas do calendário a juntar (padrão: COLUNAS_CALENDARIO)
+        arquivo_dados (str): Arquivo de dados, para localizar o arquivo de feriados
+
+    Returns:
+        pd.DataFrame: Cópia de df com as colunas do calendário
+    """
+    colunas = list(colunas or COLUNAS_CALENDARIO)
+    datas = df['data'].dt.normalize()
+    if datas.isna().all():
+        return df.reindex(columns=[*df.columns, *colunas])
+    calendario = tabela_calendario(datas.min(), datas.max(), arquivo_dados)
+    # Registros sem data ficam com -1, preenchido com valores ausentes
+    posicoes = ((datas - calendario.index[0]) // pd.Timedelta(days=1)).fillna(-1).to_numpy(dtype='int64')
+    return df.assign(**{
+        coluna: pd.api.extensions.take(calendario[coluna].array, posicoes, allow_fill=True)
+        for coluna in colunas
+    })
+
+
+def dias_uteis(inicio, fim, arquivo_dados=None):
+    """
+    Args:
+        inicio (date): Primeiro dia
+        fim (date): Último dia (inclusive)
+        arquivo_dados (str): Arquivo de dados, para localizar o arquivo de feriados
+
+    Returns:
+        int: Dias úteis no intervalo
+    """
+    return int(tabela_calendario(inicio, fim, arquivo_dados).loc[pd.Timestamp(inicio):pd.Timestamp(fim), 'dia_util'].sum())
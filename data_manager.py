@@ -1,46 +1,534 @@
 import pandas as pd
+import functools
+import json
 import os
+import threading
 from datetime import datetime, date
-import streamlit as st
+
+from gravacao_atomica import gravacao_atomica, gravar_atomico
+from metricas import CACHE_CONSULTAS, OPERACAO_FALHAS, REGISTROS, medir_operacao
+
+COLUNAS = ['data', 'tickets_iniciados', 'tickets_finalizados', 'tickets_andamento', 'links_chamados']
+CONTADORES = ('tickets_iniciados', 'tickets_finalizados', 'tickets_andamento')
+
+# Colunas aceitas na ordenação das páginas (obter_pagina)
+COLUNAS_ORDENAVEIS = ('data', *CONTADORES)
+
+# Um DataManager por arquivo de dados e processo (ver gerenciador_para)
+_gerenciadores = {}
+_lock_gerenciadores = threading.Lock()
+
+# Ordenações já calculadas: (arquivo, versão, coluna) -> posições ordenadas.
+# Só a versão mais recente de cada arquivo é mantida.
+_ordenacoes = {}
+
+
+def _ordenacao(df, coluna, chave=None):
+    """
+    Posições dos registros na ordem da coluna (empates na ordem de data).
+    
+    Args:
+        df (pd.DataFrame): Dados ordenados por data
+        coluna (str): Coluna de ordenação
+        chave (tuple): (arquivo, versão) para reutilizar o resultado (opcional)
+        
+    Returns:
+        np.ndarray: Posições ordenadas
+    """
+    import numpy as np
+    
+    if coluna == 'data':
+        return np.arange(len(df))
+    if chave is not None and (*chave, coluna) in _ordenacoes:
+        return _ordenacoes[(*chave, coluna)]
+    
+    ordem = np.argsort(df[coluna].to_numpy(), kind='stable')
+    if chave is not None:
+        for antiga in [k for k in _ordenacoes if k[0] == chave[0] and k[1] != chave[1]]:
+            del _ordenacoes[antiga]
+        _ordenacoes[(*chave, coluna)] = ordem
+    return ordem
+
+
+def _exclusivo(metodo):
+    """
+    Decorador que executa o método sob a trava do DataManager: o mesmo
+    gerenciador é compartilhado pelas sessões (threads) do processo (ver
+    gerenciador_para), e leitura, alteração e regravação dos dados e das
+    estruturas derivadas não podem se intercalar entre elas.
+    """
+    @functools.wraps(metodo)
+    def executar(self, *args, **kwargs):
+        with self._lock:
+            return metodo(self, *args, **kwargs)
+    return executar
+
+
+def calcular_estatisticas(df):
+    """
+    Calcula estatísticas básicas de um conjunto de registros.
+    
+    Args:
+        df (pd.DataFrame): Registros com 'data' e os contadores
+        
+    Returns:
+        dict: Dicionário com estatísticas
+    """
+    if df.empty:
+        return {
+            'total_registros': 0,
+            'periodo_inicio': None,
+            'periodo_fim': None,
+            'media_iniciados': 0,
+            'media_finalizados': 0,
+            'media_andamento': 0,
+            'total_iniciados': 0,
+            'total_finalizados': 0
+        }
+    
+    return {
+        'total_registros': len(df),
+        'periodo_inicio': df['data'].min(),
+        'periodo_fim': df['data'].max(),
+        'media_iniciados': df['tickets_iniciados'].mean(),
+        'media_finalizados': df['tickets_finalizados'].mean(),
+        'media_andamento': df['tickets_andamento'].mean(),
+        'total_iniciados': df['tickets_iniciados'].sum(),
+        'total_finalizados': df['tickets_finalizados'].sum()
+    }
+
+
+def _exibir_erro(mensagem):
+    """
+    Exibe uma mensagem de erro na interface, importando o streamlit apenas quando necessário.
+
+    Args:
+        mensagem (str): Mensagem de erro
+    """
+    import streamlit as st
+    st.error(mensagem)
+
 
 class DataManager:
-    def __init__(self, arquivo_excel="dados_tickets.xlsx"):
+    def __init__(self, arquivo_excel="dados_tickets.xlsx", usar_snapshot=True):
         """
         Inicializa o gerenciador de dados.
         
         Args:
-            arquivo_excel (str): Nome do arquivo Excel para armazenar os dados
+            arquivo_excel (str): Nome do arquivo Excel para armazenar os dados;
+                com extensão .db/.sqlite/.sqlite3, os dados ficam em um banco
+                SQLite compartilhável entre processos (ver armazenamento_sqlite.py)
+            usar_snapshot (bool): Ler os dados pelo snapshot Arrow compartilhado
+                entre processos (ver snapshot_arrow.py)
         """
         self.arquivo_excel = arquivo_excel
+        self.usar_snapshot = usar_snapshot
+        self.sqlite = None
+        if arquivo_excel.lower().endswith(('.db', '.sqlite', '.sqlite3')):
+            from armazenamento_sqlite import ArmazenamentoSQLite
+            self.sqlite = ArmazenamentoSQLite(arquivo_excel)
+        self._previsao = None
+        self._piramide = None
+        self._intradiario = None
+        self._historico = None
+        self._arquivo_morto = None
+        self._notificador = None
+        self._versao_derivados = None
+        # Reentrante: operações sob a trava chamam outras que também a usam
+        self._lock = threading.RLock()
         self.inicializar_arquivo()
     
+    def caminho_auxiliar(self, sufixo):
+        """
+        Caminho de um arquivo auxiliar guardado ao lado do arquivo de dados.
+        
+        Args:
+            sufixo (str): Sufixo do arquivo (ex.: 'previsao.json')
+            
+        Returns:
+            str: Caminho do arquivo auxiliar
+        """
+        return f"{os.path.splitext(self.arquivo_excel)[0]}_{sufixo}"
+    
+    @property
+    @_exclusivo
+    def previsao(self):
+        """
+        Modelo incremental de previsão e anomalias, carregado sob demanda.
+        
+        Returns:
+            ModeloEWMA: Modelo associado a este arquivo de dados
+        """
+        self._verificar_derivados()
+        return self._carregar_previsao()
+    
+    @property
+    @_exclusivo
+    def piramide(self):
+        """
+        Pirâmide temporal (dia/semana/mês/trimestre) usada pelos gráficos, carregada sob demanda.
+        
+        Returns:
+            PiramideTemporal: Pirâmide associada a este arquivo de dados
+        """
+        self._verificar_derivados()
+        return self._carregar_piramide()
+    
+    def _carregar_previsao(self):
+        """
+        Modelo em memória, lido do disco se preciso, sem verificar a versão dos dados.
+        """
+        if self._previsao is None:
+            from previsao import ModeloEWMA
+            self._previsao = ModeloEWMA(self.caminho_auxiliar('previsao.json'))
+        return self._previsao
+    
+    def _carregar_piramide(self):
+        """
+        Pirâmide em memória, lida do disco se preciso, sem verificar a versão dos dados.
+        """
+        if self._piramide is None:
+            from piramide import PiramideTemporal
+            self._piramide = PiramideTemporal(self.caminho_auxiliar('piramide.json'))
+        return self._piramide
+    
+    @property
+    def intradiario(self):
+        """
+        Fluxo de snapshots intradiários associado a este arquivo de dados.
+        
+        Returns:
+            SnapshotsIntradiarios: Snapshots guardados em <arquivo>_intradiario/
+        """
+        if self._intradiario is None:
+            from intradiario import SnapshotsIntradiarios
+            self._intradiario = SnapshotsIntradiarios(self.caminho_auxiliar('intradiario'))
+        return self._intradiario
+    
+    @property
+    def historico(self):
+        """
+        Histórico de alterações dos registros, carregado sob demanda.
+        
+        Returns:
+            HistoricoAlteracoes: Histórico guardado em <arquivo>_historico/
+        """
+        if self._historico is None:
+            from historico import HistoricoAlteracoes
+            self._historico = HistoricoAlteracoes(self.caminho_auxiliar('historico'))
+        return self._historico
+    
+    @property
+    def arquivo_morto(self):
+        """
+        Meses antigos movidos pela política de retenção (ver arquivo_morto.py).
+        
+        Returns:
+            ArquivoMorto: Arquivo morto guardado em <arquivo>_arquivo_morto/
+        """
+        if self._arquivo_morto is None:
+            from arquivo_morto import ArquivoMorto
+            self._arquivo_morto = ArquivoMorto(self.caminho_auxiliar('arquivo_morto'))
+        return self._arquivo_morto
+    
+    def _com_arquivo_morto(self, df, restricoes=None):
+        """
+        Junta aos registros do armazenamento principal os do arquivo morto.
+        
+        Args:
+            df (pd.DataFrame): Registros normalizados do armazenamento principal
+            restricoes (list): Restrições da consulta, repassadas ao arquivo morto
+            
+        Returns:
+            pd.DataFrame: Registros das duas camadas, ordenados por data
+        """
+        limite = self.arquivo_morto.limite()
+        if limite is None:
+            return df
+        # Cópias deixadas por um arquivamento interrompido valem pelo arquivo morto
+        if not df.empty:
+            df = df[df['data'] >= limite]
+        return pd.concat([self.arquivo_morto.ler(restricoes), df], ignore_index=True)
+    
+    def _versao_com_arquivo_morto(self, versao):
+        """
+        Acrescenta à versão do armazenamento principal a do arquivo morto.
+        """
+        arquivamentos = self.arquivo_morto.versao()
+        return f"{versao}-m{arquivamentos:x}" if versao and arquivamentos else versao
+    
+    @_exclusivo
+    def aplicar_retencao(self, dias_quentes=None, hoje=None):
+        """
+        Move para o arquivo morto os meses completos anteriores à janela de
+        dias recentes, deixando o armazenamento principal só com essa janela.
+        
+        Args:
+            dias_quentes (int): Dias mantidos no armazenamento principal (padrão: RETENCAO_CONFIG)
+            hoje (date): Data de referência (padrão: hoje)
+            
+        Returns:
+            int: Número de dias movidos para o arquivo morto
+        """
+        from arquivo_morto import RETENCAO_CONFIG, limite_retencao
+        
+        limite = limite_retencao(hoje or date.today(), dias_quentes or RETENCAO_CONFIG['dias_quentes'])
+        try:
+            if self.sqlite is not None:
+                with self.sqlite.transacao() as con:
+                    antigos = self._normalizar(pd.read_sql_query(
+                        "SELECT * FROM registros WHERE data < ?", con, params=(limite.date().isoformat(),)
+                    ))
+                    arquivados = self.arquivo_morto.arquivar(antigos, limite)
+                    con.execute("DELETE FROM registros WHERE data < ?", (self.arquivo_morto.manifesto()['limite'],))
+                self._notificar_gravacao()
+                return arquivados
+            
+            if not os.path.exists(self.arquivo_excel):
+                return 0
+            df = self._carregar_com_versao(atualizada=True)[1]
+            arquivados = self.arquivo_morto.arquivar(df, limite)
+            # Regravar a planilha só com os dias mantidos (ver _gravar)
+            self._gravar(df)
+            return arquivados
+        except Exception as e:
+            _exibir_erro(f"Erro ao aplicar a política de retenção: {e}")
+            return 0
+    
+    def agregados_mensais(self):
+        """
+        Agregados mensais das duas camadas: os do arquivo morto já vêm
+        calculados, e só os meses recentes são agregados na hora.
+        
+        Returns:
+            pd.DataFrame: Colunas de utils.agregar_por_periodo, uma linha por mês
+        """
+        from utils import agregar_por_periodo
+        
+        df = self.carregar_dados()
+        limite = self.arquivo_morto.limite()
+        if limite is None:
+            return agregar_por_periodo(df, 'mes')
+        recentes = agregar_por_periodo(df[df['data'] >= limite], 'mes')
+        return pd.concat([self.arquivo_morto.mensal(), recentes], ignore_index=True)
+    
+    def _rejeitar_arquivado(self, data_registro):
+        """
+        Returns:
+            bool: True (e exibe o erro) se o dia está no arquivo morto
+        """
+        if not self.arquivo_morto.arquivado(data_registro):
+            return False
+        _exibir_erro(f"O dia {pd.Timestamp(data_registro):%d/%m/%Y} está no arquivo morto e não pode ser alterado.")
+        return True
+    
+    def _iniciar_historico(self, carregar):
+        """
+        Grava o ponto de verificação inicial do histórico na primeira alteração.
+        
+        Args:
+            carregar (callable): Retorna os registros antes da alteração
+        """
+        try:
+            if not self.historico.iniciado():
+                self.historico.iniciar(carregar())
+        except Exception as e:
+            print(f"Erro ao iniciar histórico de alterações: {e}")
+    
+    def _registrar_historico(self, data_registro, antes, depois, autor=None):
+        """
+        Acrescenta uma alteração ao histórico. Falhas aqui não desfazem a gravação.
+        """
+        try:
+            self.historico.registrar(data_registro, antes, depois, autor)
+        except Exception as e:
+            print(f"Erro ao registrar histórico de alterações: {e}")
+    
+    def dados_em(self, momento):
+        """
+        Reconstrói os registros como estavam em um momento passado (ver historico.py).
+        
+        Args:
+            momento (datetime): Momento desejado
+            
+        Returns:
+            pd.DataFrame: Registros naquele momento
+        """
+        return self.historico.dados_em(momento)
+    
+    @_exclusivo
+    def invalidar_derivados(self):
+        """
+        Descarta a previsão e a pirâmide persistidas, para cargas que gravam
+        fora do DataManager; ambas são reconstruídas na próxima leitura.
+        """
+        for sufixo in ('previsao.json', 'piramide.json'):
+            try:
+                os.remove(self.caminho_auxiliar(sufixo))
+            except FileNotFoundError:
+                pass
+        self._previsao = None
+        self._piramide = None
+    
+    @_exclusivo
+    def _verificar_derivados(self, versao=None):
+        """
+        Outros processos (e edições da planilha fora do app) também alteram
+        os dados: descarta as estruturas derivadas em memória quando a versão
+        dos dados mudou, para que sejam relidas do disco. As que continuarem
+        de outra versão são reconstruídas em sincronizar_derivados.
+        
+        Args:
+            versao (str): Versão atual, se já conhecida
+        """
+        versao = versao or self.versao_atual()
+        if versao != self._versao_derivados:
+            self._previsao = None
+            self._piramide = None
+            self._versao_derivados = versao
+    
+    @_exclusivo
+    def _atualizar_derivados(self, data_registro, valores, versoes):
+        """
+        Propaga um registro gravado (ou excluído, se valores for None) às
+        estruturas derivadas que estavam na versão em que a gravação se
+        baseou; as demais já estavam desatualizadas e são reconstruídas na
+        próxima sincronização. Falhas aqui não desfazem a gravação: a
+        estrutura fica desatualizada e é reconstruída na próxima leitura.
+        
+        Args:
+            data_registro (date): Data do registro
+            valores (dict): Valores dos contadores, ou None para exclusão
+            versoes (tuple): (versão dos dados antes da gravação, versão gravada)
+        """
+        anterior, gravada = versoes
+        # Quem chama já gravou: a versão a conferir é a anterior à gravação
+        self._verificar_derivados(anterior)
+        for derivado in (self._carregar_previsao(), self._carregar_piramide()):
+            if derivado.versao != anterior:
+                continue
+            try:
+                derivado.versao = gravada
+                if valores is None:
+                    derivado.remover_dia(data_registro)
+                else:
+                    derivado.atualizar_dia(data_registro, valores)
+            except Exception as e:
+                print(f"Erro ao atualizar {type(derivado).__name__}: {e}")
+        self._versao_derivados = gravada
+    
+    @_exclusivo
+    def sincronizar_derivados(self):
+        """
+        Reconstrói a previsão e a pirâmide que não correspondem à versão
+        atual dos dados (ex.: primeira execução ou planilha editada à mão).
+        
+        Returns:
+            tuple: (ModeloEWMA, PiramideTemporal) da versão atual
+        """
+        versao, df = self._carregar_com_versao()
+        self._verificar_derivados(versao)
+        previsao, piramide = self.previsao, self.piramide
+        for derivado in (previsao, piramide):
+            derivado.sincronizar(df, versao)
+        return previsao, piramide
+    
+    @_exclusivo
     def inicializar_arquivo(self):
         """
-        Inicializa o arquivo Excel se ele não existir.
+        Inicializa o arquivo Excel se ele não existir e aplica as migrações de
+        esquema pendentes (ver esquema.py). Com o esquema em dia, apenas a
+        versão guardada é lida, sem abrir os dados.
         """
-        if not os.path.exists(self.arquivo_excel):
+        from esquema import VERSAO_ESQUEMA
+        
+        if self.sqlite is not None and self.sqlite.novo:
+            with self.sqlite.conexao() as con:
+                self.sqlite.definir_versao_esquema(con, VERSAO_ESQUEMA)
+            return
+        
+        if self.sqlite is None and not os.path.exists(self.arquivo_excel):
             # Criar DataFrame vazio com as colunas necessárias
-            df_inicial = pd.DataFrame(columns=[
-                'data', 'tickets_iniciados', 'tickets_finalizados', 'tickets_andamento', 'links_chamados'
-            ])
+            df_inicial = pd.DataFrame(columns=COLUNAS)
             
             # Salvar no arquivo Excel
             try:
                 df_inicial.to_excel(self.arquivo_excel, index=False)
+                self._salvar_versao_esquema(VERSAO_ESQUEMA)
                 print(f"Arquivo {self.arquivo_excel} criado com sucesso.")
             except Exception as e:
-                st.error(f"Erro ao criar arquivo Excel: {e}")
-        else:
-            # Verificar se a coluna links_chamados existe, se não, adicionar
-            try:
-                df = pd.read_excel(self.arquivo_excel)
-                if 'links_chamados' not in df.columns:
-                    df['links_chamados'] = ''
-                    df.to_excel(self.arquivo_excel, index=False)
-                    print("Coluna 'links_chamados' adicionada ao arquivo existente.")
-            except Exception as e:
-                print(f"Erro ao verificar/atualizar arquivo Excel: {e}")
+                _exibir_erro(f"Erro ao criar arquivo Excel: {e}")
+            return
+        
+        try:
+            if self.versao_esquema() < VERSAO_ESQUEMA:
+                self._migrar_esquema()
+        except Exception as e:
+            print(f"Erro ao migrar o esquema dos dados: {e}")
+    
+    def versao_esquema(self):
+        """
+        Versão do esquema guardada com os dados, lida sem carregá-los.
+        
+        Returns:
+            int: Versão do esquema (0 para arquivos anteriores ao versionamento)
+        """
+        if self.sqlite is not None:
+            return self.sqlite.versao_esquema()
+        
+        try:
+            with open(self.caminho_auxiliar('esquema.json'), encoding='utf-8') as arquivo:
+                return int(json.load(arquivo)['versao'])
+        except (OSError, ValueError, KeyError):
+            return 0
+    
+    def _salvar_versao_esquema(self, versao):
+        gravar_atomico(self.caminho_auxiliar('esquema.json'), json.dumps({'versao': versao}))
     
+    def _migrar_esquema(self):
+        """
+        Aplica as migrações pendentes à tabela completa e grava a nova versão.
+        Roda uma única vez por mudança de versão.
+        """
+        import esquema
+        
+        if self.sqlite is not None:
+            with self.sqlite.transacao() as con:
+                # Reler a versão sob o bloqueio: outro processo pode ter migrado antes
+                versao = self.sqlite.versao_esquema(con)
+                if versao >= esquema.VERSAO_ESQUEMA:
+                    return
+                df = esquema.aplicar(pd.read_sql_query("SELECT * FROM registros", con), versao)
+                self.sqlite.substituir(con, df)
+                self.sqlite.definir_versao_esquema(con, esquema.VERSAO_ESQUEMA)
+            return
+        
+        df = esquema.aplicar(pd.read_excel(self.arquivo_excel), self.versao_esquema())
+        # Gravação atômica, com o snapshot republicado na versão migrada
+        self._gravar(self._com_arquivo_morto(self._normalizar(df)))
+        self._salvar_versao_esquema(esquema.VERSAO_ESQUEMA)
+    
+    def ler_colunas(self):
+        """
+        Lê apenas a linha de cabeçalho do arquivo Excel, sem carregar os dados.
+        
+        Returns:
+            list: Nomes das colunas presentes no arquivo
+        """
+        if self.sqlite is not None:
+            return self.sqlite.colunas()
+        
+        from openpyxl import load_workbook
+        
+        wb = load_workbook(self.arquivo_excel, read_only=True)
+        try:
+            cabecalho = next(wb.active.iter_rows(max_row=1, values_only=True), ())
+        finally:
+            wb.close()
+        
+        return [coluna for coluna in cabecalho if coluna is not None]
+    
+    @medir_operacao('carregar_dados')
     def carregar_dados(self):
         """
         Carrega os dados do arquivo Excel.
@@ -49,31 +537,205 @@ class DataManager:
             pd.DataFrame: DataFrame com os dados carregados
         """
         try:
-            if os.path.exists(self.arquivo_excel):
-                df = pd.read_excel(self.arquivo_excel)
-                
-                # Garantir que a coluna data seja do tipo datetime
-                if not df.empty and 'data' in df.columns:
-                    df['data'] = pd.to_datetime(df['data'])
-                    # Ordenar por data
-                    df = df.sort_values('data').reset_index(drop=True)
-                
-                # Garantir que a coluna links_chamados existe
-                if 'links_chamados' not in df.columns:
-                    df['links_chamados'] = ''
-                
-                return df
-            else:
-                return pd.DataFrame(columns=[
-                    'data', 'tickets_iniciados', 'tickets_finalizados', 'tickets_andamento', 'links_chamados'
-                ])
+            df = self._carregar_com_versao()[1]
+            REGISTROS.definir(len(df), arquivo=os.path.basename(self.arquivo_excel))
+            return df
         except Exception as e:
-            st.error(f"Erro ao carregar dados: {e}")
+            OPERACAO_FALHAS.incrementar(operacao='carregar_dados')
+            _exibir_erro(f"Erro ao carregar dados: {e}")
             return pd.DataFrame(columns=[
                 'data', 'tickets_iniciados', 'tickets_finalizados', 'tickets_andamento'
             ])
     
-    def adicionar_registro(self, data_registro, tickets_iniciados, tickets_finalizados, tickets_andamento, links_chamados=""):
+    def _carregar_com_versao(self, atualizada=False):
+        """
+        Carrega os dados junto com a versão a que eles correspondem.
+        
+        Args:
+            atualizada (bool): Consultar a versão no armazenamento mesmo com o
+                notificador ativo (para ler, alterar e regravar os dados)
+        
+        Returns:
+            tuple: (versão dos dados, DataFrame com os dados)
+        """
+        if self.sqlite is None and not os.path.exists(self.arquivo_excel):
+            return None, pd.DataFrame(columns=COLUNAS)
+        
+        if not self.usar_snapshot:
+            return self._ler_completo()
+        
+        import snapshot_arrow
+        
+        # Servir do snapshot mapeado em memória se ele for da versão atual
+        versao = self.versao_dados() if atualizada else self.versao_atual()
+        tabela = snapshot_arrow.ler(self.caminho_auxiliar('snapshot.arrow'), versao)
+        CACHE_CONSULTAS.incrementar(cache='snapshot', resultado='acerto' if tabela is not None else 'falha')
+        if tabela is not None:
+            return versao, snapshot_arrow.para_dataframe(tabela)
+        
+        # Dados alterados por outro processo ou fora do DataManager:
+        # ler e republicar o snapshot
+        versao, df = self._ler_completo()
+        self._publicar_snapshot(df, versao)
+        return versao, df
+    
+    def _ler_completo(self):
+        """
+        Lê todos os registros do armazenamento.
+        
+        Returns:
+            tuple: (versão dos dados lidos, DataFrame normalizado)
+        """
+        if self.sqlite is not None:
+            versao, df = self.sqlite.ler()
+            return self._versao_com_arquivo_morto(versao), self._com_arquivo_morto(self._normalizar(df))
+        
+        versao = self.versao_dados()
+        return versao, self._com_arquivo_morto(self._normalizar(pd.read_excel(self.arquivo_excel)))
+    
+    def _publicar_snapshot(self, df, versao):
+        """
+        Publica o snapshot Arrow dos dados para os demais processos.
+        
+        Args:
+            df (pd.DataFrame): Dados normalizados recém-gravados ou lidos
+            versao (str): Versão dos dados que df contém (a do arquivo gravado
+                ou lido, nunca consultada depois: outro processo pode ter
+                gravado nesse meio-tempo)
+        """
+        if not self.usar_snapshot:
+            return
+        try:
+            import snapshot_arrow
+            snapshot_arrow.publicar(df, self.caminho_auxiliar('snapshot.arrow'), versao)
+        except Exception as e:
+            print(f"Erro ao publicar snapshot Arrow: {e}")
+    
+    def _gravar(self, df):
+        """
+        Grava o DataFrame completo no arquivo Excel e publica o novo snapshot.
+        Os dias do arquivo morto ficam fora da planilha.
+        
+        Args:
+            df (pd.DataFrame): Dados normalizados e ordenados por data
+            
+        Returns:
+            str: Versão do arquivo gravado
+        """
+        limite = self.arquivo_morto.limite()
+        recentes = df if limite is None or df.empty else df[df['data'] >= limite]
+        # Grava em um arquivo temporário e renomeia: outros processos nunca
+        # leem uma planilha escrita pela metade
+        with gravacao_atomica(self.arquivo_excel, manter_extensao=True) as temporario:
+            recentes.to_excel(temporario, index=False, engine='openpyxl')
+            # Versão do arquivo que este processo gravou (o rename preserva data e
+            # tamanho), e não a de quem gravar logo depois
+            versao = self._versao_planilha(os.stat(temporario))
+        self._publicar_snapshot(df, versao)
+        self._notificar_gravacao()
+        return versao
+    
+    def _normalizar(self, df, ordenar=True):
+        """
+        Ajusta tipos e ordem de um DataFrame lido do arquivo.
+        
+        Args:
+            df (pd.DataFrame): Dados como lidos do arquivo
+            ordenar (bool): Ordenar por data (False mantém a ordem lida)
+            
+        Returns:
+            pd.DataFrame: Dados com 'data' em datetime, ordenados, e links como texto
+        """
+        # Garantir que a coluna data seja do tipo datetime
+        if not df.empty and 'data' in df.columns:
+            df['data'] = pd.to_datetime(df['data'])
+            # Ordenar por data
+            if ordenar:
+                df = df.sort_values('data').reset_index(drop=True)
+        
+        # Links como texto (células vazias são lidas como NaN). As migrações de
+        # esquema garantem a coluna; a verificação cobre leituras de arquivos
+        # ainda não migrados
+        if 'links_chamados' not in df.columns:
+            df['links_chamados'] = ''
+        df['links_chamados'] = df['links_chamados'].fillna('').astype(str)
+        
+        return df
+    
+    def consultar(self, filtro=None):
+        """
+        Carrega apenas os registros aceitos por um filtro (ver filtros.py).
+        
+        As restrições simples do filtro (intervalo de datas, comparações em
+        colunas) são aplicadas linha a linha durante a leitura, de modo que as
+        linhas descartadas nunca chegam a compor o DataFrame; a máscara
+        vetorizada completa é aplicada em seguida. Na planilha com snapshot
+        ativo, filtrar o snapshot em memória sai mais barato que reler o
+        arquivo linha a linha, e é isso que é feito.
+        
+        Args:
+            filtro (Filtro): Expressão de filtro (opcional)
+            
+        Returns:
+            pd.DataFrame: Registros filtrados, ordenados por data
+        """
+        from filtros import aplicar_filtro
+        
+        restricoes = filtro.restricoes() if filtro is not None else []
+        if not restricoes or (self.sqlite is None and (self.usar_snapshot or not os.path.exists(self.arquivo_excel))):
+            return aplicar_filtro(self.carregar_dados(), filtro)
+        
+        try:
+            return aplicar_filtro(self._ler_com_restricoes(restricoes), filtro)
+        except Exception as e:
+            _exibir_erro(f"Erro ao consultar dados: {e}")
+            return pd.DataFrame(columns=COLUNAS)
+    
+    def _ler_com_restricoes(self, restricoes):
+        """
+        Lê o arquivo em modo streaming mantendo só as linhas que satisfazem as restrições.
+        
+        Args:
+            restricoes (list): Tuplas (coluna, operador, valor)
+            
+        Returns:
+            pd.DataFrame: Linhas aceitas, normalizadas
+        """
+        if self.sqlite is not None:
+            # As restrições viram a cláusula WHERE da consulta
+            return self._com_arquivo_morto(self._normalizar(self.sqlite.ler(restricoes)[1]), restricoes)
+        
+        from openpyxl import load_workbook
+        from filtros import OPERADORES
+        
+        wb = load_workbook(self.arquivo_excel, read_only=True, data_only=True)
+        try:
+            linhas = wb.active.iter_rows(values_only=True)
+            cabecalho = [coluna for coluna in next(linhas, ()) if coluna is not None]
+            testes = [
+                (cabecalho.index(coluna), OPERADORES[operador], valor)
+                for coluna, operador, valor in restricoes if coluna in cabecalho
+            ]
+            
+            aceitas = []
+            for linha in linhas:
+                linha = linha[:len(cabecalho)]
+                if all(celula is None for celula in linha):
+                    continue
+                try:
+                    if all(comparar(linha[posicao], valor) for posicao, comparar, valor in testes):
+                        aceitas.append(linha)
+                except TypeError:
+                    # Célula vazia ou de tipo incompatível não satisfaz a restrição
+                    continue
+        finally:
+            wb.close()
+        
+        return self._com_arquivo_morto(self._normalizar(pd.DataFrame(aceitas, columns=cabecalho)), restricoes)
+    
+    @medir_operacao('adicionar_registro')
+    @_exclusivo
+    def adicionar_registro(self, data_registro, tickets_iniciados, tickets_finalizados, tickets_andamento, links_chamados="", autor=None):
         """
         Adiciona um novo registro de tickets.
         
@@ -83,19 +745,34 @@ class DataManager:
             tickets_finalizados (int): Número de tickets finalizados
             tickets_andamento (int): Número de tickets em andamento
             links_chamados (str): Links dos chamados abertos (opcional)
+            autor (str): Autor registrado no histórico de alterações (opcional)
             
         Returns:
             bool: True se o registro foi adicionado com sucesso, False caso contrário
         """
         try:
-            # Carregar dados existentes
-            df = self.carregar_dados()
+            if self._rejeitar_arquivado(data_registro):
+                return False
+            valores = {
+                'tickets_iniciados': tickets_iniciados,
+                'tickets_finalizados': tickets_finalizados,
+                'tickets_andamento': tickets_andamento
+            }
+            if self.sqlite is not None:
+                return self._gravar_dia_sqlite(data_registro, valores, links_chamados, autor)
+            
+            # Carregar dados existentes (cópia gravável: o snapshot é somente leitura)
+            versao_anterior, df = self._carregar_com_versao(atualizada=True)
+            df = df.copy()
+            self._iniciar_historico(lambda: df)
             
             # Verificar se já existe um registro para esta data
             data_registro_str = pd.to_datetime(data_registro)
+            anterior = None
             
             if not df.empty and 'data' in df.columns:
                 if data_registro_str in df['data'].values:
+                    anterior = df.loc[df['data'] == data_registro_str].iloc[0].to_dict()
                     # Atualizar registro existente
                     mask = df['data'] == data_registro_str
                     df.loc[mask, 'tickets_iniciados'] = tickets_iniciados
@@ -126,49 +803,184 @@ class DataManager:
             df = df.sort_values('data').reset_index(drop=True)
             
             # Salvar no arquivo Excel com flush para garantir escrita
-            df.to_excel(self.arquivo_excel, index=False)
+            versao = self._gravar(df)
             
             # Força a escrita no disco
             import time
             time.sleep(0.1)  # Pequena pausa para garantir que a escrita seja concluída
             
+            self._registrar_historico(
+                data_registro_str.date(), anterior, {**valores, 'links_chamados': links_chamados}, autor
+            )
+            
+            # Atualizar previsão e pirâmide temporal sem reler o histórico
+            self._atualizar_derivados(data_registro_str.date(), valores, (versao_anterior, versao))
+            
             return True
             
         except Exception as e:
-            st.error(f"Erro ao adicionar registro: {e}")
+            _exibir_erro(f"Erro ao adicionar registro: {e}")
             return False
     
-    def obter_estatisticas(self):
+    def obter_pagina(self, pagina=1, tamanho=50, ordenar_por='data', decrescente=False, filtro=None):
         """
-        Calcula estatísticas básicas dos dados.
+        Retorna apenas uma página dos registros, ordenada no servidor.
+        
+        Sem filtro e sem arquivo morto, no SQLite a página vem direto do banco (ORDER BY pelos
+        índices, LIMIT/OFFSET). Com filtro, os registros vêm de consultar(),
+        que aplica as restrições simples já na leitura. Sem filtro, os dados
+        do snapshot em memória já estão ordenados por data, e a ordem pelas
+        demais colunas é calculada uma vez por versão dos dados e reutilizada
+        entre páginas e sessões.
         
+        Args:
+            pagina (int): Número da página, a partir de 1
+            tamanho (int): Registros por página
+            ordenar_por (str): Coluna de ordenação (uma de COLUNAS_ORDENAVEIS)
+            decrescente (bool): Ordem decrescente
+            filtro (Filtro): Expressão de filtro (opcional)
+            
         Returns:
-            dict: Dicionário com estatísticas
+            tuple: (DataFrame com os registros da página, total de registros)
         """
-        df = self.carregar_dados()
+        if ordenar_por not in COLUNAS_ORDENAVEIS:
+            raise ValueError(f"Coluna de ordenação inválida: {ordenar_por}")
+        inicio = max(pagina - 1, 0) * tamanho
         
-        if df.empty:
-            return {
-                'total_registros': 0,
-                'periodo_inicio': None,
-                'periodo_fim': None,
-                'media_iniciados': 0,
-                'media_finalizados': 0,
-                'media_andamento': 0,
-                'total_iniciados': 0,
-                'total_finalizados': 0
-            }
+        if self.sqlite is not None and filtro is None and self.arquivo_morto.limite() is None:
+            df, total = self.sqlite.pagina(ordenar_por, decrescente, tamanho, inicio)
+            return self._normalizar(df, ordenar=False), total
         
-        return {
-            'total_registros': len(df),
-            'periodo_inicio': df['data'].min(),
-            'periodo_fim': df['data'].max(),
-            'media_iniciados': df['tickets_iniciados'].mean(),
-            'media_finalizados': df['tickets_finalizados'].mean(),
-            'media_andamento': df['tickets_andamento'].mean(),
-            'total_iniciados': df['tickets_iniciados'].sum(),
-            'total_finalizados': df['tickets_finalizados'].sum()
-        }
+        if filtro is not None:
+            df, chave = self.consultar(filtro), None
+        else:
+            versao, df = self._carregar_com_versao()
+            chave = (self.arquivo_excel, versao) if versao else None
+        
+        ordem = _ordenacao(df, ordenar_por, chave)
+        if decrescente:
+            ordem = ordem[::-1]
+        return df.iloc[ordem[inicio:inicio + tamanho]], len(df)
+    
+    @_exclusivo
+    def _gravar_dia_sqlite(self, data_registro, valores=None, links_chamados="", autor=None):
+        """
+        Grava (ou exclui, se valores for None) um dia no armazenamento SQLite.
+        
+        Só a linha do dia é alterada, sem ler nem reescrever o restante dos
+        dados, de modo que gravações simultâneas de vários processos nunca se
+        sobrescrevem. As estruturas derivadas são atualizadas ainda sob o
+        bloqueio de escrita, a partir do estado salvo em disco pelo último
+        processo que gravou.
+        
+        Args:
+            data_registro (date): Data do registro
+            valores (dict): Valores dos contadores, ou None para exclusão
+            links_chamados (str): Links dos chamados
+            autor (str): Autor registrado no histórico de alterações
+            
+        Returns:
+            bool: True se a gravação foi concluída
+        """
+        data_registro = pd.to_datetime(data_registro).date()
+        with self.sqlite.transacao() as con:
+            self._iniciar_historico(lambda: self._normalizar(pd.read_sql_query("SELECT * FROM registros", con)))
+            anterior = self.sqlite.ler_dia(con, data_registro)
+            if valores is None:
+                self.sqlite.excluir_dia(con, data_registro)
+            else:
+                self.sqlite.gravar_dia(con, data_registro, valores, links_chamados)
+            
+            # Com o bloqueio obtido, nenhum outro processo grava até o COMMIT:
+            # verificar a versão uma vez, pela própria conexão da transação
+            versoes = (
+                self._versao_com_arquivo_morto(self.sqlite.versao(con)),
+                self._versao_com_arquivo_morto(self.sqlite.versao(con, proxima=True))
+            )
+            self._atualizar_derivados(data_registro, valores, versoes)
+        
+        # O histórico só recebe a alteração depois do COMMIT
+        self._registrar_historico_lote([(data_registro, valores, links_chamados)], {data_registro: anterior}, autor)
+        self._notificar_gravacao()
+        return True
+    
+    def versao_dados(self):
+        """
+        Retorna um identificador da versão atual dos dados, sem lê-los.
+        Muda sempre que o arquivo é regravado.
+        
+        Returns:
+            str: Versão dos dados ou None se o arquivo não existir
+        """
+        if self.sqlite is not None:
+            return self._versao_com_arquivo_morto(self.sqlite.versao())
+        
+        try:
+            info = os.stat(self.arquivo_excel)
+        except FileNotFoundError:
+            return None
+        
+        return self._versao_planilha(info)
+    
+    def _versao_planilha(self, info):
+        """
+        Args:
+            info (os.stat_result): Estado da planilha
+            
+        Returns:
+            str: Versão dos dados com a planilha nesse estado
+        """
+        return self._versao_com_arquivo_morto(f"{info.st_mtime_ns:x}-{info.st_size:x}")
+    
+    def versao_atual(self):
+        """
+        Versão dos dados para leitura: com o notificador ativo, a versão
+        mantida em memória por ele, sem consultar o armazenamento a cada
+        execução; sem ele, a de versao_dados.
+        
+        Returns:
+            str: Versão dos dados ou None se o arquivo não existir
+        """
+        if self._notificador is not None and self._notificador.ativo:
+            return self._notificador.versao
+        return self.versao_dados()
+    
+    def observar_alteracoes(self):
+        """
+        Passa a acompanhar as alterações dos dados pelo notificador do
+        processo (ver notificacoes.py), iniciado na primeira chamada.
+        
+        Returns:
+            Notificador: Notificador compartilhado deste arquivo de dados
+        """
+        from notificacoes import notificador_para
+        self._notificador = notificador_para(self)
+        return self._notificador
+    
+    def _notificar_gravacao(self):
+        """
+        Publica a versão recém-gravada para as sessões deste processo.
+        Falhas aqui não desfazem a gravação.
+        """
+        try:
+            from notificacoes import publicar_gravacao
+            publicar_gravacao(self)
+        except Exception as e:
+            print(f"Erro ao publicar alteração dos dados: {e}")
+    
+    def obter_estatisticas(self, df=None):
+        """
+        Calcula estatísticas básicas dos dados.
+        
+        Args:
+            df (pd.DataFrame): Dados já carregados (opcional, evita nova leitura)
+        
+        Returns:
+            dict: Dicionário com estatísticas
+        """
+        if df is None:
+            df = self.carregar_dados()
+        return calcular_estatisticas(df)
     
     def filtrar_dados(self, data_inicio=None, data_fim=None):
         """
@@ -194,36 +1006,167 @@ class DataManager:
         
         return df
     
-    def excluir_registro(self, data_registro):
+    @medir_operacao('excluir_registro')
+    @_exclusivo
+    def excluir_registro(self, data_registro, autor=None):
         """
         Exclui um registro específico.
         
         Args:
             data_registro (date): Data do registro a ser excluído
+            autor (str): Autor registrado no histórico de alterações (opcional)
             
         Returns:
             bool: True se o registro foi excluído com sucesso, False caso contrário
         """
         try:
-            df = self.carregar_dados()
+            if self._rejeitar_arquivado(data_registro):
+                return False
+            if self.sqlite is not None:
+                return self._gravar_dia_sqlite(data_registro, autor=autor)
+            
+            versao_anterior, df = self._carregar_com_versao(atualizada=True)
             
             if df.empty:
                 return False
             
+            self._iniciar_historico(lambda: df)
             data_registro_str = pd.to_datetime(data_registro)
+            removidos = df[df['data'] == data_registro_str]
             
             # Remover o registro
             df = df[df['data'] != data_registro_str]
             
             # Salvar no arquivo Excel
-            df.to_excel(self.arquivo_excel, index=False)
+            versao = self._gravar(df)
+            
+            if not removidos.empty:
+                self._registrar_historico(data_registro_str.date(), removidos.iloc[0].to_dict(), None, autor)
+            
+            self._atualizar_derivados(data_registro_str.date(), None, (versao_anterior, versao))
             
             return True
             
         except Exception as e:
-            st.error(f"Erro ao excluir registro: {e}")
+            _exibir_erro(f"Erro ao excluir registro: {e}")
+            return False
+    
+    @medir_operacao('aplicar_lote')
+    @_exclusivo
+    def aplicar_lote(self, gravar=None, excluir=(), autor=None):
+        """
+        Grava e exclui vários dias em uma única gravação: uma transação no
+        SQLite ou uma única regravação da planilha, em vez de uma por dia.
+        Com mais de um dia alterado, a previsão e a pirâmide são descartadas
+        e reconstruídas na próxima leitura, em vez de atualizadas dia a dia.
+        
+        Args:
+            gravar (pd.DataFrame): Registros a gravar ou substituir, com as
+                colunas de COLUNAS (links_chamados opcional), já validados e
+                sem datas repetidas
+            excluir (list): Datas dos registros a excluir
+            autor (str): Autor registrado no histórico de alterações (opcional)
+        
+        Returns:
+            bool: True se o lote foi gravado, False caso contrário (inclusive
+            com datas repetidas em gravar: nada é gravado)
+        """
+        try:
+            if gravar is None:
+                gravar = pd.DataFrame(columns=COLUNAS)
+            gravar = gravar.assign(
+                data=pd.to_datetime(gravar['data']).dt.normalize(),
+                links_chamados=gravar.get('links_chamados', pd.Series('', index=gravar.index)).fillna('').astype(str)
+            )[COLUNAS].astype({contador: 'int64' for contador in CONTADORES})
+            repetidas = gravar['data'][gravar['data'].duplicated()].drop_duplicates()
+            if not repetidas.empty:
+                raise ValueError(f"datas repetidas no lote: {', '.join(repetidas.dt.strftime('%d/%m/%Y'))}")
+            excluir = sorted({pd.Timestamp(dia).normalize() for dia in excluir} - set(gravar['data']))
+            if gravar.empty and not excluir:
+                return True
+            if any(self._rejeitar_arquivado(dia) for dia in [*gravar['data'], *excluir]):
+                return False
+            
+            registros = [
+                (linha['data'].date(), {contador: int(linha[contador]) for contador in CONTADORES}, linha['links_chamados'])
+                for linha in gravar.to_dict('records')
+            ] + [(dia.date(), None, "") for dia in excluir]
+            
+            if self.sqlite is not None:
+                anteriores = {}
+                with self.sqlite.transacao() as con:
+                    self._iniciar_historico(lambda: self._normalizar(pd.read_sql_query("SELECT * FROM registros", con)))
+                    for data_registro, valores, links_chamados in registros:
+                        anteriores[data_registro] = self.sqlite.ler_dia(con, data_registro)
+                        if valores is None:
+                            self.sqlite.excluir_dia(con, data_registro)
+                        else:
+                            self.sqlite.gravar_dia(con, data_registro, valores, links_chamados)
+                    versoes = (
+                        self._versao_com_arquivo_morto(self.sqlite.versao(con)),
+                        self._versao_com_arquivo_morto(self.sqlite.versao(con, proxima=True))
+                    )
+                    self._atualizar_derivados_lote(registros, versoes)
+                # O histórico só recebe as alterações depois do COMMIT
+                self._registrar_historico_lote(registros, anteriores, autor)
+                self._notificar_gravacao()
+                return True
+            
+            versao_anterior, df = self._carregar_com_versao(atualizada=True)
+            self._iniciar_historico(lambda: df)
+            alteradas = set(gravar['data']) | set(excluir)
+            anteriores = {
+                linha['data'].date(): linha for linha in df[df['data'].isin(alteradas)].to_dict('records')
+            } if not df.empty else {}
+            
+            df = pd.concat(
+                [df[~df['data'].isin(alteradas)] if not df.empty else df, gravar], ignore_index=True
+            ).sort_values('data').reset_index(drop=True)
+            versao = self._gravar(df)
+            
+            self._registrar_historico_lote(registros, anteriores, autor)
+            self._atualizar_derivados_lote(registros, (versao_anterior, versao))
+            
+            return True
+        
+        except Exception as e:
+            _exibir_erro(f"Erro ao gravar alterações em lote: {e}")
             return False
     
+    def _registrar_historico_lote(self, registros, anteriores, autor):
+        """
+        Acrescenta ao histórico as alterações de um lote já gravado.
+        
+        Args:
+            registros (list): (data, valores ou None para exclusão, links)
+            anteriores (dict): data -> registro antes do lote (ausente se novo)
+            autor (str): Autor das alterações
+        """
+        for data_registro, valores, links_chamados in registros:
+            anterior = anteriores.get(data_registro)
+            if valores is None:
+                if anterior is not None:
+                    self._registrar_historico(data_registro, anterior, None, autor)
+            else:
+                self._registrar_historico(
+                    data_registro, anterior, {**valores, 'links_chamados': links_chamados}, autor
+                )
+    
+    def _atualizar_derivados_lote(self, registros, versoes):
+        """
+        Propaga os registros de um lote às estruturas derivadas: um dia é
+        atualizado incrementalmente; vários, descartados de uma vez.
+        
+        Args:
+            registros (list): (data, valores ou None para exclusão, links)
+            versoes (tuple): Ver _atualizar_derivados
+        """
+        if len(registros) == 1:
+            data_registro, valores, _ = registros[0]
+            self._atualizar_derivados(data_registro, valores, versoes)
+        else:
+            self.invalidar_derivados()
+
     def exportar_csv(self, nome_arquivo=None):
         """
         Exporta os dados para um arquivo CSV.
@@ -248,10 +1191,14 @@ class DataManager:
         
         return df_export.to_csv(index=False)
     
-    def backup_dados(self):
+    def backup_dados(self, diretorio=None):
         """
         Cria um backup dos dados com timestamp.
         
+        Args:
+            diretorio (str): Diretório do backup, criado se não existir
+                (padrão: diretório atual)
+        
         Returns:
             bool: True se o backup foi criado com sucesso, False caso contrário
         """
@@ -259,6 +1206,9 @@ class DataManager:
             if os.path.exists(self.arquivo_excel):
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 nome_backup = f"backup_dados_tickets_{timestamp}.xlsx"
+                if diretorio:
+                    os.makedirs(diretorio, exist_ok=True)
+                    nome_backup = os.path.join(diretorio, nome_backup)
                 
                 df = self.carregar_dados()
                 df.to_excel(nome_backup, index=False)
@@ -267,5 +1217,25 @@ class DataManager:
             return False
             
         except Exception as e:
-            st.error(f"Erro ao criar backup: {e}")
+            _exibir_erro(f"Erro ao criar backup: {e}")
             return False
+
+
+def gerenciador_para(arquivo_excel):
+    """
+    DataManager do arquivo de dados, criado uma vez por processo e
+    compartilhado por todas as sessões: a preparação do armazenamento (e o
+    pool de conexões, no SQLite) não se repete a cada execução do script.
+    
+    Args:
+        arquivo_excel (str): Arquivo de dados
+        
+    Returns:
+        DataManager: Gerenciador compartilhado do arquivo
+    """
+    chave = os.path.abspath(arquivo_excel)
+    with _lock_gerenciadores:
+        gerenciador = _gerenciadores.get(chave)
+        if gerenciador is None:
+            gerenciador = _gerenciadores[chave] = DataManager(arquivo_excel)
+    return gerenciador
@@ -0,0 +1,81 @@
+"""
+Versão do esquema dos dados e registro ordenado de migrações.
+
+A versão do esquema fica guardada junto aos dados (arquivo <dados>_esquema.json
+ao lado da planilha, ou PRAGMA user_version no SQLite) e é lida sem tocar nos
+registros. As migrações pendentes rodam uma única vez, quando a versão
+guardada é menor que VERSAO_ESQUEMA; depois disso construir o DataManager e
+carregar os dados não fazem nenhuma verificação de esquema.
+
+Para alterar o esquema, registre uma nova migração com a próxima versão:
+
+    @migracao(2, "Adiciona a coluna equipe")
+    def _adicionar_equipe(df):
+        df['equipe'] = ''
+        return df
+
+Cada migração recebe a tabela completa como DataFrame e devolve a tabela
+migrada. Migrações devem ser idempotentes: arquivos antigos, sem versão
+guardada, passam por todas elas.
+"""
+
+from collections import namedtuple
+
+Migracao = namedtuple('Migracao', ['versao', 'descricao', 'funcao'])
+
+# Migrações em ordem crescente de versão
+MIGRACOES = []
+
+
+def migracao(versao, descricao):
+    """
+    Registra uma função como a migração para a versão informada.
+
+    Args:
+        versao (int): Versão do esquema após a migração (maior que as anteriores)
+        descricao (str): Descrição exibida ao aplicar a migração
+    """
+    def registrar(funcao):
+        if MIGRACOES and versao <= MIGRACOES[-1].versao:
+            raise ValueError(f"Migração {versao} fora de ordem (última: {MIGRACOES[-1].versao})")
+        MIGRACOES.append(Migracao(versao, descricao, funcao))
+        return funcao
+    return registrar
+
+
+def pendentes(versao):
+    """
+    Args:
+        versao (int): Versão do esquema guardada com os dados
+
+    Returns:
+        list: Migrações ainda não aplicadas, em ordem
+    """
+    return [m for m in MIGRACOES if m.versao > versao]
+
+
+def aplicar(df, versao):
+    """
+    Aplica as migrações pendentes a uma tabela.
+
+    Args:
+        df (pd.DataFrame): Tabela completa na versão informada
+        versao (int): Versão do esquema da tabela
+
+    Returns:
+        pd.DataFrame: Tabela na versão VERSAO_ESQUEMA
+    """
+    for pendente in pendentes(versao):
+        print(f"Aplicando migração {pendente.versao}: {pendente.descricao}")
+        df = pendente.funcao(df)
+    return df
+
+
+@migracao(1, "Adiciona a coluna links_chamados")
+def _adicionar_links(df):
+    if 'links_chamados' not in df.columns:
+        df['links_chamados'] = ''
+    return df
+
+
+VERSAO_ESQUEMA = MIGRACOES[-1].versao
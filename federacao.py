@@ -0,0 +1,280 @@
+"""
+Leitura federada de vários arquivos de dados (um por escritório, por exemplo).
+
+Cada arquivo é lido por um processo do pool, que já devolve os registros
+consolidados por dia (só a data e os contadores); o processo principal soma os
+dias de todos os arquivos e calcula sobre essa série as mesmas estatísticas,
+KPIs e agregações por período do dashboard. A leitura das planilhas, que é a
+parte cara, fica em paralelo, e só séries pequenas trafegam entre processos.
+
+Uso pela linha de comando:
+    python federacao.py escritorios/ outro_escritorio.xlsx --processos 4
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from armazenamento_sqlite import EXTENSOES_SQLITE
+from data_manager import CONTADORES, calcular_estatisticas
+
+FEDERACAO_CONFIG = {
+    'processos': None    # Processos do pool (None = número de núcleos)
+}
+
+EXTENSOES_DADOS = ('.xlsx', *EXTENSOES_SQLITE)
+
+
+def _planilhas_migradas(banco):
+    """
+    Planilhas já passadas para um banco por migrar_xlsx.py, pelo progresso
+    que a migração guarda na tabela meta.
+
+    Args:
+        banco (str): Banco SQLite
+
+    Returns:
+        set: Caminhos absolutos das planilhas de origem
+    """
+    from migrar_xlsx import PREFIXO_PROGRESSO
+
+    try:
+        con = sqlite3.connect(f"file:{banco}?mode=ro", uri=True)
+        try:
+            chaves = con.execute(
+                "SELECT chave FROM meta WHERE substr(chave, 1, ?) = ?", (len(PREFIXO_PROGRESSO), PREFIXO_PROGRESSO)
+            ).fetchall()
+        finally:
+            con.close()
+    except sqlite3.Error:
+        return set()
+    return {chave[len(PREFIXO_PROGRESSO):] for chave, in chaves}
+
+
+def descobrir_arquivos(caminhos, incluir_backups=False):
+    """
+    Expande arquivos e diretórios nos arquivos de dados a ler.
+
+    Cada escritório entra com um único arquivo: depois da migração para o
+    SQLite, a planilha de mesmo nome ao lado do banco e as planilhas que o
+    banco registra como migradas (ver migrar_xlsx.py) são ignoradas, para
+    que os mesmos dias não sejam somados duas vezes.
+
+    Args:
+        caminhos (list): Arquivos de dados e/ou diretórios (não recursivo)
+        incluir_backups (bool): Incluir os arquivos backup_dados_tickets_*.xlsx
+
+    Returns:
+        list: Caminhos absolutos, sem repetições, em ordem
+    """
+    arquivos = set()
+    for caminho in caminhos:
+        if os.path.isdir(caminho):
+            candidatos = [os.path.join(caminho, nome) for nome in os.listdir(caminho)]
+        else:
+            candidatos = [caminho]
+        for candidato in candidatos:
+            nome = os.path.basename(candidato)
+            if (
+                not os.path.isfile(candidato)
+                or not nome.lower().endswith(EXTENSOES_DADOS)
+                or '.tmp.' in nome  # gravação em andamento (ver gravacao_atomica)
+                or (nome.startswith('backup_dados_tickets_') and not incluir_backups)
+            ):
+                continue
+            arquivos.add(os.path.abspath(candidato))
+
+    bancos = [arquivo for arquivo in arquivos if arquivo.lower().endswith(EXTENSOES_SQLITE)]
+    substituidas = {os.path.splitext(banco)[0] for banco in bancos}
+    migradas = set().union(*map(_planilhas_migradas, bancos))
+    return sorted(
+        arquivo for arquivo in arquivos
+        if arquivo.lower().endswith(EXTENSOES_SQLITE)
+        or (os.path.splitext(arquivo)[0] not in substituidas and arquivo not in migradas)
+    )
+
+
+def _ler_sem_alterar(arquivo):
+    """
+    Lê os registros de um arquivo de dados sem alterá-lo: nada é criado,
+    migrado ou publicado ao lado de arquivos de outros escritórios. As
+    migrações de esquema pendentes são aplicadas só à cópia em memória, e os
+    dias do arquivo morto, se houver, são incluídos.
+
+    Args:
+        arquivo (str): Arquivo de dados (planilha ou banco SQLite)
+
+    Returns:
+        pd.DataFrame: Registros com 'data' em datetime
+    """
+    import esquema
+    from arquivo_morto import ArquivoMorto
+
+    base = os.path.splitext(arquivo)[0]
+    if arquivo.lower().endswith(EXTENSOES_SQLITE):
+        con = sqlite3.connect(f"file:{arquivo}?mode=ro", uri=True)
+        try:
+            versao = con.execute("PRAGMA user_version").fetchone()[0]
+            df = pd.read_sql_query("SELECT * FROM registros", con)
+        finally:
+            con.close()
+    else:
+        try:
+            with open(f"{base}_esquema.json", encoding='utf-8') as arquivo_esquema:
+                versao = int(json.load(arquivo_esquema)['versao'])
+        except (OSError, ValueError, KeyError):
+            versao = 0
+        df = pd.read_excel(arquivo)
+
+    df = esquema.aplicar(df, versao)
+    df['data'] = pd.to_datetime(df['data'])
+
+    arquivo_morto = ArquivoMorto(f"{base}_arquivo_morto")
+    limite = arquivo_morto.limite()
+    if limite is not None:
+        df = pd.concat([arquivo_morto.ler(), df[df['data'] >= limite]], ignore_index=True)
+    return df
+
+
+def _preagregar(arquivo):
+    """
+    Lê um arquivo e o reduz à série diária dos contadores. Executada nos
+    processos do pool.
+
+    Args:
+        arquivo (str): Arquivo de dados
+
+    Returns:
+        tuple: (arquivo, DataFrame com 'data' e os contadores, um dia por linha)
+    """
+    df = _ler_sem_alterar(arquivo)
+    diario = df.groupby('data', as_index=False)[list(CONTADORES)].sum() if not df.empty else df[['data', *CONTADORES]]
+    return arquivo, diario
+
+
+class LeitorFederado:
+    """
+    Visão consolidada de vários arquivos de dados, somando os contadores de
+    todos os arquivos em cada dia.
+    """
+
+    def __init__(self, caminhos, processos=None, incluir_backups=False):
+        """
+        Args:
+            caminhos (list): Arquivos de dados e/ou diretórios
+            processos (int): Tamanho do pool (padrão: FEDERACAO_CONFIG; 1 lê em sequência)
+            incluir_backups (bool): Incluir os arquivos de backup dos diretórios
+        """
+        self.arquivos = descobrir_arquivos(caminhos, incluir_backups)
+        self.processos = processos or FEDERACAO_CONFIG['processos'] or os.cpu_count() or 1
+        self._parciais = None
+        self._dados = None
+
+    def carregar(self):
+        """
+        Lê todos os arquivos (em paralelo) e consolida os dias.
+
+        Returns:
+            pd.DataFrame: Um registro por dia com os contadores somados
+        """
+        processos = min(self.processos, len(self.arquivos))
+        if processos <= 1:
+            parciais = [_preagregar(arquivo) for arquivo in self.arquivos]
+        else:
+            # spawn: os processos filhos não herdam threads nem conexões abertas
+            contexto = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=processos, mp_context=contexto) as pool:
+                parciais = list(pool.map(_preagregar, self.arquivos))
+
+        self._parciais = dict(parciais)
+        series = [diario for diario in self._parciais.values() if not diario.empty]
+        if series:
+            self._dados = (
+                pd.concat(series, ignore_index=True)
+                .groupby('data', as_index=False)[list(CONTADORES)].sum()
+            )
+        else:
+            self._dados = pd.DataFrame(columns=['data', *CONTADORES])
+        return self._dados
+
+    def carregar_dados(self):
+        """
+        Returns:
+            pd.DataFrame: Dados consolidados (lidos na primeira chamada)
+        """
+        if self._dados is None:
+            self.carregar()
+        return self._dados
+
+    def obter_estatisticas(self):
+        """
+        Returns:
+            dict: Estatísticas de data_manager.calcular_estatisticas sobre os dados consolidados
+        """
+        return calcular_estatisticas(self.carregar_dados())
+
+    def calcular_kpis(self):
+        """
+        Returns:
+            dict: KPIs de utils.calcular_kpis sobre os dados consolidados
+        """
+        from utils import calcular_kpis
+        return calcular_kpis(self.carregar_dados())
+
+    def agregar(self, periodo='mes'):
+        """
+        Args:
+            periodo (str): Uma das chaves de utils.PERIODOS_AGREGACAO
+
+        Returns:
+            pd.DataFrame: Agregação por período dos dados consolidados
+        """
+        from utils import agregar_por_periodo
+        return agregar_por_periodo(self.carregar_dados(), periodo)
+
+    def por_arquivo(self):
+        """
+        Returns:
+            pd.DataFrame: Dias, período e totais de cada arquivo
+        """
+        self.carregar_dados()
+        return pd.DataFrame([
+            {
+                'arquivo': arquivo,
+                'dias': len(diario),
+                'periodo_inicio': diario['data'].min() if not diario.empty else None,
+                'periodo_fim': diario['data'].max() if not diario.empty else None,
+                **{f"total_{contador.removeprefix('tickets_')}": diario[contador].sum() for contador in CONTADORES}
+            }
+            for arquivo, diario in self._parciais.items()
+        ])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Estatísticas consolidadas de vários arquivos de dados")
+    parser.add_argument('caminhos', nargs='+', help="Arquivos de dados e/ou diretórios")
+    parser.add_argument('--processos', type=int, default=None, help="Processos do pool (padrão: núcleos)")
+    parser.add_argument('--incluir-backups', action='store_true', help="Incluir backup_dados_tickets_*.xlsx")
+    parser.add_argument('--periodo', default='mes', help="Período da agregação (dia, semana, mes, trimestre)")
+    args = parser.parse_args()
+
+    leitor = LeitorFederado(args.caminhos, args.processos, args.incluir_backups)
+    if not leitor.arquivos:
+        parser.error("nenhum arquivo de dados encontrado")
+
+    leitor.carregar()
+    print(f"🏢 {len(leitor.arquivos)} arquivo(s) consolidados\n")
+    print(leitor.por_arquivo().to_string(index=False))
+    print("\n📊 Estatísticas")
+    for chave, valor in leitor.obter_estatisticas().items():
+        print(f"  {chave:<20} {valor}")
+    print("\n🎯 KPIs")
+    for chave, valor in leitor.calcular_kpis().items():
+        print(f"  {chave:<24} {valor:.1f}")
+    print(f"\n📅 Agregação por {args.periodo}")
+    print(leitor.agregar(args.periodo).to_string(index=False))
@@ -0,0 +1,222 @@
+"""
+Expressões de filtro combináveis para os dados de tickets.
+
+As condições são combinadas com `&` (E) e `|` (OU) e compiladas em uma única
+máscara vetorizada. Restrições simples implicadas pela expressão (intervalo de
+datas e comparações em colunas) podem ser aplicadas pelo armazenamento durante
+a leitura, antes de montar o DataFrame completo.
+
+Exemplo:
+    filtro = Periodo(inicio, fim) & (Condicao('tickets_iniciados', '>', 10) | DiaSemana([5, 6]))
+    df_filtrado = df[filtro.mascara(df)]
+"""
+
+import operator
+from abc import ABC, abstractmethod
+
+import pandas as pd
+
+OPERADORES = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '<=': operator.le
+}
+
+
+class Filtro(ABC):
+    """
+    Nó de uma expressão de filtro.
+    """
+
+    @abstractmethod
+    def mascara(self, df):
+        """
+        Compila a expressão em uma máscara booleana sobre o DataFrame.
+
+        Args:
+            df (pd.DataFrame): Dados a filtrar
+
+        Returns:
+            pd.Series: Máscara booleana alinhada ao índice do DataFrame
+        """
+
+    def restricoes(self):
+        """
+        Restrições (coluna, operador, valor) que toda linha aceita precisa
+        satisfazer; podem ser aplicadas pelo armazenamento durante a leitura.
+
+        Returns:
+            list: Restrições simples implicadas pela expressão
+        """
+        return []
+
+    def __and__(self, outro):
+        return E(self, outro)
+
+    def __or__(self, outro):
+        return Ou(self, outro)
+
+    def __repr__(self):
+        atributos = ', '.join(f"{valor!r}" for valor in vars(self).values())
+        return f"{type(self).__name__}({atributos})"
+
+
+class Condicao(Filtro):
+    """
+    Comparação de uma coluna com um valor (ex.: tickets_iniciados > 10).
+    """
+
+    def __init__(self, coluna, operador, valor):
+        if operador not in OPERADORES:
+            raise ValueError(f"Operador inválido: {operador}")
+        self.coluna = coluna
+        self.operador = operador
+        self.valor = valor
+
+    def mascara(self, df):
+        return OPERADORES[self.operador](df[self.coluna], self.valor)
+
+    def restricoes(self):
+        return [(self.coluna, self.operador, self.valor)]
+
+
+class Periodo(Filtro):
+    """
+    Intervalo de datas fechado [inicio, fim]; qualquer um dos lados pode ser None.
+    """
+
+    def __init__(self, inicio=None, fim=None):
+        self.inicio = pd.Timestamp(inicio) if inicio is not None else None
+        self.fim = pd.Timestamp(fim) if fim is not None else None
+
+    def mascara(self, df):
+        mascara = pd.Series(True, index=df.index)
+        if self.inicio is not None:
+            mascara &= df['data'] >= self.inicio
+        if self.fim is not None:
+            mascara &= df['data'] <= self.fim
+        return mascara
+
+    def restricoes(self):
+        restricoes = []
+        if self.inicio is not None:
+            restricoes.append(('data', '>=', self.inicio))
+        if self.fim is not None:
+            restricoes.append(('data', '<=', self.fim))
+        return restricoes
+
+
+class DiaSemana(Filtro):
+    """
+    Dias da semana aceitos (0 = segunda-feira ... 6 = domingo).
+    """
+
+    def __init__(self, dias):
+        self.dias = tuple(sorted(set(dias)))
+
+    def mascara(self, df):
+        return df['data'].dt.weekday.isin(self.dias)
+
+
+class Equipe(Filtro):
+    """
+    Equipes aceitas. Dados sem a coluna 'equipe' não pertencem a nenhuma equipe.
+    """
+
+    def __init__(self, equipes):
+        self.equipes = tuple(sorted(set(equipes)))
+
+    def mascara(self, df):
+        if 'equipe' not in df.columns:
+            return pd.Series(False, index=df.index)
+        return df['equipe'].isin(self.equipes)
+
+
+class PossuiLinks(Filtro):
+    """
+    Dias com (ou sem) links de chamados registrados.
+    """
+
+    def __init__(self, possui=True):
+        self.possui = possui
+
+    def mascara(self, df):
+        preenchido = df['links_chamados'].fillna('').astype(str).str.strip() != ''
+        return preenchido if self.possui else ~preenchido
+
+
+class TextoLinks(Filtro):
+    """
+    Dias cujos links contêm o texto informado (sem diferenciar maiúsculas).
+    """
+
+    def __init__(self, texto):
+        self.texto = texto
+
+    def mascara(self, df):
+        return df['links_chamados'].fillna('').astype(str).str.contains(self.texto, case=False, regex=False)
+
+
+class E(Filtro):
+    """
+    Todas as condições precisam ser verdadeiras.
+    """
+
+    def __init__(self, *filtros):
+        # Achatar E(E(a, b), c) em E(a, b, c)
+        self.filtros = tuple(
+            parte for filtro in filtros
+            for parte in (filtro.filtros if isinstance(filtro, E) else (filtro,))
+        )
+
+    def __repr__(self):
+        return f"E({', '.join(repr(filtro) for filtro in self.filtros)})"
+
+    def mascara(self, df):
+        mascara = pd.Series(True, index=df.index)
+        for filtro in self.filtros:
+            mascara &= filtro.mascara(df)
+        return mascara
+
+    def restricoes(self):
+        return [restricao for filtro in self.filtros for restricao in filtro.restricoes()]
+
+
+class Ou(Filtro):
+    """
+    Pelo menos uma das condições precisa ser verdadeira.
+    """
+
+    def __init__(self, *filtros):
+        self.filtros = tuple(
+            parte for filtro in filtros
+            for parte in (filtro.filtros if isinstance(filtro, Ou) else (filtro,))
+        )
+
+    def __repr__(self):
+        return f"Ou({', '.join(repr(filtro) for filtro in self.filtros)})"
+
+    def mascara(self, df):
+        mascara = pd.Series(False, index=df.index)
+        for filtro in self.filtros:
+            mascara |= filtro.mascara(df)
+        return mascara
+
+
+def aplicar_filtro(df, filtro):
+    """
+    Aplica um filtro (ou nenhum) a um DataFrame.
+
+    Args:
+        df (pd.DataFrame): Dados a filtrar
+        filtro (Filtro): Expressão de filtro (opcional)
+
+    Returns:
+        pd.DataFrame: Linhas aceitas pelo filtro
+    """
+    if filtro is None or df.empty:
+        return df
+    return df[filtro.mascara(df)]
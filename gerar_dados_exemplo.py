@@ -103,6 +103,38 @@ def gerar_dados_realistas():
     
     print("✅ Dados realistas gerados com sucesso!")
 
+def gerar_dataframe_sintetico(dias, data_fim=None, semente=None):
+    """
+    Gera um DataFrame sintético com o mesmo modelo de carga semanal, sem gravar em disco.
+    Usado pelos benchmarks para montar históricos grandes rapidamente.
+
+    Args:
+        dias (int): Número de dias a gerar
+        data_fim (date): Último dia do histórico (padrão: hoje)
+        semente (int): Semente do gerador aleatório (opcional)
+
+    Returns:
+        pd.DataFrame: DataFrame com as colunas padrão do DataManager
+    """
+    import pandas as pd
+
+    rng = random.Random(semente)
+    data_fim = data_fim or datetime.now().date()
+    datas = pd.date_range(end=pd.Timestamp(data_fim), periods=dias, freq='D')
+
+    linhas = []
+    for data_atual in datas:
+        multiplicador = 0.3 if data_atual.weekday() >= 5 else 1.0
+        linhas.append({
+            'data': data_atual,
+            'tickets_iniciados': int(rng.randint(5, 25) * multiplicador),
+            'tickets_finalizados': int(rng.randint(3, 20) * multiplicador),
+            'tickets_andamento': int(rng.randint(10, 40) * multiplicador),
+            'links_chamados': ''
+        })
+
+    return pd.DataFrame(linhas)
+
 def mostrar_estatisticas():
     """
     Mostra estatísticas dos dados gerados.
@@ -0,0 +1,71 @@
+"""
+Gravação atômica de arquivos.
+
+O conteúdo é gravado em um arquivo temporário exclusivo de quem grava
+(processo e thread), no mesmo diretório do destino, e renomeado sobre ele.
+Leitores nunca veem um arquivo escrito pela metade, e gravações simultâneas do
+mesmo arquivo, por processos ou por threads de um mesmo processo, nunca
+compartilham o temporário: vence a última a renomear.
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+
+
+def caminho_temporario(caminho, manter_extensao=False):
+    """
+    Nome do arquivo temporário de quem grava o destino.
+
+    Args:
+        caminho (str): Arquivo de destino
+        manter_extensao (bool): Manter a extensão no fim do nome (para
+            bibliotecas que escolhem o formato por ela, ex.: .xlsx)
+
+    Returns:
+        str: <caminho>.<pid>.<thread>.tmp, ou <base>.<pid>.<thread>.tmp<extensão>
+    """
+    sufixo = f"{os.getpid()}.{threading.get_ident()}.tmp"
+    if manter_extensao:
+        base, extensao = os.path.splitext(caminho)
+        return f"{base}.{sufixo}{extensao}"
+    return f"{caminho}.{sufixo}"
+
+
+@contextmanager
+def gravacao_atomica(caminho, manter_extensao=False):
+    """
+    Fornece o arquivo temporário a gravar; ao fim do bloco ele substitui o
+    destino. Se o bloco falhar, o temporário é removido e o destino fica como
+    estava.
+
+    Args:
+        caminho (str): Arquivo de destino
+        manter_extensao (bool): Ver caminho_temporario
+
+    Yields:
+        str: Caminho do arquivo temporário
+    """
+    temporario = caminho_temporario(caminho, manter_extensao)
+    try:
+        yield temporario
+        os.replace(temporario, caminho)
+    except BaseException:
+        try:
+            os.remove(temporario)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def gravar_atomico(caminho, conteudo):
+    """
+    Grava um texto (UTF-8) de forma atômica.
+
+    Args:
+        caminho (str): Arquivo de destino
+        conteudo (str): Texto a gravar
+    """
+    with gravacao_atomica(caminho) as temporario:
+        with open(temporario, 'w', encoding='utf-8') as arquivo:
+            arquivo.write(conteudo)
@@ -0,0 +1,278 @@
+"""
+Histórico de alterações dos registros com consultas "como estava em".
+
+Cada gravação ou exclusão acrescenta uma linha ao log (JSON Lines, somente
+acréscimo) com o momento, o autor, a data do registro e apenas os campos que
+mudaram, com os valores anterior e novo. Periodicamente é gravado um ponto de
+verificação com o estado completo dos registros e a posição do log naquele
+ponto; para reconstruir os dados em um momento passado, parte-se do último
+ponto de verificação anterior a ele e aplica-se somente o trecho do log que
+vem depois, sem reler o log inteiro.
+
+Arquivos em <dados>_historico/:
+    alteracoes.jsonl         Log de alterações
+    checkpoint_<n>.json      Estado completo dos registros
+    checkpoints.json         Índice dos pontos de verificação (momento, posição no log)
+"""
+
+import getpass
+import json
+import os
+from datetime import datetime
+from itertools import islice
+
+import pandas as pd
+
+from data_manager import COLUNAS
+from gravacao_atomica import gravar_atomico
+
+CAMPOS = COLUNAS[1:]
+
+HISTORICO_CONFIG = {
+    # Novo ponto de verificação a cada tantos bytes de log desde o último
+    'bytes_por_checkpoint': 256 * 1024,
+    # Tamanho dos blocos lidos do fim do log ao listar as alterações recentes
+    'bytes_por_bloco': 64 * 1024
+}
+
+
+def autor_padrao():
+    """
+    Returns:
+        str: Autor das alterações (variável TICKETS_AUTOR ou usuário do sistema)
+    """
+    try:
+        return os.environ.get('TICKETS_AUTOR') or getpass.getuser()
+    except (KeyError, OSError):
+        return 'desconhecido'
+
+
+def _campos(registro):
+    """
+    Converte uma linha (Series ou dict) nos campos guardados no histórico.
+    """
+    if registro is None:
+        return None
+    return {
+        campo: (str(registro.get(campo) or '') if campo == 'links_chamados' else int(registro.get(campo)))
+        for campo in CAMPOS if campo in registro
+    }
+
+
+class HistoricoAlteracoes:
+    """
+    Log de alterações com pontos de verificação, guardado em um diretório.
+    """
+
+    def __init__(self, diretorio):
+        """
+        Args:
+            diretorio (str): Diretório do histórico
+        """
+        self.diretorio = diretorio
+        self.caminho_log = os.path.join(diretorio, 'alteracoes.jsonl')
+        self.caminho_indice = os.path.join(diretorio, 'checkpoints.json')
+
+    def checkpoints(self):
+        """
+        Returns:
+            list: Pontos de verificação ({'momento', 'offset', 'arquivo'}), em ordem
+        """
+        try:
+            with open(self.caminho_indice, encoding='utf-8') as arquivo:
+                return json.load(arquivo)
+        except (OSError, ValueError):
+            return []
+
+    def iniciado(self):
+        """
+        Returns:
+            bool: True se já existe o ponto de verificação inicial
+        """
+        return bool(self.checkpoints())
+
+    def iniciar(self, df):
+        """
+        Grava o ponto de verificação inicial com os dados atuais; o histórico
+        começa a partir dele.
+
+        Args:
+            df (pd.DataFrame): Registros atuais
+        """
+        os.makedirs(self.diretorio, exist_ok=True)
+        registros = {
+            linha['data'].date().isoformat(): _campos(linha) for linha in df.to_dict('records')
+        } if not df.empty else {}
+        self._gravar_checkpoint(registros, datetime.now().isoformat(), 0)
+
+    def registrar(self, data_registro, antes, depois, autor=None, momento=None):
+        """
+        Acrescenta uma alteração ao log com os campos que mudaram.
+
+        Args:
+            data_registro (date): Data do registro alterado
+            antes (dict): Campos do registro antes da alteração (None se novo)
+            depois (dict): Campos depois da alteração (None se excluído)
+            autor (str): Autor da alteração (padrão: autor_padrao())
+            momento (datetime): Momento da alteração (padrão: agora)
+        """
+        antes, depois = _campos(antes), _campos(depois)
+        if depois is None:
+            alterados = list(antes or {})
+        else:
+            alterados = [campo for campo in depois if antes is None or antes.get(campo) != depois[campo]]
+            if not alterados:
+                return
+
+        linha = {
+            'momento': (momento or datetime.now()).isoformat(),
+            'autor': autor or autor_padrao(),
+            'data': data_registro.isoformat(),
+            'operacao': 'excluir' if depois is None else ('inserir' if antes is None else 'alterar'),
+            'anteriores': {campo: antes[campo] for campo in alterados} if antes else None,
+            'valores': {campo: depois[campo] for campo in alterados} if depois else None
+        }
+        os.makedirs(self.diretorio, exist_ok=True)
+        # Linha única acrescentada com O_APPEND: escritas concorrentes não se intercalam
+        with open(self.caminho_log, 'a', encoding='utf-8') as arquivo:
+            arquivo.write(json.dumps(linha, ensure_ascii=False) + '\n')
+
+        ultimo = self.checkpoints()[-1:]
+        if ultimo and os.path.getsize(self.caminho_log) - ultimo[0]['offset'] >= HISTORICO_CONFIG['bytes_por_checkpoint']:
+            self.criar_checkpoint()
+
+    def _ler_log(self, offset=0, ate=None):
+        """
+        Percorre o log a partir de uma posição.
+
+        Args:
+            offset (int): Posição inicial no arquivo
+            ate (str): Momento ISO máximo (inclusivo), ou None para ler tudo
+
+        Yields:
+            tuple: (alteração, posição do fim da linha)
+        """
+        if not os.path.exists(self.caminho_log):
+            return
+        with open(self.caminho_log, 'rb') as arquivo:
+            arquivo.seek(offset)
+            for bruta in arquivo:
+                if not bruta.endswith(b'\n'):
+                    break  # linha ainda sendo escrita
+                alteracao = json.loads(bruta)
+                if ate is not None and alteracao['momento'] > ate:
+                    break
+                offset += len(bruta)
+                yield alteracao, offset
+
+    def _ler_log_reverso(self):
+        """
+        Percorre o log do fim para o começo, em blocos lidos a partir do final
+        do arquivo: as alterações recentes saem sem ler o log inteiro.
+
+        Yields:
+            dict: Alterações, da mais recente para a mais antiga
+        """
+        if not os.path.exists(self.caminho_log):
+            return
+        with open(self.caminho_log, 'rb') as arquivo:
+            fim = arquivo.seek(0, os.SEEK_END)
+            resto = b''
+            cauda = True
+            while fim > 0:
+                inicio = max(fim - HISTORICO_CONFIG['bytes_por_bloco'], 0)
+                arquivo.seek(inicio)
+                linhas = (arquivo.read(fim - inicio) + resto).split(b'\n')
+                fim = inicio
+                if cauda:
+                    if len(linhas) == 1:
+                        resto = linhas[0]
+                        continue
+                    linhas.pop()  # linha ainda sendo escrita (ou vazio após o último '\n')
+                    cauda = False
+                # Antes do primeiro '\n' do bloco está o fim de uma linha que
+                # começa em um bloco anterior
+                resto = linhas.pop(0) if fim > 0 else b''
+                for bruta in reversed(linhas):
+                    if bruta:
+                        yield json.loads(bruta)
+
+    @staticmethod
+    def _aplicar(registros, alteracao):
+        if alteracao['operacao'] == 'excluir':
+            registros.pop(alteracao['data'], None)
+        else:
+            registros.setdefault(alteracao['data'], {}).update(alteracao['valores'])
+
+    def _estado(self, ate=None):
+        """
+        Reconstrói os registros a partir do último ponto de verificação
+        anterior ao momento pedido.
+
+        Returns:
+            tuple: (registros por data, posição do log aplicada, momento do checkpoint usado)
+        """
+        checkpoints = self.checkpoints()
+        if not checkpoints:
+            return {}, 0, None
+        candidatos = [c for c in checkpoints if ate is None or c['momento'] <= ate] or checkpoints[:1]
+        base = candidatos[-1]
+        with open(os.path.join(self.diretorio, base['arquivo']), encoding='utf-8') as arquivo:
+            registros = json.load(arquivo)
+
+        offset = base['offset']
+        for alteracao, offset in self._ler_log(base['offset'], ate):
+            self._aplicar(registros, alteracao)
+        return registros, offset, base['momento']
+
+    def criar_checkpoint(self):
+        """
+        Grava um ponto de verificação com o estado ao fim do log atual.
+        """
+        registros, offset, _ = self._estado()
+        self._gravar_checkpoint(registros, datetime.now().isoformat(), offset)
+
+    def _gravar_checkpoint(self, registros, momento, offset):
+        checkpoints = self.checkpoints()
+        nome = f"checkpoint_{len(checkpoints)}.json"
+        gravar_atomico(os.path.join(self.diretorio, nome), json.dumps(registros, ensure_ascii=False))
+
+        checkpoints.append({'momento': momento, 'offset': offset, 'arquivo': nome})
+        gravar_atomico(self.caminho_indice, json.dumps(checkpoints))
+
+    def dados_em(self, momento):
+        """
+        Reconstrói os registros como estavam em um momento passado. Antes do
+        início do histórico, retorna o estado inicial registrado.
+
+        Args:
+            momento (datetime): Momento desejado
+
+        Returns:
+            pd.DataFrame: Registros naquele momento, ordenados por data
+        """
+        registros, _, _ = self._estado(momento.isoformat())
+        df = pd.DataFrame(
+            [{'data': data, **campos} for data, campos in registros.items()], columns=COLUNAS
+        )
+        df['data'] = pd.to_datetime(df['data'])
+        df['links_chamados'] = df['links_chamados'].fillna('').astype(str)
+        return df.sort_values('data').reset_index(drop=True)
+
+    def alteracoes(self, data_registro=None, limite=None):
+        """
+        Lista as alterações registradas, da mais recente para a mais antiga,
+        lendo o log a partir do fim.
+
+        Args:
+            data_registro (date): Apenas alterações deste dia (opcional)
+            limite (int): Número máximo de alterações (opcional)
+
+        Returns:
+            list: Alterações como gravadas no log
+        """
+        filtradas = (
+            alteracao for alteracao in self._ler_log_reverso()
+            if data_registro is None or alteracao['data'] == data_registro.isoformat()
+        )
+        return list(islice(filtradas, limite) if limite else filtradas)
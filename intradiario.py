@@ -0,0 +1,205 @@
+"""
+Snapshots intradiários da fila de tickets.
+
+Um alimentador automático registra o estado da fila a cada poucos minutos.
+Cada snapshot é uma linha acrescentada ao arquivo CSV do dia (sem reescrever
+nada), e a compactação consolida o último snapshot de cada dia encerrado na
+tabela diária do DataManager, arquivando o CSV compactado em gzip.
+
+Os contadores de um snapshot são os acumulados do dia até aquele momento
+(iniciados/finalizados) e a fila atual (em andamento), de modo que o último
+snapshot do dia corresponde ao registro diário.
+
+Uso pela linha de comando:
+    python intradiario.py registrar <iniciados> <finalizados> <andamento>
+    python intradiario.py compactar
+"""
+
+import argparse
+import gzip
+import os
+import shutil
+from datetime import date, datetime
+
+import pandas as pd
+
+from data_manager import CONTADORES, DataManager
+
+COLUNAS_SNAPSHOT = ['momento', *CONTADORES]
+
+INTRADIARIO_CONFIG = {
+    # Pontos máximos da curva exibida; acima disso os snapshots são reamostrados
+    'pontos_curva': 500,
+    # Intervalo (s) em que o Dashboard Hoje relê a curva do dia
+    'atualizacao_segundos': 60
+}
+
+
+class SnapshotsIntradiarios:
+    """
+    Fluxo somente de acréscimo com um arquivo CSV por dia em um diretório.
+    """
+
+    def __init__(self, diretorio):
+        """
+        Args:
+            diretorio (str): Diretório dos arquivos de snapshots
+        """
+        self.diretorio = diretorio
+
+    def caminho_dia(self, dia, compactado=False):
+        """
+        Returns:
+            str: Caminho do arquivo de snapshots do dia
+        """
+        return os.path.join(self.diretorio, f"{dia.isoformat()}.csv" + ('.gz' if compactado else ''))
+
+    def registrar(self, tickets_iniciados, tickets_finalizados, tickets_andamento, momento=None):
+        """
+        Acrescenta um snapshot ao arquivo do dia (custo constante).
+
+        Args:
+            tickets_iniciados (int): Tickets iniciados no dia até o momento
+            tickets_finalizados (int): Tickets finalizados no dia até o momento
+            tickets_andamento (int): Tickets em andamento no momento
+            momento (datetime): Horário do snapshot (padrão: agora)
+        """
+        valores = (tickets_iniciados, tickets_finalizados, tickets_andamento)
+        if any(valor < 0 for valor in valores):
+            raise ValueError("Os valores não podem ser negativos.")
+
+        momento = momento or datetime.now()
+        os.makedirs(self.diretorio, exist_ok=True)
+        caminho = self.caminho_dia(momento.date())
+        linha = f"{momento.isoformat(timespec='seconds')},{','.join(str(int(v)) for v in valores)}\n"
+
+        # Arquivo sem cabeçalho: com O_APPEND, escritas concorrentes de linhas
+        # curtas não se intercalam e não há primeira linha especial a disputar
+        with open(caminho, 'a', encoding='utf-8') as arquivo:
+            arquivo.write(linha)
+
+    def ler_dia(self, dia):
+        """
+        Lê os snapshots de um dia (aberto ou já compactado).
+
+        Args:
+            dia (date): Dia desejado
+
+        Returns:
+            pd.DataFrame: Snapshots ordenados por momento (os do arquivo
+            compactado e os registrados depois da compactação)
+        """
+        partes = [
+            pd.read_csv(caminho, names=COLUNAS_SNAPSHOT, parse_dates=['momento'])
+            for caminho in (self.caminho_dia(dia, compactado=True), self.caminho_dia(dia))
+            if os.path.exists(caminho)
+        ]
+        if not partes:
+            return pd.DataFrame(columns=COLUNAS_SNAPSHOT)
+        # Uma compactação interrompida pode ter arquivado linhas ainda presentes no CSV
+        df = pd.concat(partes, ignore_index=True).drop_duplicates()
+        return df.sort_values('momento', kind='stable').reset_index(drop=True)
+
+    def curva_dia(self, dia, pontos_max=None):
+        """
+        Retorna a curva intradiária do dia, reamostrada se houver snapshots demais.
+
+        Args:
+            dia (date): Dia desejado
+            pontos_max (int): Pontos máximos (padrão: INTRADIARIO_CONFIG)
+
+        Returns:
+            pd.DataFrame: Colunas 'momento' e contadores
+        """
+        pontos_max = pontos_max or INTRADIARIO_CONFIG['pontos_curva']
+        df = self.ler_dia(dia)
+        if len(df) <= pontos_max:
+            return df
+
+        duracao = df['momento'].iloc[-1] - df['momento'].iloc[0]
+        intervalo = max(duracao / pontos_max, pd.Timedelta(seconds=1)).ceil('s')
+        return df.resample(intervalo, on='momento').last().dropna().reset_index()
+
+    def dias_abertos(self):
+        """
+        Returns:
+            list: Dias com snapshots ainda não compactados, em ordem
+        """
+        if not os.path.isdir(self.diretorio):
+            return []
+        return sorted(
+            date.fromisoformat(nome[:-4]) for nome in os.listdir(self.diretorio) if nome.endswith('.csv')
+        )
+
+    def compactar_dia(self, dia, data_manager):
+        """
+        Grava o último snapshot do dia como registro diário e arquiva o CSV em
+        gzip. Compactar de novo um dia (snapshots registrados depois da
+        primeira compactação) acrescenta os novos ao arquivo existente.
+
+        Args:
+            dia (date): Dia a compactar
+            data_manager (DataManager): Destino do registro diário
+
+        Returns:
+            bool: True se o dia foi compactado
+        """
+        caminho = self.caminho_dia(dia)
+        if not os.path.exists(caminho):
+            return False
+        snapshots = self.ler_dia(dia)
+        if snapshots.empty:
+            return False
+
+        ultimo = snapshots.iloc[-1]
+        existente = data_manager.filtrar_dados(dia, dia)
+        links = existente['links_chamados'].iloc[0] if not existente.empty else ""
+
+        if not data_manager.adicionar_registro(
+            dia, int(ultimo['tickets_iniciados']), int(ultimo['tickets_finalizados']),
+            int(ultimo['tickets_andamento']), links
+        ):
+            return False
+
+        # Um novo membro gzip ao final do arquivo: os membros são lidos em
+        # sequência como um só CSV (sem cabeçalho), sem regravar os anteriores
+        with open(caminho, 'rb') as origem, gzip.open(self.caminho_dia(dia, compactado=True), 'ab') as destino:
+            shutil.copyfileobj(origem, destino)
+        os.remove(caminho)
+        return True
+
+    def compactar_pendentes(self, data_manager, ate=None):
+        """
+        Compacta todos os dias abertos anteriores a `ate` (padrão: hoje).
+
+        Args:
+            data_manager (DataManager): Destino dos registros diários
+            ate (date): Dias a partir desta data continuam abertos
+
+        Returns:
+            list: Dias compactados
+        """
+        ate = ate or date.today()
+        return [
+            dia for dia in self.dias_abertos()
+            if dia < ate and self.compactar_dia(dia, data_manager)
+        ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Snapshots intradiários de tickets")
+    parser.add_argument('--arquivo', default="dados_tickets.xlsx", help="Arquivo de dados")
+    subcomandos = parser.add_subparsers(dest='comando', required=True)
+    registrar = subcomandos.add_parser('registrar', help="Registra um snapshot agora")
+    for contador in CONTADORES:
+        registrar.add_argument(contador, type=int)
+    subcomandos.add_parser('compactar', help="Consolida os dias encerrados na tabela diária")
+    args = parser.parse_args()
+
+    dm = DataManager(args.arquivo)
+    if args.comando == 'registrar':
+        dm.intradiario.registrar(args.tickets_iniciados, args.tickets_finalizados, args.tickets_andamento)
+        print("✅ Snapshot registrado.")
+    else:
+        compactados = dm.intradiario.compactar_pendentes(dm)
+        print(f"✅ {len(compactados)} dia(s) compactado(s).")
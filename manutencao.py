@@ -0,0 +1,378 @@
+"""
+Agendador de manutenção em segundo plano.
+
+Tarefas de manutenção que não devem rodar dentro da execução de uma sessão:
+
+    backup               Cópia dos dados em <dados>_backups/backup_dados_tickets_<data>.xlsx
+                         (DataManager.backup_dados), mantendo os mais recentes
+                         desse diretório
+    compactacao          Checkpoint do WAL, PRAGMA optimize e VACUUM do banco
+                         SQLite, e compactação dos dias intradiários encerrados
+    aquecimento          Snapshot Arrow, previsão e pirâmide da versão atual,
+                         reconstruídos aqui e não na primeira sessão que os usar
+    verificacao_indices  Índices do banco SQLite recriados se ausentes e
+                         conferidos com PRAGMA integrity_check
+    relatorios           Relatórios pendentes gerados no pool de processos de
+                         agendador_relatorios.py (versão nova dos dados ou
+                         nova semana/mês após o horário agendado)
+
+Cada tarefa tem seu intervalo em MANUTENCAO_CONFIG. Uma única thread executa
+uma tarefa por vez, com um intervalo mínimo entre tarefas, e adia a manutenção
+enquanto os dados estão sendo alterados (pela versão mantida pelo notificador,
+ver notificacoes.py). O estado, o horário e a duração da última execução de
+cada tarefa ficam em <dados>_manutencao/status.json, lido pela barra lateral
+do app. Vários processos (instâncias do app ou o executor pela linha de
+comando) compartilham esse arquivo e uma trava, de modo que cada tarefa roda
+uma vez por intervalo, em um só processo.
+
+Uso pela linha de comando:
+    python manutencao.py                          # executor contínuo (fora do app)
+    python manutencao.py --uma-vez                # executa as tarefas pendentes e sai
+    python manutencao.py --tarefa backup --forcar # executa uma tarefa agora
+    python manutencao.py --status                 # mostra o estado das tarefas
+"""
+
+import argparse
+import glob
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from data_manager import DataManager
+from gravacao_atomica import gravar_atomico
+
+MANUTENCAO_CONFIG = {
+    # Intervalo de cada tarefa; 'ativa': False desliga a tarefa
+    'tarefas': {
+        'backup': {'intervalo_segundos': 24 * 3600, 'ativa': True},
+        'compactacao': {'intervalo_segundos': 6 * 3600, 'ativa': True},
+        'aquecimento': {'intervalo_segundos': 5 * 60, 'ativa': True},
+        'verificacao_indices': {'intervalo_segundos': 24 * 3600, 'ativa': True},
+        'relatorios': {'intervalo_segundos': 5 * 60, 'ativa': True}
+    },
+    'backups_mantidos': 14,                 # Backups mais recentes preservados (None = todos)
+    'limite_paginas_livres': 0.2,           # Fração de páginas livres que dispara o VACUUM
+    'espera_bloqueio_segundos': 0.5,        # Compactação: espera máxima por um bloqueio do banco
+    'intervalo_entre_tarefas_segundos': 60, # Limite de ritmo: no máximo uma tarefa por intervalo
+    'pausa_apos_alteracao_segundos': 30,    # Adia a manutenção após cada alteração dos dados
+    'verificacao_segundos': 10              # Intervalo entre verificações de tarefas pendentes
+}
+
+PADRAO_BACKUP = "backup_dados_tickets_*.xlsx"
+
+_agendadores = {}
+_lock_agendadores = threading.Lock()
+
+
+def ler_status(data_manager):
+    """
+    Args:
+        data_manager (DataManager): Dados de origem
+
+    Returns:
+        dict: tarefa -> estado da última execução ({} se nenhuma rodou)
+    """
+    try:
+        with open(os.path.join(data_manager.caminho_auxiliar('manutencao'), 'status.json'), encoding='utf-8') as arquivo:
+            return json.load(arquivo)
+    except (OSError, ValueError):
+        return {}
+
+
+class Manutencao:
+    """
+    Executa as tarefas de manutenção de um arquivo de dados nos intervalos de
+    MANUTENCAO_CONFIG, em uma thread de fundo ou pelo executor da linha de
+    comando.
+    """
+
+    def __init__(self, data_manager):
+        """
+        Args:
+            data_manager (DataManager): Dados mantidos
+        """
+        self.data_manager = data_manager
+        self.diretorio = data_manager.caminho_auxiliar('manutencao')
+        self.notificador = data_manager.observar_alteracoes()
+        self.tarefas = {
+            'backup': self._backup,
+            'compactacao': self._compactacao,
+            'aquecimento': self._aquecimento,
+            'verificacao_indices': self._verificacao_indices,
+            'relatorios': self._relatorios
+        }
+        self._parar = threading.Event()
+        self._thread = None
+
+    @property
+    def ativo(self):
+        """
+        Returns:
+            bool: True enquanto a thread de fundo está rodando
+        """
+        return self._thread is not None and self._thread.is_alive()
+
+    def status(self):
+        """
+        Returns:
+            dict: tarefa -> estado da última execução
+        """
+        return ler_status(self.data_manager)
+
+    def pendentes(self, agora=None):
+        """
+        Tarefas ativas cujo intervalo passou desde o início da última execução.
+
+        Args:
+            agora (float): Momento de referência (padrão: agora)
+
+        Returns:
+            list: Nomes das tarefas pendentes, na ordem de MANUTENCAO_CONFIG
+        """
+        agora = agora or time.time()
+        status = self.status()
+        return [
+            nome for nome, config in MANUTENCAO_CONFIG['tarefas'].items()
+            if config['ativa'] and agora - status.get(nome, {}).get('inicio', 0) >= config['intervalo_segundos']
+        ]
+
+    def ocupado(self):
+        """
+        Returns:
+            bool: True se os dados foram alterados há pouco (a manutenção espera)
+        """
+        return time.time() - self.notificador.momento < MANUTENCAO_CONFIG['pausa_apos_alteracao_segundos']
+
+    @contextmanager
+    def _trava(self):
+        """
+        Trava exclusiva entre processos, sem espera.
+
+        Yields:
+            bool: True se a trava foi obtida
+        """
+        try:
+            import fcntl
+        except ImportError:
+            # Sem fcntl (Windows): apenas o status compartilhado evita repetições
+            yield True
+            return
+        os.makedirs(self.diretorio, exist_ok=True)
+        with open(os.path.join(self.diretorio, 'trava'), 'w') as arquivo:
+            try:
+                fcntl.flock(arquivo, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(arquivo, fcntl.LOCK_UN)
+
+    def _registrar(self, nome, **campos):
+        status = self.status()
+        status[nome] = {**status.get(nome, {}), **campos}
+        gravar_atomico(os.path.join(self.diretorio, 'status.json'), json.dumps(status, ensure_ascii=False))
+        return status[nome]
+
+    def executar_tarefa(self, nome, forcar=False):
+        """
+        Executa uma tarefa e registra estado, horário e duração.
+
+        Args:
+            nome (str): Uma das tarefas de MANUTENCAO_CONFIG
+            forcar (bool): Executar mesmo que a tarefa não esteja pendente
+
+        Returns:
+            dict: Estado registrado, ou None se a tarefa não rodou (não
+            pendente ou em execução em outro processo)
+        """
+        if nome not in self.tarefas:
+            raise ValueError(f"Tarefa de manutenção desconhecida: {nome}")
+        with self._trava() as obtida:
+            # Outro processo pode ter executado a tarefa desde a última verificação
+            if not obtida or not (forcar or nome in self.pendentes()):
+                return None
+            inicio = time.time()
+            anterior = self.status().get(nome, {})
+            self._registrar(nome, estado='executando', inicio=inicio)
+            try:
+                resultado = self.tarefas[nome](anterior)
+                estado = 'ok'
+            except Exception as e:
+                resultado = {'mensagem': f"{type(e).__name__}: {e}"}
+                estado = 'erro'
+            return self._registrar(
+                nome, estado=estado, inicio=inicio, duracao_segundos=round(time.time() - inicio, 3),
+                execucoes=anterior.get('execucoes', 0) + 1,
+                falhas=anterior.get('falhas', 0) + (estado == 'erro'), **resultado
+            )
+
+    def executar_pendentes(self, forcar=False):
+        """
+        Executa as tarefas pendentes em sequência (sem limite de ritmo).
+
+        Args:
+            forcar (bool): Executar também as tarefas não pendentes
+
+        Returns:
+            dict: tarefa -> estado registrado das que rodaram
+        """
+        nomes = [nome for nome, config in MANUTENCAO_CONFIG['tarefas'].items() if config['ativa']] \
+            if forcar else self.pendentes()
+        executadas = {nome: self.executar_tarefa(nome, forcar) for nome in nomes}
+        return {nome: status for nome, status in executadas.items() if status is not None}
+
+    def rodar(self):
+        """
+        Laço do agendador: executa no máximo uma tarefa pendente por
+        intervalo_entre_tarefas_segundos, fora dos momentos de alteração dos
+        dados.
+        """
+        while not self._parar.is_set():
+            espera = MANUTENCAO_CONFIG['verificacao_segundos']
+            try:
+                pendentes = [] if self.ocupado() else self.pendentes()
+                if pendentes:
+                    status = self.executar_tarefa(pendentes[0])
+                    if status is not None:
+                        print(f"[{datetime.now():%Y-%m-%d %H:%M:%S}] Manutenção {pendentes[0]}: "
+                              f"{status['estado']} em {status['duracao_segundos']:.1f} s")
+                        espera = MANUTENCAO_CONFIG['intervalo_entre_tarefas_segundos']
+            except Exception as e:
+                print(f"Erro no agendador de manutenção: {e}")
+            self._parar.wait(espera)
+
+    def iniciar(self):
+        """
+        Inicia a thread de fundo do agendador.
+        """
+        if self.ativo:
+            return
+        self._parar.clear()
+        self._thread = threading.Thread(target=self.rodar, name='manutencao', daemon=True)
+        self._thread.start()
+
+    def parar(self):
+        """
+        Encerra a thread de fundo ao fim da tarefa em andamento.
+        """
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    # Tarefas: recebem o estado da execução anterior e retornam os campos a registrar
+
+    def _backup(self, anterior):
+        versao = self.data_manager.versao_dados()
+        if versao is None:
+            return {'mensagem': "Sem dados para copiar"}
+        if versao == anterior.get('versao') and anterior.get('estado') == 'ok':
+            return {'mensagem': "Dados sem alteração desde o último backup", 'versao': versao}
+        # Diretório só dos backups deste arquivo: backups manuais e de outros
+        # arquivos nunca entram no rodízio
+        diretorio = self.data_manager.caminho_auxiliar('backups')
+        if not self.data_manager.backup_dados(diretorio):
+            raise RuntimeError("Falha ao criar o backup")
+
+        removidos = []
+        mantidos = MANUTENCAO_CONFIG['backups_mantidos']
+        if mantidos is not None:
+            # O nome tem o horário (AAAAMMDD_HHMMSS): a ordem alfabética é a cronológica
+            removidos = sorted(glob.glob(os.path.join(diretorio, PADRAO_BACKUP)))[:-mantidos]
+            for caminho in removidos:
+                os.remove(caminho)
+        return {'mensagem': f"Backup criado; {len(removidos)} backup(s) antigo(s) removido(s)", 'versao': versao}
+
+    def _compactacao(self, anterior):
+        partes = []
+        if self.data_manager.sqlite is not None:
+            resultado = self.data_manager.sqlite.compactar(
+                MANUTENCAO_CONFIG['limite_paginas_livres'], MANUTENCAO_CONFIG['espera_bloqueio_segundos']
+            )
+            partes.append(
+                f"banco com {resultado['tamanho_depois'] / 1024:.0f} KB"
+                + (f" (VACUUM: {resultado['tamanho_antes'] / 1024:.0f} KB antes)" if resultado['vacuum'] else "")
+                + (" (VACUUM adiado: banco em uso)" if resultado['vacuum_adiado'] else "")
+            )
+        compactados = self.data_manager.intradiario.compactar_pendentes(self.data_manager)
+        partes.append(f"{len(compactados)} dia(s) intradiário(s) compactado(s)")
+        return {'mensagem': "; ".join(partes)}
+
+    def _aquecimento(self, anterior):
+        versao = self.data_manager.versao_dados()
+        if versao == anterior.get('versao') and anterior.get('estado') == 'ok':
+            return {'mensagem': "Versão atual já aquecida", 'versao': versao}
+        # Lê e publica o snapshot Arrow da versão atual, se ainda não existir
+        df = self.data_manager.carregar_dados()
+        if not df.empty:
+            self.data_manager.sincronizar_derivados()
+        return {'mensagem': f"{len(df)} registros aquecidos", 'versao': versao}
+
+    def _verificacao_indices(self, anterior):
+        if self.data_manager.sqlite is None:
+            return {'mensagem': "Sem banco SQLite: nada a verificar"}
+        resultado = self.data_manager.sqlite.verificar_indices()
+        if resultado['problemas']:
+            return {'mensagem': f"REINDEX após {len(resultado['problemas'])} problema(s): {resultado['problemas'][0]}"}
+        if resultado['recriados']:
+            return {'mensagem': f"Índices recriados: {', '.join(resultado['recriados'])}"}
+        return {'mensagem': "Índices íntegros"}
+
+    def _relatorios(self, anterior):
+        from agendador_relatorios import AgendadorRelatorios
+
+        gerados = AgendadorRelatorios(self.data_manager).executar()
+        return {'mensagem': f"Relatórios gerados: {', '.join(gerados)}" if gerados else "Relatórios em dia"}
+
+
+def manutencao_para(data_manager):
+    """
+    Agendador de manutenção do arquivo de dados, criado e iniciado uma vez por processo.
+
+    Args:
+        data_manager (DataManager): Gerenciador do arquivo de dados
+
+    Returns:
+        Manutencao: Agendador compartilhado por todas as instâncias do arquivo
+    """
+    chave = os.path.abspath(data_manager.arquivo_excel)
+    with _lock_agendadores:
+        agendador = _agendadores.get(chave)
+        if agendador is None:
+            agendador = _agendadores[chave] = Manutencao(data_manager)
+            agendador.iniciar()
+    return agendador
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Agendador de manutenção dos dados")
+    parser.add_argument('--arquivo', default="dados_tickets.xlsx", help="Arquivo de dados")
+    parser.add_argument('--uma-vez', action='store_true', help="Executa as tarefas pendentes e sai")
+    parser.add_argument('--tarefa', choices=list(MANUTENCAO_CONFIG['tarefas']), help="Executa só esta tarefa e sai")
+    parser.add_argument('--forcar', action='store_true', help="Executa mesmo as tarefas não pendentes")
+    parser.add_argument('--status', action='store_true', help="Mostra o estado das tarefas e sai")
+    args = parser.parse_args()
+
+    manutencao = Manutencao(DataManager(args.arquivo))
+    if args.status:
+        for nome, status in manutencao.status().items():
+            print(f"{nome}: {status.get('estado')} em {datetime.fromtimestamp(status['inicio']):%d/%m/%Y %H:%M:%S} "
+                  f"({status.get('duracao_segundos', 0):.1f} s) — {status.get('mensagem', '')}")
+    elif args.tarefa:
+        status = manutencao.executar_tarefa(args.tarefa, args.forcar)
+        print(f"✅ {args.tarefa}: {status['estado']} — {status['mensagem']}" if status
+              else f"⏭️ {args.tarefa} não está pendente (use --forcar)")
+    elif args.uma_vez:
+        executadas = manutencao.executar_pendentes(args.forcar)
+        for nome, status in executadas.items():
+            print(f"✅ {nome}: {status['estado']} em {status['duracao_segundos']:.1f} s — {status['mensagem']}")
+        if not executadas:
+            print("✅ Nenhuma tarefa pendente")
+    else:
+        print("🛠️ Agendador de manutenção iniciado")
+        manutencao.rodar()
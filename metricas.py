@@ -0,0 +1,339 @@
+"""
+Métricas de desempenho no formato OpenMetrics.
+
+Contadores, medidores e histogramas mantidos em memória por processo, com as
+durações das operações do DataManager (carregar_dados, adicionar_registro,
+excluir_registro), acertos do cache (snapshot Arrow e respostas da API),
+tamanho do armazenamento, quantidade de registros e duração das execuções do
+app por página. Um servidor HTTP local expõe tudo em /metrics para o
+Prometheus (ou outro coletor compatível); a API (api.py) também responde em
+/metrics com as métricas do seu processo. O mesmo servidor responde em /pronto
+(200 ou 503) conforme as verificações de prontidão registradas (ex.: o
+aquecimento dos caches, ver aquecimento.py).
+
+Cada processo tem suas métricas: com várias instâncias do app, configure uma
+porta por instância (TICKETS_METRICAS_PORTA).
+"""
+
+import bisect
+import functools
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRICAS_CONFIG = {
+    'host': '127.0.0.1',
+    'porta': int(os.environ.get('TICKETS_METRICAS_PORTA', 9464)),
+    # Limites (s) dos baldes dos histogramas de duração
+    'baldes_segundos': (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+}
+
+TIPO_CONTEUDO = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+PREFIXO = 'hub_tickets_'
+
+_metricas = []
+_armazenamentos = {}
+_prontidao = {}
+_lock = threading.Lock()
+_exportador = None
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _rotulos(rotulos):
+    if not rotulos:
+        return ''
+    return '{' + ','.join(f'{nome}="{_escapar(valor)}"' for nome, valor in rotulos) + '}'
+
+
+def _numero(valor):
+    if valor == float('inf'):
+        return '+Inf'
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class _Metrica:
+    """
+    Família de métricas com rótulos; cada combinação de rótulos é uma série.
+    """
+
+    tipo = None
+
+    def __init__(self, nome, ajuda):
+        """
+        Args:
+            nome (str): Nome sem o prefixo PREFIXO (e sem _total nos contadores)
+            ajuda (str): Descrição exibida em # HELP
+        """
+        self.nome = PREFIXO + nome
+        self.ajuda = ajuda
+        self._series = {}
+        self._lock = threading.Lock()
+        with _lock:
+            _metricas.append(self)
+
+    def linhas(self):
+        """
+        Returns:
+            list: Linhas da família no formato OpenMetrics
+        """
+        with self._lock:
+            series = sorted(self._series.items(), key=lambda item: str(item[0]))
+            series = [(rotulos, self._copiar(valor)) for rotulos, valor in series]
+        return [f"# TYPE {self.nome} {self.tipo}", f"# HELP {self.nome} {self.ajuda}"] + [
+            linha for rotulos, valor in series for linha in self._amostras(rotulos, valor)
+        ]
+
+    @staticmethod
+    def _copiar(valor):
+        return valor
+
+
+class Contador(_Metrica):
+    """
+    Total que só aumenta (ex.: acertos de cache).
+    """
+
+    tipo = 'counter'
+
+    def incrementar(self, quantidade=1, **rotulos):
+        chave = tuple(sorted(rotulos.items()))
+        with self._lock:
+            self._series[chave] = self._series.get(chave, 0) + quantidade
+
+    def _amostras(self, rotulos, valor):
+        return [f"{self.nome}_total{_rotulos(rotulos)} {_numero(valor)}"]
+
+
+class Medidor(_Metrica):
+    """
+    Valor que sobe e desce. Com `coletar`, os valores são lidos só na coleta.
+    """
+
+    tipo = 'gauge'
+
+    def __init__(self, nome, ajuda, coletar=None):
+        """
+        Args:
+            coletar (callable): Retorna [(rótulos em dict, valor)] no momento da coleta
+        """
+        super().__init__(nome, ajuda)
+        self.coletar = coletar
+
+    def definir(self, valor, **rotulos):
+        with self._lock:
+            self._series[tuple(sorted(rotulos.items()))] = valor
+
+    def linhas(self):
+        if self.coletar is not None:
+            try:
+                valores = self.coletar()
+            except Exception as e:
+                print(f"Erro ao coletar a métrica {self.nome}: {e}")
+                valores = []
+            with self._lock:
+                self._series = {tuple(sorted(rotulos.items())): valor for rotulos, valor in valores}
+        return super().linhas()
+
+    def _amostras(self, rotulos, valor):
+        return [f"{self.nome}{_rotulos(rotulos)} {_numero(valor)}"]
+
+
+class Histograma(_Metrica):
+    """
+    Distribuição de durações em baldes cumulativos, com soma e contagem.
+    """
+
+    tipo = 'histogram'
+
+    def __init__(self, nome, ajuda, baldes=None):
+        super().__init__(nome, ajuda)
+        self.baldes = tuple(baldes or METRICAS_CONFIG['baldes_segundos'])
+
+    def observar(self, valor, **rotulos):
+        chave = tuple(sorted(rotulos.items()))
+        with self._lock:
+            serie = self._series.get(chave)
+            if serie is None:
+                serie = self._series[chave] = [[0] * (len(self.baldes) + 1), 0.0]
+            serie[0][bisect.bisect_left(self.baldes, valor)] += 1
+            serie[1] += valor
+
+    @staticmethod
+    def _copiar(valor):
+        return [list(valor[0]), valor[1]]
+
+    def _amostras(self, rotulos, valor):
+        contagens, soma = valor
+        linhas, acumulado = [], 0
+        for limite, contagem in zip((*self.baldes, float('inf')), contagens):
+            acumulado += contagem
+            linhas.append(f"{self.nome}_bucket{_rotulos((*rotulos, ('le', _numero(float(limite)))))} {acumulado}")
+        linhas.append(f"{self.nome}_count{_rotulos(rotulos)} {acumulado}")
+        linhas.append(f"{self.nome}_sum{_rotulos(rotulos)} {_numero(soma)}")
+        return linhas
+
+
+def _tamanhos_armazenamento():
+    """
+    Tamanho em disco de cada arquivo de dados monitorado, por componente.
+    """
+    valores = []
+    with _lock:
+        armazenamentos = dict(_armazenamentos)
+    for arquivo, data_manager in armazenamentos.items():
+        componentes = {
+            'dados': [arquivo, f"{arquivo}-wal"],
+            'snapshot': [data_manager.caminho_auxiliar('snapshot.arrow')],
+            'arquivo_morto': [
+                os.path.join(raiz, nome)
+                for raiz, _, nomes in os.walk(data_manager.caminho_auxiliar('arquivo_morto')) for nome in nomes
+            ]
+        }
+        for componente, caminhos in componentes.items():
+            tamanho = sum(os.path.getsize(caminho) for caminho in caminhos if os.path.exists(caminho))
+            valores.append(({'arquivo': os.path.basename(arquivo), 'componente': componente}, tamanho))
+    return valores
+
+
+OPERACAO_SEGUNDOS = Histograma('operacao_segundos', "Duração das operações do DataManager em segundos.")
+OPERACAO_FALHAS = Contador('operacao_falhas', "Operações do DataManager que falharam.")
+CACHE_CONSULTAS = Contador('cache_consultas', "Consultas aos caches, por resultado (acerto ou falha).")
+REGISTROS = Medidor('registros', "Registros diários na última leitura dos dados.")
+ARMAZENAMENTO_BYTES = Medidor('armazenamento_bytes', "Tamanho em disco dos dados em bytes.", _tamanhos_armazenamento)
+EXECUCAO_SEGUNDOS = Histograma('execucao_segundos', "Duração das execuções completas do app por página em segundos.")
+PRONTO = Medidor(
+    'pronto', "1 quando a verificação de prontidão passa (ex.: aquecimento concluído).",
+    lambda: [({'verificacao': nome}, int(pronto)) for nome, pronto in verificar_prontidao().items()]
+)
+
+
+def medir_operacao(operacao):
+    """
+    Decorador que registra a duração de uma operação do DataManager e conta
+    como falha as chamadas que levantam exceção ou retornam False.
+
+    Args:
+        operacao (str): Rótulo 'operacao' das métricas
+    """
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def medida(*args, **kwargs):
+            inicio = time.perf_counter()
+            falhou = True
+            try:
+                resultado = funcao(*args, **kwargs)
+                falhou = resultado is False
+                return resultado
+            finally:
+                OPERACAO_SEGUNDOS.observar(time.perf_counter() - inicio, operacao=operacao)
+                if falhou:
+                    OPERACAO_FALHAS.incrementar(operacao=operacao)
+        return medida
+    return decorador
+
+
+def monitorar_armazenamento(data_manager):
+    """
+    Inclui o arquivo de dados em hub_tickets_armazenamento_bytes.
+
+    Args:
+        data_manager (DataManager): Gerenciador do arquivo de dados
+    """
+    with _lock:
+        _armazenamentos.setdefault(os.path.abspath(data_manager.arquivo_excel), data_manager)
+
+
+def registrar_prontidao(nome, verificar):
+    """
+    Registra uma verificação de prontidão do processo, exposta em /pronto.
+
+    Args:
+        nome (str): Nome da verificação
+        verificar (callable): Retorna True quando o processo está pronto
+    """
+    with _lock:
+        _prontidao[nome] = verificar
+
+
+def verificar_prontidao():
+    """
+    Returns:
+        dict: Verificação -> resultado
+    """
+    with _lock:
+        verificacoes = dict(_prontidao)
+    return {nome: bool(verificar()) for nome, verificar in verificacoes.items()}
+
+
+def gerar_texto():
+    """
+    Returns:
+        bytes: Todas as métricas do processo no formato OpenMetrics
+    """
+    with _lock:
+        metricas = list(_metricas)
+    linhas = [linha for metrica in metricas for linha in metrica.linhas()]
+    return ('\n'.join(linhas + ['# EOF']) + '\n').encode('utf-8')
+
+
+class ManipuladorMetricas(BaseHTTPRequestHandler):
+    """
+    Responde em /metrics com as métricas do processo e em /pronto com 200 ou
+    503 conforme as verificações de prontidão.
+    """
+
+    def do_GET(self):
+        caminho = self.path.split('?')[0]
+        if caminho == '/pronto':
+            verificacoes = verificar_prontidao()
+            status = 200 if all(verificacoes.values()) else 503
+            corpo = json.dumps(verificacoes).encode('utf-8')
+            tipo = 'application/json'
+        elif caminho == '/metrics':
+            status, corpo, tipo = 200, gerar_texto(), TIPO_CONTEUDO
+        else:
+            self.send_error(404)
+            return
+        self.send_response(status)
+        self.send_header('Content-Type', tipo)
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, formato, *args):
+        pass
+
+
+def iniciar_exportador(host=None, porta=None):
+    """
+    Inicia, uma vez por processo, o servidor local de métricas em uma thread.
+
+    Args:
+        host (str): Endereço de escuta (padrão: METRICAS_CONFIG['host'])
+        porta (int): Porta de escuta (padrão: METRICAS_CONFIG['porta'])
+
+    Returns:
+        ThreadingHTTPServer: Servidor em execução, ou None se a porta estiver em uso
+    """
+    global _exportador
+    with _lock:
+        # False: a porta estava em uso na primeira tentativa
+        if _exportador is not None:
+            return _exportador or None
+        try:
+            servidor = ThreadingHTTPServer(
+                (host or METRICAS_CONFIG['host'], porta or METRICAS_CONFIG['porta']), ManipuladorMetricas
+            )
+        except OSError as e:
+            print(f"Exportador de métricas desativado neste processo: {e}")
+            _exportador = False
+            return None
+        servidor.daemon_threads = True
+        threading.Thread(target=servidor.serve_forever, name='metricas', daemon=True).start()
+        _exportador = servidor
+    return servidor
@@ -0,0 +1,303 @@
+"""
+Migração em streaming de planilhas para o banco SQLite.
+
+Planilhas grandes (o dados_tickets.xlsx antigo e os backup_dados_tickets_*.xlsx)
+são lidas linha a linha com o openpyxl em modo somente leitura, sem carregar a
+planilha inteira na memória. Cada lote de linhas é convertido para o esquema
+canônico (data, contadores inteiros, links como texto), validado com
+utils.validar_lote e gravado no banco em uma transação, junto com a posição
+alcançada na planilha. Se a migração for interrompida, rodá-la de novo
+continua do último lote gravado; se a planilha mudou desde então, ela é
+migrada desde o início.
+
+Quando o mesmo dia aparece em mais de uma planilha, vale o da primeira
+planilha migrada: liste primeiro o arquivo mais recente. Dentro de uma
+planilha, vale a primeira linha do dia, qualquer que seja o lote.
+
+Uso pela linha de comando:
+    python migrar_xlsx.py dados_tickets.db dados_tickets.xlsx backup_dados_tickets_*.xlsx
+"""
+
+import argparse
+import json
+import os
+import resource
+import time
+from collections import Counter
+from datetime import date, datetime
+
+import pandas as pd
+
+from data_manager import CONTADORES, DataManager
+
+MIGRACAO_CONFIG = {
+    'tamanho_lote': 5000,               # Linhas por transação
+    'intervalo_progresso_segundos': 2   # Intervalo mínimo entre mensagens de progresso
+}
+
+# Chave da posição de cada planilha na tabela meta do banco
+PREFIXO_PROGRESSO = 'migracao:'
+
+INSERIR = (
+    "INSERT INTO registros (data, tickets_iniciados, tickets_finalizados, tickets_andamento, links_chamados) "
+    "VALUES (?, ?, ?, ?, ?) ON CONFLICT(data) DO NOTHING"
+)
+
+
+def _assinatura(caminho):
+    """
+    Identifica o conteúdo de uma planilha sem lê-la.
+    """
+    info = os.stat(caminho)
+    return f"{info.st_mtime_ns:x}-{info.st_size:x}"
+
+
+def _converter_data(valor):
+    """
+    Converte uma célula de data (data do Excel, texto AAAA-MM-DD ou DD/MM/AAAA).
+
+    Returns:
+        date: Data convertida, ou None se a célula não for uma data
+    """
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    if isinstance(valor, str):
+        texto = valor.strip()
+        for formato in ('%Y-%m-%d', '%d/%m/%Y'):
+            try:
+                return datetime.strptime(texto[:10], formato).date()
+            except ValueError:
+                continue
+    return None
+
+
+def pico_memoria_mb():
+    """
+    Pico de memória residente do processo atual (VmHWM, que ao contrário do
+    ru_maxrss não herda o pico do processo que o criou).
+
+    Returns:
+        float: Pico em MB
+    """
+    try:
+        with open('/proc/self/status') as status:
+            for linha in status:
+                if linha.startswith('VmHWM:'):
+                    return int(linha.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss é em KB no Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class MigracaoXlsx:
+    """
+    Migra planilhas para um banco SQLite em lotes de memória limitada.
+    """
+
+    def __init__(self, destino, tamanho_lote=None, progresso=print):
+        """
+        Args:
+            destino (str): Banco SQLite de destino (criado se não existir)
+            tamanho_lote (int): Linhas por transação (padrão: MIGRACAO_CONFIG)
+            progresso (callable): Recebe as mensagens de progresso
+
+        Raises:
+            ValueError: Se o destino não for um banco SQLite
+        """
+        self.data_manager = DataManager(destino)
+        if self.data_manager.sqlite is None:
+            raise ValueError(f"O destino da migração deve ser um banco SQLite: {destino}")
+        self.sqlite = self.data_manager.sqlite
+        self.tamanho_lote = tamanho_lote or MIGRACAO_CONFIG['tamanho_lote']
+        self.progresso = progresso
+
+    def posicao_salva(self, origem):
+        """
+        Args:
+            origem (str): Planilha de origem
+
+        Returns:
+            dict: {'assinatura', 'linha', 'concluida'} da última migração, ou None
+        """
+        with self.sqlite.conexao() as con:
+            linha = con.execute(
+                "SELECT valor FROM meta WHERE chave = ?", (PREFIXO_PROGRESSO + os.path.abspath(origem),)
+            ).fetchone()
+        return json.loads(linha[0]) if linha else None
+
+    def migrar(self, origens):
+        """
+        Migra as planilhas em ordem.
+
+        Args:
+            origens (list): Planilhas de origem
+
+        Returns:
+            list: Resumo de cada planilha (ver migrar_planilha)
+        """
+        resumos = [self.migrar_planilha(origem) for origem in origens]
+        # Uma execução interrompida pode ter gravado as linhas sem chegar aqui:
+        # toda planilha concluída agora invalida as estruturas derivadas
+        if any(resumo['concluida'] for resumo in resumos):
+            self.data_manager.invalidar_derivados()
+        return resumos
+
+    def migrar_planilha(self, origem):
+        """
+        Migra uma planilha, retomando da posição salva quando possível.
+
+        Args:
+            origem (str): Planilha de origem
+
+        Returns:
+            dict: Linhas lidas, gravadas, já existentes no banco, vazias,
+            repetidas (dia já visto na planilha) e rejeitadas (com a contagem
+            por regra de validação), tempo, linhas por segundo e se a
+            planilha foi concluída nesta execução
+        """
+        from openpyxl import load_workbook
+
+        nome = os.path.basename(origem)
+        chave = PREFIXO_PROGRESSO + os.path.abspath(origem)
+        assinatura = _assinatura(origem)
+        salva = self.posicao_salva(origem)
+        if salva is not None and salva['assinatura'] != assinatura:
+            self.progresso(f"🔄 {nome} mudou desde a última migração; migrando desde o início")
+            salva = None
+
+        resumo = {
+            'planilha': origem, 'lidas': 0, 'gravadas': 0, 'existentes': 0, 'vazias': 0, 'repetidas': 0,
+            'rejeitadas': 0, 'regras': Counter(), 'segundos': 0.0, 'linhas_por_segundo': 0.0, 'concluida': False
+        }
+        if salva is not None and salva['concluida']:
+            self.progresso(f"⏭️ {nome} já migrada")
+            return resumo
+
+        wb = load_workbook(origem, read_only=True, data_only=True)
+        try:
+            planilha = wb.active
+            cabecalho = next(planilha.iter_rows(max_row=1, values_only=True), ())
+            posicoes = {coluna: posicao for posicao, coluna in enumerate(cabecalho) if coluna is not None}
+            faltantes = [coluna for coluna in ('data', *CONTADORES) if coluna not in posicoes]
+            if faltantes:
+                raise ValueError(f"{nome}: colunas obrigatórias ausentes: {', '.join(faltantes)}")
+
+            inicial = salva['linha'] if salva is not None else 1
+            if inicial > 1:
+                self.progresso(f"▶️ {nome}: retomando após a linha {inicial}")
+            total = planilha.max_row
+            inicio = ultimo_aviso = time.perf_counter()
+            lote = []
+            vistas = set()
+
+            def gravar(ultima, concluida=False):
+                self._gravar_lote(lote, posicoes, chave, assinatura, ultima, concluida, resumo, vistas)
+                lote.clear()
+
+            numero = inicial
+            for numero, linha in enumerate(planilha.iter_rows(min_row=inicial + 1, values_only=True), start=inicial + 1):
+                resumo['lidas'] += 1
+                if all(celula is None for celula in linha):
+                    resumo['vazias'] += 1
+                    continue
+                lote.append((numero, linha))
+                if len(lote) >= self.tamanho_lote:
+                    gravar(numero)
+                    agora = time.perf_counter()
+                    if agora - ultimo_aviso >= MIGRACAO_CONFIG['intervalo_progresso_segundos']:
+                        ultimo_aviso = agora
+                        percentual = f" de {total} ({100 * numero / total:.0f}%)" if total else ""
+                        self.progresso(f"   {nome}: linha {numero}{percentual}, "
+                                       f"{resumo['lidas'] / (agora - inicio):,.0f} linhas/s")
+            gravar(numero, concluida=True)
+            resumo['concluida'] = True
+        finally:
+            wb.close()
+
+        resumo['segundos'] = time.perf_counter() - inicio
+        resumo['linhas_por_segundo'] = resumo['lidas'] / resumo['segundos'] if resumo['segundos'] else 0.0
+        self.progresso(
+            f"✅ {nome}: {resumo['lidas']} linhas lidas, {resumo['gravadas']} gravadas, "
+            f"{resumo['existentes']} já existentes, {resumo['repetidas']} repetidas, {resumo['rejeitadas']} rejeitadas "
+            f"em {resumo['segundos']:.1f} s ({resumo['linhas_por_segundo']:,.0f} linhas/s)"
+        )
+        return resumo
+
+    def _gravar_lote(self, lote, posicoes, chave, assinatura, ultima, concluida, resumo, vistas):
+        """
+        Converte, valida e grava um lote junto com a posição alcançada.
+        Linhas de um dia já visto na planilha são descartadas antes da
+        validação: vale a primeira, esteja ela neste lote ou em um anterior.
+
+        Args:
+            lote (list): Tuplas (número da linha na planilha, valores)
+            posicoes (dict): Coluna -> posição na linha
+            chave (str): Chave da posição na tabela meta
+            assinatura (str): Assinatura da planilha
+            ultima (int): Última linha da planilha coberta pelo lote
+            concluida (bool): Se é o último lote da planilha
+            resumo (dict): Contagens atualizadas em lugar
+            vistas (set): Dias já lidos da planilha, atualizado em lugar
+        """
+        from utils import validar_lote
+
+        def coluna(nome):
+            posicao = posicoes.get(nome)
+            return [linha[posicao] if posicao is not None and posicao < len(linha) else None for _, linha in lote]
+
+        registros = pd.DataFrame(
+            {
+                'data': pd.to_datetime([_converter_data(valor) for valor in coluna('data')]),
+                **{contador: pd.to_numeric(pd.Series(coluna(contador), dtype=object), errors='coerce').to_numpy()
+                   for contador in CONTADORES},
+                'links_chamados': [str(valor) if valor is not None else '' for valor in coluna('links_chamados')]
+            },
+            index=[numero for numero, _ in lote]
+        )
+
+        datas = registros['data']
+        repetidas = datas.notna() & (datas.duplicated() | datas.isin(vistas))
+        vistas.update(datas[datas.notna()])
+        resumo['repetidas'] += int(repetidas.sum())
+        registros = registros[~repetidas]
+
+        validos = registros
+        if not registros.empty:
+            relatorio = validar_lote(registros)
+            erros = relatorio[relatorio['nivel'] == 'erro']
+            resumo['regras'].update(erros['regra'])
+            validos = registros.drop(index=erros['linha'].unique())
+            resumo['rejeitadas'] += len(registros) - len(validos)
+
+        with self.sqlite.transacao() as con:
+            gravadas = con.executemany(INSERIR, (
+                (
+                    linha.data.date().isoformat(), int(linha.tickets_iniciados),
+                    int(linha.tickets_finalizados), int(linha.tickets_andamento), linha.links_chamados
+                )
+                for linha in validos.itertuples()
+            )).rowcount if not validos.empty else 0
+            con.execute(
+                "INSERT INTO meta (chave, valor) VALUES (?, ?) ON CONFLICT(chave) DO UPDATE SET valor = excluded.valor",
+                (chave, json.dumps({'assinatura': assinatura, 'linha': ultima, 'concluida': concluida}))
+            )
+        resumo['gravadas'] += gravadas
+        resumo['existentes'] += len(validos) - gravadas
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migra planilhas para o banco SQLite em streaming")
+    parser.add_argument('destino', help="Banco SQLite de destino (.db)")
+    parser.add_argument('origens', nargs='+', help="Planilhas de origem, da mais recente para a mais antiga")
+    parser.add_argument('--lote', type=int, default=None, help="Linhas por transação")
+    args = parser.parse_args()
+
+    resumos = MigracaoXlsx(args.destino, args.lote).migrar(args.origens)
+    regras = sum((resumo['regras'] for resumo in resumos), Counter())
+    print(f"\n📦 Total: {sum(r['gravadas'] for r in resumos)} registros gravados, "
+          f"{sum(r['rejeitadas'] for r in resumos)} rejeitados"
+          + (f" ({', '.join(f'{regra}: {n}' for regra, n in regras.most_common())})" if regras else ""))
+    print(f"🧠 Pico de memória: {pico_memoria_mb():.1f} MB")
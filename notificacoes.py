@@ -0,0 +1,205 @@
+"""
+Notificações de alteração dos dados para as sessões abertas.
+
+Um Notificador por arquivo de dados e por processo guarda em memória a versão
+atual dos dados (DataManager.versao_dados) e avisa os assinantes quando ela
+muda. A versão é atualizada por dois caminhos:
+
+- gravações feitas pelo DataManager neste processo publicam a nova versão na
+  hora (pub/sub em processo);
+- gravações de outros processos (outras instâncias do app, a API, scripts)
+  são percebidas por um observador do diretório dos dados (inotify, pelo
+  watchdog) ou, sem ele, por uma consulta periódica à versão, feita por uma
+  única thread do processo, e não a cada execução de cada sessão.
+
+As sessões do Streamlit leem só a versão em memória (ver app.py), e as
+leituras do DataManager usam essa versão em vez de consultar o armazenamento
+(DataManager.versao_atual).
+"""
+
+import os
+import threading
+import time
+
+NOTIFICACOES_CONFIG = {
+    'intervalo_consulta_segundos': 1.0,     # Sem inotify: intervalo entre consultas à versão
+    'intervalo_seguranca_segundos': 30.0,   # Com inotify: consulta de segurança (ex.: arquivo morto)
+    'atualizacao_sessoes_segundos': 2       # Intervalo em que cada sessão confere a versão em memória
+}
+
+_notificadores = {}
+_lock_notificadores = threading.Lock()
+
+
+class Notificador:
+    """
+    Versão atual de um arquivo de dados, mantida por uma thread de fundo, com
+    assinantes avisados a cada mudança.
+    """
+
+    def __init__(self, data_manager):
+        """
+        Args:
+            data_manager (DataManager): Gerenciador usado para consultar a versão
+        """
+        self.data_manager = data_manager
+        self.versao = data_manager.versao_dados()
+        self.momento = time.time()
+        self.modo = None
+        self._assinantes = []
+        self._lock = threading.Lock()
+        self._alteracao = threading.Event()
+        self._parar = threading.Event()
+        self._thread = None
+        self._observador = None
+
+    @property
+    def ativo(self):
+        """
+        Returns:
+            bool: True enquanto a thread de fundo mantém a versão atualizada
+        """
+        return self._thread is not None and self._thread.is_alive()
+
+    def iniciar(self):
+        """
+        Inicia o observador do diretório (se o watchdog estiver disponível) e a
+        thread que confere a versão.
+        """
+        if self.ativo:
+            return
+        self._parar.clear()
+        self.modo = 'consulta'
+        try:
+            self._observador = self._observar_diretorio()
+            self.modo = 'inotify'
+        except Exception as e:
+            # Sem watchdog ou sem suporte no sistema de arquivos (ex.: rede)
+            if not isinstance(e, ImportError):
+                print(f"Observador de arquivos indisponível, consultando a versão periodicamente: {e}")
+        self._thread = threading.Thread(target=self._executar, name='notificador-dados', daemon=True)
+        self._thread.start()
+
+    def parar(self):
+        """
+        Encerra a thread de fundo e o observador do diretório.
+        """
+        self._parar.set()
+        self._alteracao.set()
+        if self._observador is not None:
+            self._observador.stop()
+            self._observador = None
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _observar_diretorio(self):
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+
+        arquivo = os.path.abspath(self.data_manager.arquivo_excel)
+        nome = os.path.basename(arquivo)
+        alteracao = self._alteracao
+
+        class Manipulador(FileSystemEventHandler):
+            def on_any_event(self, evento):
+                # O arquivo de dados e o -wal do SQLite; o -shm muda também em leituras
+                for caminho in (evento.src_path, getattr(evento, 'dest_path', '')):
+                    base = os.path.basename(caminho)
+                    if base.startswith(nome) and not base.endswith('-shm'):
+                        alteracao.set()
+                        return
+
+        observador = Observer()
+        observador.schedule(Manipulador(), os.path.dirname(arquivo), recursive=False)
+        observador.daemon = True
+        observador.start()
+        return observador
+
+    def _executar(self):
+        intervalo = NOTIFICACOES_CONFIG[
+            'intervalo_seguranca_segundos' if self.modo == 'inotify' else 'intervalo_consulta_segundos'
+        ]
+        while not self._parar.is_set():
+            self._alteracao.wait(intervalo)
+            self._alteracao.clear()
+            if self._parar.is_set():
+                break
+            try:
+                self.publicar(self.data_manager.versao_dados())
+            except Exception as e:
+                print(f"Erro ao consultar a versão dos dados: {e}")
+
+    def publicar(self, versao):
+        """
+        Registra uma nova versão dos dados e avisa os assinantes.
+
+        Args:
+            versao (str): Versão atual dos dados
+
+        Returns:
+            bool: True se a versão mudou
+        """
+        with self._lock:
+            if versao == self.versao:
+                return False
+            self.versao = versao
+            self.momento = time.time()
+            assinantes = list(self._assinantes)
+        for assinante in assinantes:
+            try:
+                assinante(versao)
+            except Exception as e:
+                print(f"Erro ao notificar alteração dos dados: {e}")
+        return True
+
+    def assinar(self, assinante):
+        """
+        Registra uma função chamada com a nova versão a cada alteração (na
+        thread que detectou a alteração).
+
+        Args:
+            assinante (callable): Recebe a nova versão
+
+        Returns:
+            callable: Cancela a assinatura
+        """
+        with self._lock:
+            self._assinantes.append(assinante)
+
+        def cancelar():
+            with self._lock:
+                if assinante in self._assinantes:
+                    self._assinantes.remove(assinante)
+        return cancelar
+
+
+def notificador_para(data_manager):
+    """
+    Notificador do arquivo de dados, criado e iniciado uma vez por processo.
+
+    Args:
+        data_manager (DataManager): Gerenciador do arquivo de dados
+
+    Returns:
+        Notificador: Notificador compartilhado por todas as instâncias do arquivo
+    """
+    chave = os.path.abspath(data_manager.arquivo_excel)
+    with _lock_notificadores:
+        notificador = _notificadores.get(chave)
+        if notificador is None:
+            notificador = _notificadores[chave] = Notificador(data_manager)
+            notificador.iniciar()
+    return notificador
+
+
+def publicar_gravacao(data_manager):
+    """
+    Publica a versão gravada por este processo, se o arquivo tiver notificador.
+
+    Args:
+        data_manager (DataManager): Gerenciador que acabou de gravar
+    """
+    notificador = _notificadores.get(os.path.abspath(data_manager.arquivo_excel))
+    if notificador is not None:
+        notificador.publicar(data_manager.versao_dados())
@@ -0,0 +1,292 @@
+"""
+Pirâmide temporal em múltiplas resoluções para os gráficos de linha.
+
+Cada nível (dia → semana → mês → trimestre) guarda, por período e contador,
+soma, mínimo, máximo e último valor. A pirâmide é mantida incrementalmente a
+cada gravação e os gráficos escolhem o nível adequado ao intervalo exibido.
+"""
+
+import bisect
+import json
+import os
+from datetime import date, timedelta
+
+import pandas as pd
+
+from data_manager import CONTADORES
+from gravacao_atomica import gravar_atomico
+
+# Níveis do mais detalhado ao mais agregado (aliases de pandas.Period)
+NIVEIS = {
+    'dia': 'D',
+    'semana': 'W',
+    'mes': 'M',
+    'trimestre': 'Q'
+}
+
+PIRAMIDE_CONFIG = {
+    # É escolhido o nível mais agregado que ainda tenha ao menos estes pontos
+    'pontos_alvo': 150
+}
+
+
+def inicio_periodo(data_ref, nivel):
+    """
+    Retorna o primeiro dia do período do nível que contém a data.
+
+    Args:
+        data_ref (date): Data de referência
+        nivel (str): Uma das chaves de NIVEIS
+
+    Returns:
+        date: Início do período
+    """
+    if nivel == 'dia':
+        return data_ref
+    if nivel == 'semana':
+        return data_ref - timedelta(days=data_ref.weekday())
+    if nivel == 'mes':
+        return data_ref.replace(day=1)
+    if nivel == 'trimestre':
+        return date(data_ref.year, 3 * ((data_ref.month - 1) // 3) + 1, 1)
+    raise ValueError(f"Nível inválido: {nivel}")
+
+
+def fim_periodo(inicio, nivel):
+    """
+    Retorna o último dia do período que começa em `inicio`.
+    """
+    if nivel == 'dia':
+        return inicio
+    if nivel == 'semana':
+        return inicio + timedelta(days=6)
+    meses = 1 if nivel == 'mes' else 3
+    ano, mes = divmod(inicio.month - 1 + meses, 12)
+    return date(inicio.year + ano, mes + 1, 1) - timedelta(days=1)
+
+
+def _combinar(filhos):
+    """
+    Combina os resumos de vários períodos (em ordem cronológica) em um só.
+    """
+    resumo = {'dias': sum(filho['dias'] for filho in filhos)}
+    for contador in CONTADORES:
+        estatisticas = [filho[contador] for filho in filhos]
+        resumo[contador] = [
+            sum(e[0] for e in estatisticas),
+            min(e[1] for e in estatisticas),
+            max(e[2] for e in estatisticas),
+            estatisticas[-1][3]
+        ]
+    return resumo
+
+
+class PiramideTemporal:
+    """
+    Resumos por período em cada nível, indexados pela data de início (ISO).
+    Pode ser persistida em JSON ao lado dos dados, com a versão dos dados que
+    reflete, ou montada em memória a partir de qualquer DataFrame (ex.: dados
+    já filtrados).
+    """
+
+    def __init__(self, caminho=None):
+        """
+        Args:
+            caminho (str): Arquivo JSON de persistência (opcional)
+        """
+        self.caminho = caminho
+        self.niveis = {nivel: {} for nivel in NIVEIS}
+        self._chaves_ordenadas = {}
+        self.desatualizado = True
+        self.versao = None
+        if caminho and os.path.exists(caminho):
+            try:
+                with open(caminho, encoding='utf-8') as arquivo:
+                    salvo = json.load(arquivo)
+                self.niveis = salvo['niveis']
+                self.desatualizado = salvo.get('desatualizado', False)
+                self.versao = salvo.get('versao')
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Erro ao ler pirâmide temporal, será reconstruída: {e}")
+
+    @classmethod
+    def de_dataframe(cls, df):
+        """
+        Monta uma pirâmide em memória (sem persistência) a partir de um DataFrame.
+        """
+        piramide = cls()
+        piramide.construir(df)
+        return piramide
+
+    def _salvar(self):
+        if not self.caminho:
+            return
+        gravar_atomico(self.caminho, json.dumps(
+            {'niveis': self.niveis, 'desatualizado': self.desatualizado, 'versao': self.versao}
+        ))
+
+    def construir(self, df):
+        """
+        Recalcula todos os níveis a partir do histórico com group-bys vetorizados.
+
+        Args:
+            df (pd.DataFrame): Histórico ordenado por data
+        """
+        self.niveis = {nivel: {} for nivel in NIVEIS}
+        self._chaves_ordenadas = {}
+
+        if not df.empty:
+            base = df[['data', *CONTADORES]]
+            for nivel, alias in NIVEIS.items():
+                chave = base['data'].dt.to_period(alias).dt.start_time.dt.strftime('%Y-%m-%d')
+                grupos = base.groupby(chave, sort=True)
+                agregado = grupos[list(CONTADORES)].agg(['sum', 'min', 'max', 'last'])
+                dias = grupos.size()
+                resumos = self.niveis[nivel]
+                for inicio, linha in zip(agregado.index, agregado.itertuples(index=False)):
+                    resumo = {'dias': int(dias[inicio])}
+                    for posicao, contador in enumerate(CONTADORES):
+                        resumo[contador] = [float(v) for v in linha[posicao * 4:posicao * 4 + 4]]
+                    resumos[inicio] = resumo
+
+        self.desatualizado = False
+        self._salvar()
+
+    def sincronizar(self, df, versao=None):
+        """
+        Reconstrói a pirâmide se ela estiver desatualizada (ex.: primeira
+        execução) ou for de outra versão dos dados.
+
+        Args:
+            df (pd.DataFrame): Histórico ordenado por data
+            versao (str): Versão dos dados de df (opcional)
+        """
+        if self.desatualizado or (versao is not None and versao != self.versao):
+            self.versao = versao
+            self.construir(df)
+
+    def atualizar_dia(self, data_registro, valores):
+        """
+        Grava ou substitui um dia e recalcula apenas os períodos que o contêm.
+
+        Args:
+            data_registro (date): Data do registro
+            valores (dict): Valor de cada contador em CONTADORES
+        """
+        if self.desatualizado:
+            return
+        self.niveis['dia'][data_registro.isoformat()] = {
+            'dias': 1,
+            **{contador: [float(valores[contador])] * 4 for contador in CONTADORES}
+        }
+        self._propagar(data_registro)
+
+    def remover_dia(self, data_registro):
+        """
+        Remove um dia e recalcula apenas os períodos que o continham.
+
+        Args:
+            data_registro (date): Data do registro excluído
+        """
+        if self.desatualizado:
+            return
+        self.niveis['dia'].pop(data_registro.isoformat(), None)
+        self._propagar(data_registro)
+
+    def _propagar(self, data_registro):
+        self._chaves_ordenadas = {}
+        dias = self.niveis['dia']
+
+        for nivel in ('semana', 'mes'):
+            inicio = inicio_periodo(data_registro, nivel)
+            fim = fim_periodo(inicio, nivel)
+            filhos = [
+                dias[chave] for chave in (
+                    (inicio + timedelta(days=n)).isoformat() for n in range((fim - inicio).days + 1)
+                ) if chave in dias
+            ]
+            self._definir(nivel, inicio, filhos)
+
+        # Trimestres são combinados a partir dos meses
+        inicio = inicio_periodo(data_registro, 'trimestre')
+        meses = self.niveis['mes']
+        filhos = [
+            meses[chave] for chave in (
+                date(inicio.year, inicio.month + n, 1).isoformat() for n in range(3)
+            ) if chave in meses
+        ]
+        self._definir('trimestre', inicio, filhos)
+        self._salvar()
+
+    def _definir(self, nivel, inicio, filhos):
+        if filhos:
+            self.niveis[nivel][inicio.isoformat()] = _combinar(filhos)
+        else:
+            self.niveis[nivel].pop(inicio.isoformat(), None)
+
+    def _chaves(self, nivel):
+        if nivel not in self._chaves_ordenadas:
+            self._chaves_ordenadas[nivel] = sorted(self.niveis[nivel])
+        return self._chaves_ordenadas[nivel]
+
+    def _intervalo(self, nivel, data_inicio, data_fim):
+        """
+        Returns:
+            list: Chaves dos períodos do nível que se sobrepõem ao intervalo
+        """
+        chaves = self._chaves(nivel)
+        esquerda = 0 if data_inicio is None else bisect.bisect_left(
+            chaves, inicio_periodo(data_inicio, nivel).isoformat()
+        )
+        direita = len(chaves) if data_fim is None else bisect.bisect_right(chaves, data_fim.isoformat())
+        return chaves[esquerda:direita]
+
+    def escolher_nivel(self, data_inicio=None, data_fim=None, pontos_alvo=None):
+        """
+        Escolhe o nível mais agregado que ainda tenha ao menos `pontos_alvo`
+        pontos no intervalo; se nenhum tiver, usa o nível diário.
+
+        Returns:
+            str: Uma das chaves de NIVEIS
+        """
+        pontos_alvo = pontos_alvo or PIRAMIDE_CONFIG['pontos_alvo']
+        for nivel in reversed(list(NIVEIS)):
+            if len(self._intervalo(nivel, data_inicio, data_fim)) >= pontos_alvo:
+                return nivel
+        return 'dia'
+
+    def consultar(self, data_inicio=None, data_fim=None, pontos_alvo=None, nivel=None):
+        """
+        Retorna a série do intervalo na resolução adequada.
+
+        Args:
+            data_inicio (date): Início do intervalo (opcional)
+            data_fim (date): Fim do intervalo (opcional)
+            pontos_alvo (int): Número de pontos desejado (padrão: PIRAMIDE_CONFIG)
+            nivel (str): Força um nível específico (opcional)
+
+        Returns:
+            tuple: (nível usado, DataFrame com 'data', 'dias' e, por contador, a
+            média diária do período e as colunas _soma, _min, _max e _ultimo)
+        """
+        nivel = nivel or self.escolher_nivel(data_inicio, data_fim, pontos_alvo)
+        resumos = self.niveis[nivel]
+        linhas = []
+        for chave in self._intervalo(nivel, data_inicio, data_fim):
+            resumo = resumos[chave]
+            linha = {'data': chave, 'dias': resumo['dias']}
+            for contador in CONTADORES:
+                soma, minimo, maximo, ultimo = resumo[contador]
+                linha[contador] = soma / resumo['dias']
+                linha[f"{contador}_soma"] = soma
+                linha[f"{contador}_min"] = minimo
+                linha[f"{contador}_max"] = maximo
+                linha[f"{contador}_ultimo"] = ultimo
+            linhas.append(linha)
+
+        serie = pd.DataFrame(linhas, columns=['data', 'dias', *[
+            f"{contador}{sufixo}" for contador in CONTADORES
+            for sufixo in ('', '_soma', '_min', '_max', '_ultimo')
+        ]])
+        serie['data'] = pd.to_datetime(serie['data'])
+        return nivel, serie
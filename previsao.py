@@ -0,0 +1,241 @@
+"""
+Previsão e detecção de anomalias incrementais para os contadores de tickets.
+
+O modelo mantém, para cada contador, um nível suavizado exponencialmente (EWMA),
+a variância exponencial dos resíduos e um componente sazonal por dia da semana.
+Cada registro novo atualiza o estado em tempo constante, sem reler o histórico.
+"""
+
+import copy
+import json
+import math
+import os
+from datetime import date, timedelta
+
+from data_manager import CONTADORES
+from gravacao_atomica import gravar_atomico
+
+PREVISAO_CONFIG = {
+    'alfa': 0.2,             # Peso da observação nova no nível e na variância
+    'alfa_sazonal': 0.1,     # Peso da observação nova no componente do dia da semana
+    'limite_desvios': 3.0,   # |z| acima deste valor marca o dia como anômalo
+    'aquecimento': 14,       # Registros mínimos antes de emitir alertas
+    'max_alertas': 90        # Alertas mais recentes mantidos no estado
+}
+
+
+def _estado_inicial():
+    return {
+        'ultima_data': None,
+        'registros': 0,
+        'contadores': {
+            contador: {'nivel': None, 'variancia': 0.0, 'sazonal': [0.0] * 7}
+            for contador in CONTADORES
+        },
+        'alertas': []
+    }
+
+
+class ModeloEWMA:
+    """
+    Estado do modelo persistido em um arquivo JSON ao lado dos dados.
+
+    Registros devem chegar em ordem cronológica. Regravar o último dia é O(1),
+    pois o estado anterior a ele é guardado; alterar um dia mais antigo marca o
+    modelo como desatualizado e ele é reconstruído na próxima leitura. O estado
+    guarda a versão dos dados que reflete: com dados alterados fora do
+    DataManager (ex.: planilha editada à mão), ele é reconstruído.
+    """
+
+    def __init__(self, caminho_estado):
+        """
+        Args:
+            caminho_estado (str): Arquivo JSON onde o estado é persistido
+        """
+        self.caminho_estado = caminho_estado
+        self.estado = None
+        self.anterior = None
+        self.versao = None
+        # Sem estado salvo, não há como saber se o histórico já existia
+        self.desatualizado = True
+        self._carregar()
+
+    def _carregar(self):
+        if not os.path.exists(self.caminho_estado):
+            return
+        try:
+            with open(self.caminho_estado, encoding='utf-8') as arquivo:
+                salvo = json.load(arquivo)
+            self.estado = salvo['estado']
+            self.anterior = salvo.get('anterior')
+            self.desatualizado = salvo.get('desatualizado', False)
+            self.versao = salvo.get('versao')
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Erro ao ler estado da previsão, será reconstruído: {e}")
+
+    def _salvar(self):
+        gravar_atomico(self.caminho_estado, json.dumps({
+            'estado': self.estado,
+            'anterior': self.anterior,
+            'desatualizado': self.desatualizado,
+            'versao': self.versao
+        }))
+
+    def _invalidar(self):
+        self.desatualizado = True
+        self._salvar()
+
+    def atualizar_dia(self, data_registro, valores):
+        """
+        Incorpora um registro diário ao modelo em tempo constante.
+
+        Args:
+            data_registro (date): Data do registro
+            valores (dict): Valor de cada contador em CONTADORES
+        """
+        if self.desatualizado:
+            return
+
+        data_iso = data_registro.isoformat()
+        ultima = self.estado['ultima_data']
+
+        if ultima is not None and data_iso < ultima:
+            self._invalidar()
+            return
+
+        if data_iso == ultima:
+            if self.anterior is None:
+                self._invalidar()
+                return
+            # Regravação do último dia: parte do estado anterior a ele
+            self.estado = copy.deepcopy(self.anterior)
+        else:
+            self.anterior = copy.deepcopy(self.estado)
+
+        self._aplicar(data_registro, valores)
+        self._salvar()
+
+    def remover_dia(self, data_registro):
+        """
+        Desfaz um registro excluído. Só é O(1) para o último dia registrado.
+
+        Args:
+            data_registro (date): Data do registro excluído
+        """
+        if self.desatualizado:
+            return
+
+        if data_registro.isoformat() == self.estado['ultima_data'] and self.anterior is not None:
+            self.estado, self.anterior = self.anterior, None
+            self._salvar()
+        else:
+            self._invalidar()
+
+    def _aplicar(self, data_registro, valores):
+        config = PREVISAO_CONFIG
+        dia_semana = data_registro.weekday()
+        alertas = [a for a in self.estado['alertas'] if a['data'] != data_registro.isoformat()]
+
+        for contador in CONTADORES:
+            estado = self.estado['contadores'][contador]
+            valor = float(valores[contador])
+
+            if estado['nivel'] is None:
+                estado['nivel'] = valor
+                continue
+
+            sazonal = estado['sazonal']
+            esperado = estado['nivel'] + sazonal[dia_semana]
+            residuo = valor - esperado
+
+            desvio = math.sqrt(estado['variancia'])
+            if self.estado['registros'] >= config['aquecimento'] and desvio > 0:
+                z = residuo / desvio
+                if abs(z) > config['limite_desvios']:
+                    alertas.append({
+                        'data': data_registro.isoformat(),
+                        'contador': contador,
+                        'valor': valor,
+                        'esperado': esperado,
+                        'z': z
+                    })
+                    # Limitar o peso do dia anômalo para não distorcer a previsão
+                    valor = esperado + math.copysign(config['limite_desvios'] * desvio, residuo)
+                    residuo = valor - esperado
+
+            estado['nivel'] += config['alfa'] * (valor - sazonal[dia_semana] - estado['nivel'])
+            sazonal[dia_semana] += config['alfa_sazonal'] * (valor - estado['nivel'] - sazonal[dia_semana])
+            estado['variancia'] = (1 - config['alfa']) * (estado['variancia'] + config['alfa'] * residuo ** 2)
+
+        self.estado['alertas'] = alertas[-config['max_alertas']:]
+        self.estado['ultima_data'] = data_registro.isoformat()
+        self.estado['registros'] += 1
+
+    def reconstruir(self, df):
+        """
+        Recalcula o estado a partir do histórico completo. Usado apenas quando o
+        modelo está desatualizado (primeira execução ou edição de dias antigos).
+
+        Args:
+            df (pd.DataFrame): Histórico ordenado por data
+        """
+        self.estado = _estado_inicial()
+        self.anterior = None
+        linhas = list(df[['data', *CONTADORES]].itertuples(index=False))
+        for posicao, linha in enumerate(linhas):
+            if posicao == len(linhas) - 1:
+                self.anterior = copy.deepcopy(self.estado)
+            self._aplicar(linha.data.date(), linha._asdict())
+        self.desatualizado = False
+        self._salvar()
+
+    def sincronizar(self, df, versao=None):
+        """
+        Reconstrói o modelo se ele estiver desatualizado ou for de outra
+        versão dos dados.
+
+        Args:
+            df (pd.DataFrame): Histórico ordenado por data
+            versao (str): Versão dos dados de df (opcional)
+        """
+        if self.desatualizado or (versao is not None and versao != self.versao):
+            self.versao = versao
+            self.reconstruir(df)
+
+    def prever(self, dias=7):
+        """
+        Prevê os próximos dias a partir do último registro.
+
+        Args:
+            dias (int): Número de dias a prever
+
+        Returns:
+            list: Um dicionário por dia com a data e, por contador, o valor
+            previsto e o intervalo de ~95%
+        """
+        if self.desatualizado or self.estado['ultima_data'] is None:
+            return []
+
+        ultima = date.fromisoformat(self.estado['ultima_data'])
+        previsao = []
+        for passo in range(1, dias + 1):
+            data_prevista = ultima + timedelta(days=passo)
+            linha = {'data': data_prevista}
+            for contador in CONTADORES:
+                estado = self.estado['contadores'][contador]
+                valor = max(estado['nivel'] + estado['sazonal'][data_prevista.weekday()], 0.0)
+                margem = 1.96 * math.sqrt(estado['variancia'])
+                linha[contador] = valor
+                linha[f"{contador}_min"] = max(valor - margem, 0.0)
+                linha[f"{contador}_max"] = valor + margem
+            previsao.append(linha)
+        return previsao
+
+    def alertas(self):
+        """
+        Returns:
+            list: Dias marcados como anômalos, do mais recente para o mais antigo
+        """
+        if self.desatualizado:
+            return []
+        return list(reversed(self.estado['alertas']))
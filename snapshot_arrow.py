@@ -0,0 +1,86 @@
+"""
+Snapshot Arrow IPC dos dados, compartilhado entre processos.
+
+Após cada gravação o DataManager publica os dados em um arquivo Arrow IPC ao
+lado do arquivo principal, marcado com a versão dos dados. Cada processo mapeia
+esse arquivo em memória (sem cópia) e o reutiliza enquanto a versão não muda;
+como o sistema operacional compartilha as páginas mapeadas, vários processos do
+Streamlit no mesmo host mantêm uma única cópia residente dos dados.
+
+A troca é atômica: o novo snapshot é escrito em um arquivo temporário e
+renomeado sobre o anterior. Leitores que ainda usam a versão antiga continuam
+com o mapeamento dela até liberá-lo.
+"""
+
+import threading
+
+import pyarrow as pa
+
+from gravacao_atomica import gravacao_atomica
+
+# Tabelas mapeadas neste processo: caminho -> (versão, tabela)
+_mapeados = {}
+_lock = threading.Lock()
+
+
+def publicar(df, caminho, versao):
+    """
+    Grava o snapshot de forma atômica.
+
+    Args:
+        df (pd.DataFrame): Dados normalizados
+        caminho (str): Arquivo .arrow de destino
+        versao (str): Versão dos dados que o snapshot representa
+    """
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+    metadados = dict(tabela.schema.metadata or {})
+    metadados[b'versao'] = versao.encode('utf-8')
+    tabela = tabela.replace_schema_metadata(metadados)
+
+    with gravacao_atomica(caminho) as temporario:
+        with pa.OSFile(temporario, 'wb') as destino, pa.ipc.new_file(destino, tabela.schema) as escritor:
+            escritor.write_table(tabela)
+
+
+def ler(caminho, versao):
+    """
+    Retorna a tabela mapeada em memória se o snapshot corresponder à versão.
+
+    Args:
+        caminho (str): Arquivo .arrow
+        versao (str): Versão atual dos dados
+
+    Returns:
+        pa.Table: Tabela (buffers apontando para o mapeamento) ou None
+    """
+    with _lock:
+        mapeado = _mapeados.get(caminho)
+    if mapeado is not None and mapeado[0] == versao:
+        return mapeado[1]
+
+    try:
+        tabela = pa.ipc.open_file(pa.memory_map(caminho, 'r')).read_all()
+    except (FileNotFoundError, pa.ArrowInvalid):
+        return None
+
+    metadados = tabela.schema.metadata or {}
+    if metadados.get(b'versao', b'').decode('utf-8') != versao:
+        return None
+
+    with _lock:
+        _mapeados[caminho] = (versao, tabela)
+    return tabela
+
+
+def para_dataframe(tabela):
+    """
+    Converte a tabela em DataFrame reaproveitando os buffers mapeados sempre
+    que o tipo permite (colunas numéricas e de data ficam somente leitura).
+
+    Args:
+        tabela (pa.Table): Tabela retornada por ler()
+
+    Returns:
+        pd.DataFrame: Dados do snapshot
+    """
+    return tabela.to_pandas(split_blocks=True)
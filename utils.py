@@ -2,11 +2,8 @@
 Arquivo de configuração e utilitários para o Dashboard de Tickets
 """
 
-import streamlit as st
-import plotly.graph_objects as go
-import plotly.express as px
-from datetime import datetime, timedelta
-import pandas as pd
+# streamlit e plotly são importados dentro das funções que os utilizam, para
+# que importar este módulo (ex.: em scripts e serviços) continue barato.
 
 # Configurações da aplicação
 APP_CONFIG = {
@@ -28,13 +25,24 @@ CORES = {
 GRAFICOS_CONFIG = {
     'height': 400,
     'margin': dict(l=50, r=50, t=50, b=50),
-    'font_size': 12
+    'font_size': 12,
+    'pontos_webgl': 1000    # A partir deste número de pontos, as linhas usam WebGL (Scattergl)
+}
+
+# Sufixo dos títulos dos gráficos conforme a resolução escolhida pela pirâmide temporal
+DESCRICAO_NIVEIS = {
+    'dia': '',
+    'semana': ' (média diária por semana)',
+    'mes': ' (média diária por mês)',
+    'trimestre': ' (média diária por trimestre)'
 }
 
 def aplicar_estilo_customizado():
     """
     Aplica estilos CSS customizados à aplicação.
     """
+    import streamlit as st
+
     st.markdown("""
     <style>
     .main-header {
@@ -100,6 +108,99 @@ def aplicar_estilo_customizado():
     </style>
     """, unsafe_allow_html=True)
 
+def chave_versao(recorte):
+    """
+    Chave de versão de um recorte dos dados (DataFrame ou linha): muda quando
+    qualquer valor do recorte muda.
+    """
+    import hashlib
+
+    import pandas as pd
+
+    if recorte is None or recorte.empty:
+        return "vazio"
+    return hashlib.sha1(pd.util.hash_pandas_object(recorte.astype(str), index=False).values.tobytes()).hexdigest()
+
+def compactar_figura(fig):
+    """
+    Reduz o que uma figura envia ao navegador, sem mudar o que é desenhado:
+    
+    - linhas com muitos pontos (GRAFICOS_CONFIG['pontos_webgl']) passam a
+      Scattergl, desenhadas com WebGL em vez de um elemento SVG por ponto;
+    - datas do eixo x viram milissegundos desde a época em um array binário
+      (base64), em vez de um texto ISO por ponto repetido em cada traço;
+    - atributos de traço iguais ao padrão do plotly.js são removidos, e o
+      template fica só com os tipos de traço usados na figura.
+    
+    Args:
+        fig (plotly.graph_objects.Figure): Figura a compactar (não é alterada)
+        
+    Returns:
+        plotly.graph_objects.Figure: Nova figura compacta
+    """
+    import numpy as np
+    import plotly.graph_objects as go
+    
+    # Atributos que o plotly.express grava com o valor padrão
+    padroes = (
+        (('showlegend',), True), (('xaxis',), 'x'), (('yaxis',), 'y'), (('orientation',), 'v'),
+        (('textposition',), 'auto'), (('line', 'dash'), 'solid'), (('marker', 'symbol'), 'circle'),
+        (('marker', 'pattern', 'shape'), ''), (('fillpattern', 'shape'), '')
+    )
+    tracos = [traco.to_plotly_json() for traco in fig.data]
+    grupos_legenda = [traco.get('legendgroup') for traco in tracos]
+    grupos_pilha = [traco.get('stackgroup') for traco in tracos]
+    eixos_data = set()
+    
+    novos = []
+    for traco in tracos:
+        for caminho, padrao in padroes:
+            ramos = [traco]
+            for chave in caminho[:-1]:
+                ramos.append(ramos[-1].get(chave) if isinstance(ramos[-1].get(chave), dict) else {})
+            if ramos[-1].get(caminho[-1]) == padrao:
+                del ramos[-1][caminho[-1]]
+                # Remove também os dicionários que ficaram vazios
+                for pai, chave in zip(reversed(ramos[:-1]), reversed(caminho[:-1])):
+                    if pai[chave]:
+                        break
+                    del pai[chave]
+        if traco.get('legendgroup') is not None and grupos_legenda.count(traco['legendgroup']) == 1:
+            del traco['legendgroup']
+        
+        x = traco.get('x')
+        if isinstance(x, np.ndarray) and x.dtype.kind == 'M':
+            # Em eixos de data, o plotly.js aceita milissegundos desde a época
+            milissegundos = x.astype('datetime64[ms]').astype('int64').astype('float64')
+            traco['x'] = np.where(np.isnat(x), np.nan, milissegundos)
+            eixos_data.add(traco.get('xaxis', 'x'))
+        
+        if traco.get('type', 'scatter') == 'scatter' and x is not None and len(x) >= GRAFICOS_CONFIG['pontos_webgl']:
+            gl = {**traco, 'type': 'scattergl'}
+            if gl.get('stackgroup') is not None and grupos_pilha.count(gl['stackgroup']) == 1:
+                # Uma pilha de um só traço é uma área até o zero
+                del gl['stackgroup']
+                gl.setdefault('fill', 'tozeroy')
+            try:
+                novos.append(go.Scattergl(gl).to_plotly_json())
+                continue
+            except ValueError:
+                # Atributo sem equivalente em WebGL: mantém o SVG
+                pass
+        novos.append(traco)
+    
+    layout = fig.layout.to_plotly_json()
+    for eixo in eixos_data:
+        layout.setdefault('xaxis' + eixo[1:], {}).setdefault('type', 'date')
+    dados_template = layout.get('template', {}).get('data')
+    if dados_template:
+        tipos = {traco.get('type', 'scatter') for traco in novos}
+        layout['template']['data'] = {tipo: valor for tipo, valor in dados_template.items() if tipo in tipos}
+    
+    # Traços e layout vêm de objetos já validados pelo plotly; revalidar o
+    # template a cada execução custaria mais que todo o resto
+    return go.Figure(data=novos, layout=layout, _validate=False)
+
 def criar_grafico_linha_temporal(df, titulo="Evolução dos Tickets"):
     """
     Cria um gráfico de linha temporal para os tickets.
@@ -111,6 +212,8 @@ def criar_grafico_linha_temporal(df, titulo="Evolução dos Tickets"):
     Returns:
         plotly.graph_objects.Figure: Gráfico configurado
     """
+    import plotly.graph_objects as go
+
     if df.empty:
         return go.Figure()
     
@@ -161,7 +264,7 @@ def criar_grafico_linha_temporal(df, titulo="Evolução dos Tickets"):
         )
     )
     
-    return fig
+    return compactar_figura(fig)
 
 def criar_grafico_barras_comparativo(df, titulo="Comparativo de Tickets"):
     """
@@ -174,6 +277,8 @@ def criar_grafico_barras_comparativo(df, titulo="Comparativo de Tickets"):
     Returns:
         plotly.graph_objects.Figure: Gráfico configurado
     """
+    import plotly.graph_objects as go
+
     if df.empty:
         return go.Figure()
     
@@ -202,7 +307,7 @@ def criar_grafico_barras_comparativo(df, titulo="Comparativo de Tickets"):
         margin=GRAFICOS_CONFIG['margin']
     )
     
-    return fig
+    return compactar_figura(fig)
 
 def criar_grafico_pizza(valores, labels, titulo="Distribuição de Tickets"):
     """
@@ -216,6 +321,8 @@ def criar_grafico_pizza(valores, labels, titulo="Distribuição de Tickets"):
     Returns:
         plotly.graph_objects.Figure: Gráfico configurado
     """
+    import plotly.graph_objects as go
+
     cores = [CORES['iniciados'], CORES['finalizados'], CORES['andamento']]
     
     fig = go.Figure(data=[go.Pie(
@@ -232,7 +339,7 @@ def criar_grafico_pizza(valores, labels, titulo="Distribuição de Tickets"):
         margin=GRAFICOS_CONFIG['margin']
     )
     
-    return fig
+    return compactar_figura(fig)
 
 def criar_grafico_area(df, coluna, titulo="Gráfico de Área"):
     """
@@ -246,6 +353,8 @@ def criar_grafico_area(df, coluna, titulo="Gráfico de Área"):
     Returns:
         plotly.graph_objects.Figure: Gráfico configurado
     """
+    import plotly.graph_objects as go
+
     if df.empty:
         return go.Figure()
     
@@ -268,7 +377,7 @@ def criar_grafico_area(df, coluna, titulo="Gráfico de Área"):
         margin=GRAFICOS_CONFIG['margin']
     )
     
-    return fig
+    return compactar_figura(fig)
 
 def formatar_numero(numero):
     """
@@ -287,12 +396,19 @@ def formatar_numero(numero):
     else:
         return f"{numero:.0f}"
 
-def calcular_kpis(df):
+def calcular_kpis(df, arquivo_dados=None):
     """
     Calcula KPIs importantes dos dados.
     
+    As tendências e médias por dia útil usam a dimensão de calendário
+    (calendario.py): comparam os dias úteis dos últimos 7 dias corridos com os
+    dos 7 anteriores, sem distorção por fins de semana, feriados ou dias sem
+    registro.
+    
     Args:
         df (pd.DataFrame): DataFrame with the data
+        arquivo_dados (str): Arquivo de dados; os feriados locais são lidos do
+            diretório dele (ver calendario.py)
         
     Returns:
         dict: Dicionário com KPIs calculados
@@ -303,31 +419,37 @@ def calcular_kpis(df):
             'tempo_medio_resolucao': 0,
             'tendencia_iniciados': 0,
             'tendencia_finalizados': 0,
-            'eficiencia': 0
+            'eficiencia': 0,
+            'media_iniciados_dia_util': 0,
+            'media_finalizados_dia_util': 0,
+            'dias_uteis_sem_registro': 0
         }
     
+    import numpy as np
+    from calendario import com_calendario, dias_uteis
+    
     # Taxa de resolução (finalizados / iniciados)
     total_iniciados = df['tickets_iniciados'].sum()
     total_finalizados = df['tickets_finalizados'].sum()
     taxa_resolucao = (total_finalizados / total_iniciados * 100) if total_iniciados > 0 else 0
     
-    # Tendências (comparar últimos 7 dias com 7 dias anteriores)
-    if len(df) >= 14:
-        ultimos_7 = df.tail(7)
-        anteriores_7 = df.iloc[-14:-7]
-        
-        tendencia_iniciados = (
-            (ultimos_7['tickets_iniciados'].mean() - anteriores_7['tickets_iniciados'].mean()) 
-            / anteriores_7['tickets_iniciados'].mean() * 100
-        ) if anteriores_7['tickets_iniciados'].mean() > 0 else 0
-        
-        tendencia_finalizados = (
-            (ultimos_7['tickets_finalizados'].mean() - anteriores_7['tickets_finalizados'].mean()) 
-            / anteriores_7['tickets_finalizados'].mean() * 100
-        ) if anteriores_7['tickets_finalizados'].mean() > 0 else 0
-    else:
-        tendencia_iniciados = 0
-        tendencia_finalizados = 0
+    # Registros em dias úteis, com a janela de 7 dias corridos de cada um,
+    # contada a partir do último registro (0 = últimos 7 dias, 1 = 7 anteriores)
+    dados = com_calendario(df, ['dia_util'], arquivo_dados)
+    uteis = dados[dados['dia_util'].fillna(False).to_numpy(dtype=bool)]
+    janela = ((dados['data'].max() - uteis['data']).dt.days // 7).to_numpy()
+    recentes = janela < 2
+    dias_janela = np.bincount(janela[recentes], minlength=2)
+    
+    # Tendências (média por dia útil dos últimos 7 dias contra os 7 anteriores)
+    tendencias = {}
+    for coluna in ('tickets_iniciados', 'tickets_finalizados'):
+        totais = np.bincount(janela[recentes], weights=uteis[coluna].to_numpy()[recentes], minlength=2)
+        if dias_janela.all() and totais[1] > 0:
+            medias = totais / dias_janela
+            tendencias[coluna] = (medias[0] - medias[1]) / medias[1] * 100
+        else:
+            tendencias[coluna] = 0
     
     # Eficiência (finalizados / (iniciados + andamento))
     total_andamento = df['tickets_andamento'].sum()
@@ -335,13 +457,56 @@ def calcular_kpis(df):
         total_finalizados / (total_iniciados + total_andamento) * 100
     ) if (total_iniciados + total_andamento) > 0 else 0
     
+    # Dias úteis do período coberto pelos dados que não têm registro
+    dias_uteis_periodo = dias_uteis(dados['data'].min(), dados['data'].max(), arquivo_dados)
+    
     return {
         'taxa_resolucao': taxa_resolucao,
-        'tendencia_iniciados': tendencia_iniciados,
-        'tendencia_finalizados': tendencia_finalizados,
-        'eficiencia': eficiencia
+        'tendencia_iniciados': tendencias['tickets_iniciados'],
+        'tendencia_finalizados': tendencias['tickets_finalizados'],
+        'eficiencia': eficiencia,
+        'media_iniciados_dia_util': uteis['tickets_iniciados'].mean() if not uteis.empty else 0,
+        'media_finalizados_dia_util': uteis['tickets_finalizados'].mean() if not uteis.empty else 0,
+        'dias_uteis_sem_registro': max(dias_uteis_periodo - uteis['data'].dt.normalize().nunique(), 0)
     }
 
+# Frequências aceitas por agregar_por_periodo (aliases de pandas.Period)
+PERIODOS_AGREGACAO = {
+    'dia': 'D',
+    'semana': 'W',
+    'mes': 'M',
+    'trimestre': 'Q'
+}
+
+def agregar_por_periodo(df, periodo='semana'):
+    """
+    Agrega os registros diários por semana, mês ou trimestre.
+
+    Args:
+        df (pd.DataFrame): DataFrame com os dados
+        periodo (str): Uma das chaves de PERIODOS_AGREGACAO
+
+    Returns:
+        pd.DataFrame: Uma linha por período, com totais e média em andamento
+    """
+    if periodo not in PERIODOS_AGREGACAO:
+        raise ValueError(f"Período inválido: {periodo}")
+
+    colunas = ['inicio_periodo', 'dias', 'total_iniciados', 'total_finalizados', 'media_andamento']
+    if df.empty:
+        return df.reindex(columns=colunas)
+
+    grupos = df.groupby(df['data'].dt.to_period(PERIODOS_AGREGACAO[periodo]))
+    agregado = grupos.agg(
+        dias=('data', 'size'),
+        total_iniciados=('tickets_iniciados', 'sum'),
+        total_finalizados=('tickets_finalizados', 'sum'),
+        media_andamento=('tickets_andamento', 'mean')
+    )
+    agregado.insert(0, 'inicio_periodo', agregado.index.start_time)
+
+    return agregado.reset_index(drop=True)[colunas]
+
 def exibir_metricas_principais(df):
     """
     Exibe as métricas principais em cards organizados.
@@ -349,6 +514,8 @@ def exibir_metricas_principais(df):
     Args:
         df (pd.DataFrame): DataFrame com os dados
     """
+    import streamlit as st
+
     if df.empty:
         st.warning("⚠️ Nenhum dado disponível para calcular métricas.")
         return
@@ -406,6 +573,155 @@ def validar_dados_entrada(tickets_iniciados, tickets_finalizados, tickets_andame
     
     return True, ""
 
+# Regras de consistência da validação em lote
+VALIDACAO_CONFIG = {
+    # Diferença aceita entre o andamento informado e o esperado pelo dia
+    # anterior (andamento anterior + iniciados - finalizados): o maior entre
+    # um valor absoluto e uma fração do andamento anterior
+    'tolerancia_andamento_absoluta': 5,
+    'tolerancia_andamento_relativa': 0.2
+}
+
+COLUNAS_RELATORIO_VALIDACAO = ['linha', 'data', 'nivel', 'regra', 'coluna', 'mensagem']
+
+def validar_lote(df, historico=None):
+    """
+    Valida um lote de registros (ou o histórico inteiro) de uma só vez, com
+    operações vetorizadas, retornando um relatório por linha.
+    
+    Erros impedem a gravação do registro; avisos apontam valores suspeitos,
+    como um andamento que não acompanha o acumulado de iniciados menos
+    finalizados em relação ao dia anterior.
+    
+    Args:
+        df (pd.DataFrame): Registros a validar, com as colunas de COLUNAS
+        historico (pd.DataFrame): Dados já gravados (opcional), usados como
+            dia anterior na checagem de consistência e para detectar datas
+            que serão sobrescritas
+        
+    Returns:
+        pd.DataFrame: Uma linha por problema encontrado, com 'linha' (índice
+        do registro no lote), 'data', 'nivel' ('erro' ou 'aviso'), 'regra',
+        'coluna' e 'mensagem', ordenado por linha
+    """
+    import pandas as pd
+    
+    contadores = ['tickets_iniciados', 'tickets_finalizados', 'tickets_andamento']
+    problemas = []
+    
+    def registrar(mascara, nivel, regra, coluna, mensagem):
+        if mascara.any():
+            problemas.append(pd.DataFrame({
+                'linha': df.index[mascara],
+                'data': datas[mascara],
+                'nivel': nivel,
+                'regra': regra,
+                'coluna': coluna,
+                'mensagem': mensagem
+            }))
+    
+    faltantes = [coluna for coluna in ['data', *contadores] if coluna not in df.columns]
+    if faltantes:
+        return pd.DataFrame([{
+            'linha': None, 'data': pd.NaT, 'nivel': 'erro', 'regra': 'coluna_ausente',
+            'coluna': coluna, 'mensagem': f"❌ Coluna obrigatória ausente: {coluna}"
+        } for coluna in faltantes], columns=COLUNAS_RELATORIO_VALIDACAO)
+    
+    datas = pd.to_datetime(df['data'], errors='coerce').dt.normalize()
+    registrar((datas.isna()).to_numpy(), 'erro', 'data_invalida', 'data', "❌ Data ausente ou inválida.")
+    registrar((datas > pd.Timestamp.today().normalize()).to_numpy(), 'aviso', 'data_futura', 'data',
+              "⚠️ Data no futuro.")
+    registrar((datas.duplicated(keep=False) & datas.notna()).to_numpy(), 'erro', 'data_duplicada', 'data',
+              "❌ Data repetida no lote.")
+    
+    valores = {}
+    for coluna in contadores:
+        numeros = pd.to_numeric(df[coluna], errors='coerce')
+        valores[coluna] = numeros
+        registrar(numeros.isna().to_numpy(), 'erro', 'valor_invalido', coluna, "❌ Valor ausente ou não numérico.")
+        registrar((numeros < 0).to_numpy(), 'erro', 'valor_negativo', coluna, "❌ Os valores não podem ser negativos.")
+        registrar((numeros.notna() & (numeros % 1 != 0)).to_numpy(), 'erro', 'valor_fracionario', coluna,
+                  "❌ O valor deve ser um número inteiro.")
+    
+    # Dias zerados são rejeitados no formulário, mas podem ser legítimos em
+    # importações de histórico (fins de semana, feriados)
+    zerados = (valores['tickets_iniciados'] == 0) & (valores['tickets_finalizados'] == 0) & (valores['tickets_andamento'] == 0)
+    registrar(zerados.to_numpy(), 'aviso', 'dia_zerado', None, "⚠️ Todos os valores são zero.")
+    
+    # Consistência entre dias consecutivos, incluindo o histórico já gravado
+    lote = pd.DataFrame({'data': datas, **valores, 'linha': df.index})
+    if historico is not None and not historico.empty:
+        anteriores = historico[['data', *contadores]].assign(
+            data=pd.to_datetime(historico['data']).dt.normalize(), linha=None
+        )
+        gravadas = set(anteriores['data'])
+        registrar(datas.isin(gravadas).to_numpy(), 'aviso', 'data_existente', 'data',
+                  "⚠️ Já existe registro nesta data; ele será substituído.")
+        # O lote prevalece sobre o histórico nas datas repetidas
+        lote = pd.concat([anteriores[~anteriores['data'].isin(set(datas))], lote], ignore_index=True)
+    
+    lote = lote.dropna(subset=['data']).sort_values('data', kind='stable')
+    consecutivo = lote['data'].diff() == pd.Timedelta(days=1)
+    andamento_anterior = lote['tickets_andamento'].shift(1)
+    esperado = andamento_anterior + lote['tickets_iniciados'] - lote['tickets_finalizados']
+    tolerancia = (andamento_anterior * VALIDACAO_CONFIG['tolerancia_andamento_relativa']).clip(
+        lower=VALIDACAO_CONFIG['tolerancia_andamento_absoluta']
+    )
+    do_lote = lote['linha'].notna()
+    
+    for mascara, regra, coluna, mensagem in (
+        (consecutivo & ((lote['tickets_andamento'] - esperado).abs() > tolerancia), 'andamento_inconsistente',
+         'tickets_andamento', "⚠️ Andamento não acompanha o dia anterior + iniciados - finalizados."),
+        (consecutivo & (lote['tickets_finalizados'] > andamento_anterior + lote['tickets_iniciados']),
+         'finalizados_acima_do_disponivel', 'tickets_finalizados',
+         "⚠️ Mais tickets finalizados do que o andamento anterior + iniciados."),
+    ):
+        linhas = lote.loc[mascara & do_lote, 'linha']
+        registrar(df.index.isin(linhas), 'aviso', regra, coluna, mensagem)
+    
+    if not problemas:
+        return pd.DataFrame(columns=COLUNAS_RELATORIO_VALIDACAO)
+    relatorio = pd.concat(problemas, ignore_index=True)
+    return relatorio.sort_values(['linha', 'nivel'], ascending=[True, False], kind='stable').reset_index(drop=True)
+
+def diferencas_lote(original, editado):
+    """
+    Compara os registros originais com os editados (ex.: em uma grade) e
+    separa só o que mudou, por data.
+
+    Args:
+        original (pd.DataFrame): Registros antes da edição
+        editado (pd.DataFrame): Registros depois da edição; linhas novas e
+            removidas são permitidas, e trocar a data de uma linha equivale
+            a excluir a data antiga e gravar a nova
+
+    Returns:
+        tuple: (DataFrame com as linhas novas ou alteradas, no índice do
+        editado; lista das datas originais que não estão mais no editado)
+    """
+    import pandas as pd
+
+    contadores = ['tickets_iniciados', 'tickets_finalizados', 'tickets_andamento']
+
+    def preparar(df):
+        return df.assign(
+            data=pd.to_datetime(df['data'], errors='coerce').dt.normalize(),
+            links_chamados=df.get('links_chamados', pd.Series('', index=df.index)).fillna('').astype(str),
+            **{coluna: pd.to_numeric(df[coluna], errors='coerce') for coluna in contadores}
+        )[['data', *contadores, 'links_chamados']]
+
+    original, editado = preparar(original), preparar(editado)
+    comparado = editado.reset_index(drop=True).merge(
+        original.dropna(subset=['data']).drop_duplicates('data'),
+        on='data', how='left', suffixes=('', '_original'), indicator=True
+    )
+    alterado = comparado['_merge'] == 'left_only'
+    for coluna in [*contadores, 'links_chamados']:
+        alterado |= comparado[coluna].ne(comparado[f"{coluna}_original"])
+
+    excluir = sorted(set(original['data'].dropna()) - set(editado['data'].dropna()))
+    return editado[alterado.to_numpy()], excluir
+
 def gerar_relatorio_periodo(df, data_inicio, data_fim):
     """
     Gera um relatório para um período específico.